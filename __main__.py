@@ -0,0 +1,4 @@
+import sys
+from crypto_tool.cli import main
+
+sys.exit(main())
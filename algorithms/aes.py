@@ -1,17 +1,110 @@
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
+from crypto_tool import config
+
+BLOCK_SIZE = 16
+# Messages up to this size are padded by concatenation and encrypted with one
+# update call; larger ones are encrypted into a preallocated buffer and only
+# the final block is built by hand
+SMALL_MESSAGE = 4096
+PADDING = [bytes([n]) * n for n in range(BLOCK_SIZE + 1)]
+
+def encrypted_size(plaintext_size: int) -> int:
+    """Length of the padded CBC ciphertext for a plaintext of this size."""
+    return plaintext_size + BLOCK_SIZE - plaintext_size % BLOCK_SIZE
+
+def update_into_chunks(context, data, out, chunk_size: int = None) -> int:
+    """Run data through context.update_into one chunk at a time, writing into out.
+
+    out may be a bytearray, a writable memoryview or an mmap. update_into needs
+    block_size - 1 bytes of slack past what it writes, so only a chunk that
+    would run into the end of out goes through a small scratch buffer and is
+    copied; everything else is written in place. Return the bytes written.
+    chunk_size must be a multiple of the block size.
+    """
+    chunk_size = chunk_size or config.STREAM_CHUNK_SIZE
+    written = 0
+    with memoryview(data) as source, memoryview(out) as target:
+        for offset in range(0, len(source), chunk_size):
+            chunk = source[offset:offset + chunk_size]
+            if len(target) - written >= len(chunk) + BLOCK_SIZE - 1:
+                written += context.update_into(chunk, target[written:])
+                continue
+            scratch = bytearray(len(chunk) + BLOCK_SIZE - 1)
+            count = context.update_into(chunk, scratch)
+            if written + count > len(target):
+                raise ValueError(f"Output buffer too small: need at least {written + count} bytes, got {len(target)}")
+            target[written:written + count] = scratch[:count]
+            written += count
+    return written
+
+def _cipher(key: bytes, iv: bytes) -> Cipher:
+    return Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
+
+def _padding_length(plaintext) -> int:
+    """Length of the PKCS#7 padding ending plaintext; ValueError if it is not valid padding.
+
+    A wrong key or altered ciphertext decrypts to random bytes, so this
+    must pass before any plaintext is handed out.
+    """
+    padding_len = plaintext[-1] if len(plaintext) else 0
+    if not 1 <= padding_len <= min(BLOCK_SIZE, len(plaintext)) or plaintext[-padding_len:] != PADDING[padding_len]:
+        raise ValueError("Invalid padding: wrong key or corrupted input")
+    return padding_len
 
 def encrypt(plaintext: bytes, key: bytes, iv: bytes) -> bytes:
-    cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
-    encryptor = cipher.encryptor()
+    """AES-CBC with PKCS#7 padding; a bytearray for messages over SMALL_MESSAGE, bytes otherwise."""
+    encryptor = _cipher(key, iv).encryptor()
+    size = len(plaintext)
     # AES requires padding to 16 bytes
-    padding_len = 16 - (len(plaintext) % 16)
-    padded = plaintext + bytes([padding_len]) * padding_len
-    return encryptor.update(padded) + encryptor.finalize()
+    padding_len = BLOCK_SIZE - size % BLOCK_SIZE
+    if size <= SMALL_MESSAGE:
+        return encryptor.update(plaintext + PADDING[padding_len]) + encryptor.finalize()
+    # update_into wants block_size - 1 bytes of slack past the output
+    total = size + padding_len
+    out = bytearray(total + BLOCK_SIZE - 1)
+    full = total - BLOCK_SIZE
+    with memoryview(plaintext) as source, memoryview(out) as target:
+        written = encryptor.update_into(source[:full], target)
+        written += encryptor.update_into(bytes(source[full:]) + PADDING[padding_len], target[written:])
+    encryptor.finalize()
+    # Trim the slack in place rather than copying the ciphertext out again
+    del out[written:]
+    return out
 
 def decrypt(ciphertext: bytes, key: bytes, iv: bytes) -> bytes:
-    cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
-    decryptor = cipher.decryptor()
+    decryptor = _cipher(key, iv).decryptor()
     padded = decryptor.update(ciphertext) + decryptor.finalize()
-    padding_len = padded[-1]
-    return padded[:-padding_len]
+    return padded[:-_padding_length(padded)]
+
+def encrypt_into(plaintext, key: bytes, iv: bytes, out, chunk_size: int = None) -> int:
+    """Encrypt into a caller buffer of at least encrypted_size(len(plaintext)) bytes.
+
+    Nothing is allocated apart from the final padded block. Return the
+    ciphertext length.
+    """
+    total = encrypted_size(len(plaintext))
+    if len(out) < total:
+        raise ValueError(f"Output buffer too small: need {total} bytes, got {len(out)}")
+    encryptor = _cipher(key, iv).encryptor()
+    with memoryview(plaintext) as source, memoryview(out) as target:
+        full = total - BLOCK_SIZE
+        written = update_into_chunks(encryptor, source[:full], target[:total], chunk_size)
+        last = bytes(source[full:]) + PADDING[total - len(source)]
+        written += update_into_chunks(encryptor, last, target[written:total])
+    encryptor.finalize()
+    return written
+
+def decrypt_into(ciphertext, key: bytes, iv: bytes, out, chunk_size: int = None) -> int:
+    """Decrypt into a caller buffer of at least len(ciphertext) bytes.
+
+    Return the plaintext length; the padding is left in out past it.
+    Raises ValueError on bad padding.
+    """
+    if len(out) < len(ciphertext):
+        raise ValueError(f"Output buffer too small: need {len(ciphertext)} bytes, got {len(out)}")
+    decryptor = _cipher(key, iv).decryptor()
+    written = update_into_chunks(decryptor, ciphertext, out, chunk_size)
+    decryptor.finalize()
+    with memoryview(out) as target:
+        return written - _padding_length(target[max(0, written - BLOCK_SIZE):written].tobytes())
@@ -0,0 +1,104 @@
+"""Run many small crypto operations in one pass.
+
+A batch shares its key material: one AES-GCM key (and its prepared cipher
+context) for every aes item, one RSA public key for every rsa item and one
+static P-256 key for every ecdh item. Each item still gets its own nonce,
+and the apps hand the AES key back with the response, as /api/aes does, so
+every aes item can be decrypted from it, the item's iv and its tag.
+Like operations, run_batch only takes and returns plain values so the whole
+batch can be shipped to a process pool as a single job.
+"""
+import hashlib
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.backends import default_backend
+from crypto_tool import config
+from crypto_tool.algorithms import hybrid
+from crypto_tool.utils.key_generator import NonceCounter
+
+OPERATIONS = ('aes', 'hash', 'rsa', 'ecdh')
+
+class _BatchContext:
+    """Key material created lazily, once per batch, the first time an item needs it."""
+
+    def __init__(self, aes_key: bytes, rsa_public_der: bytes):
+        self.aes_key = aes_key
+        self.rsa_public_der = rsa_public_der
+        self._aesgcm = None
+        self._nonces = None
+        self._rsa_public_key = None
+        self._ecdh_key = None
+
+    @property
+    def aesgcm(self):
+        if self._aesgcm is None:
+            self._aesgcm = AESGCM(self.aes_key)
+        return self._aesgcm
+
+    @property
+    def nonces(self):
+        # Every aes item shares the key, so its nonces come from one counter
+        if self._nonces is None:
+            self._nonces = NonceCounter(config.GCM_IV_SIZE)
+        return self._nonces
+
+    @property
+    def rsa_public_key(self):
+        if self._rsa_public_key is None:
+            if self.rsa_public_der is None:
+                raise ValueError("Batch has no RSA key")
+            self._rsa_public_key = serialization.load_der_public_key(self.rsa_public_der)
+        return self._rsa_public_key
+
+    @property
+    def ecdh_key(self):
+        if self._ecdh_key is None:
+            self._ecdh_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+        return self._ecdh_key
+
+def _aes(ctx, input_bytes):
+    iv = ctx.nonces.next()
+    sealed = ctx.aesgcm.encrypt(iv, input_bytes, None)
+    tag_start = len(sealed) - config.GCM_TAG_SIZE
+    return {'encryptedSize': tag_start, 'iv': iv.hex()}, {'encrypted': sealed[:tag_start], 'tag': sealed[tag_start:]}
+
+def _hash(ctx, input_bytes):
+    return {}, {'hash': hashlib.sha256(input_bytes).digest()}
+
+def _rsa(ctx, input_bytes):
+    # Same limit and padding as /api/rsa in 'oaep' mode
+    encrypted_data = hybrid.oaep_encrypt(ctx.rsa_public_key, input_bytes)
+    return {'encryptedSize': len(encrypted_data)}, {'encrypted': encrypted_data}
+
+def _ecdh(ctx, input_bytes):
+    peer_private_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+    server_shared_key = ctx.ecdh_key.exchange(ec.ECDH(), peer_private_key.public_key())
+    peer_shared_key = peer_private_key.exchange(ec.ECDH(), ctx.ecdh_key.public_key())
+    return {
+        'keyAgreement': server_shared_key == peer_shared_key,
+        'sharedKeyLength': len(server_shared_key)
+    }, {'sharedKey': server_shared_key}
+
+_HANDLERS = {'aes': _aes, 'hash': _hash, 'rsa': _rsa, 'ecdh': _ecdh}
+
+def run_batch(items, aes_key: bytes, rsa_public_der: bytes = None):
+    """Run a list of (op, input_bytes) items.
+
+    Returns (results, elapsed_ms) where each result is a (fields, blobs) pair;
+    a failing item reports its error without aborting the rest of the batch.
+    """
+    ctx = _BatchContext(aes_key, rsa_public_der)
+    results = []
+    batch_start = time.perf_counter()
+    for op, input_bytes in items:
+        item_start = time.perf_counter()
+        try:
+            fields, blobs = _HANDLERS[op](ctx, input_bytes)
+            fields = {'op': op, 'success': True, **fields}
+        except Exception as e:
+            fields, blobs = {'op': op, 'success': False, 'error': str(e)}, {}
+        fields['time'] = f"{(time.perf_counter() - item_start) * 1000:.3f}"
+        results.append((fields, blobs))
+    return results, (time.perf_counter() - batch_start) * 1000
@@ -0,0 +1,84 @@
+"""Several digests of the same data in one streaming pass.
+
+Each chunk is fed to every requested hash while it is still hot in cache, so
+asking for SHA-256 + BLAKE2b + SHA3-256 reads the input once instead of three
+times. Bytes inputs are walked through memoryview slices, file-like inputs
+through a single reusable buffer, so the pass itself allocates nothing per
+chunk. Time spent inside each algorithm is tracked separately to report
+per-algorithm throughput.
+"""
+import hashlib
+import time
+from crypto_tool import config
+
+# Name accepted by the API -> hashlib constructor
+ALGORITHMS = {
+    'sha256': hashlib.sha256,
+    'sha512': hashlib.sha512,
+    'sha3_256': hashlib.sha3_256,
+    'sha3_512': hashlib.sha3_512,
+    'blake2b': hashlib.blake2b,
+    'blake2s': hashlib.blake2s,
+}
+
+def parse_algorithms(value) -> list:
+    """Accept a list or a comma-separated string of algorithm names; keep order, drop duplicates."""
+    names = value.split(',') if isinstance(value, str) else list(value)
+    selected = []
+    for name in (str(n).strip().lower().replace('-', '_') for n in names):
+        if not name:
+            continue
+        if name not in ALGORITHMS:
+            raise ValueError(f"Unknown digest algorithm {name!r}, expected some of {', '.join(ALGORITHMS)}")
+        if name not in selected:
+            selected.append(name)
+    if not selected:
+        raise ValueError("At least one digest algorithm is required")
+    return selected
+
+class MultiDigest:
+    def __init__(self, algorithms):
+        self.algorithms = list(algorithms)
+        self._hashers = [(name, ALGORITHMS[name]()) for name in self.algorithms]
+        self.elapsed_ns = dict.fromkeys(self.algorithms, 0)
+        self.total = 0
+
+    def update(self, chunk):
+        for name, hasher in self._hashers:
+            start = time.perf_counter_ns()
+            hasher.update(chunk)
+            self.elapsed_ns[name] += time.perf_counter_ns() - start
+        self.total += len(chunk)
+
+    def update_buffer(self, data, chunk_size: int = None):
+        """Feed bytes-like data chunk by chunk without copying it."""
+        chunk_size = chunk_size or config.DIGEST_CHUNK_SIZE
+        view = memoryview(data)
+        for offset in range(0, len(view), chunk_size):
+            self.update(view[offset:offset + chunk_size])
+
+    def update_stream(self, stream, chunk_size: int = None):
+        """Feed a binary file-like object through one reused buffer."""
+        buffer = bytearray(chunk_size or config.DIGEST_CHUNK_SIZE)
+        view = memoryview(buffer)
+        while True:
+            count = stream.readinto(buffer)
+            if not count:
+                break
+            self.update(view[:count])
+
+    def digests(self) -> dict:
+        return {name: hasher.digest() for name, hasher in self._hashers}
+
+    def throughput(self) -> dict:
+        """MB/s achieved by each algorithm, counting only time spent inside it."""
+        return {
+            name: round(self.total / 1_000_000 / (ns / 1_000_000_000), 1) if ns else None
+            for name, ns in self.elapsed_ns.items()
+        }
+
+def multi_digest(data, algorithms, chunk_size: int = None):
+    """Return a finished MultiDigest over bytes-like data."""
+    engine = MultiDigest(algorithms)
+    engine.update_buffer(data, chunk_size)
+    return engine
@@ -0,0 +1,237 @@
+"""Key agreement against long-lived server keys, with cached session keys.
+
+An ECDHEngine holds one static key per curve (X25519 or P-256) and rotates
+it after config.ECDH_KEY_ROTATION_SECONDS, keeping the previous key so
+clients that fetched it just before a rotation can still finish. A
+handshake is one exchange with the client's public key followed by
+HKDF-SHA256; the resulting session key is kept in an LRU keyed by
+(server key id, peer public key, info), so a client that reconnects with
+the same key pays neither. Session keys never leave the server: callers
+get a key confirmation tag (key_confirmation) instead.
+
+Public keys travel as raw 32 bytes for X25519 and as X9.62 points (65
+bytes uncompressed, or 33 compressed) for P-256.
+"""
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, x25519
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from crypto_tool import config
+
+CURVES = ('x25519', 'p256')
+HKDF_INFO = b'crypto_tool ecdh session key'
+CONFIRMATION_LABEL = b'crypto_tool ecdh key confirmation'
+
+def _check_curve(curve: str):
+    if curve not in CURVES:
+        raise ValueError(f"Unknown curve {curve!r}, expected one of {', '.join(CURVES)}")
+
+def generate_private_key(curve: str):
+    _check_curve(curve)
+    if curve == 'x25519':
+        return x25519.X25519PrivateKey.generate()
+    return ec.generate_private_key(ec.SECP256R1())
+
+def private_bytes(curve: str, private_key) -> bytes:
+    """Raw private scalar, small enough to ship to a worker process."""
+    if curve == 'x25519':
+        return private_key.private_bytes_raw()
+    return private_key.private_numbers().private_value.to_bytes(32, 'big')
+
+def load_private_key(curve: str, data: bytes):
+    _check_curve(curve)
+    if curve == 'x25519':
+        return x25519.X25519PrivateKey.from_private_bytes(data)
+    return ec.derive_private_key(int.from_bytes(data, 'big'), ec.SECP256R1())
+
+def public_bytes(curve: str, public_key) -> bytes:
+    if curve == 'x25519':
+        return public_key.public_bytes_raw()
+    return public_key.public_bytes(serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint)
+
+def load_public_key(curve: str, data: bytes):
+    _check_curve(curve)
+    try:
+        if curve == 'x25519':
+            return x25519.X25519PublicKey.from_public_bytes(data)
+        return ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), data)
+    except ValueError:
+        raise ValueError(f"Invalid {curve} public key ({len(data)} bytes)")
+
+def exchange(curve: str, private_key, peer_public_key) -> bytes:
+    if curve == 'x25519':
+        return private_key.exchange(peer_public_key)
+    return private_key.exchange(ec.ECDH(), peer_public_key)
+
+def derive_session_key(shared_secret: bytes, info: bytes = b'', length: int = None) -> bytes:
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=length or config.ECDH_SESSION_KEY_SIZE,
+        salt=None,
+        info=HKDF_INFO + info
+    ).derive(shared_secret)
+
+def key_confirmation(session_key: bytes, peer_public: bytes) -> bytes:
+    """HMAC-SHA256 over the peer's public key under the session key.
+
+    The client recomputes it from its own session key to confirm both
+    sides derived the same key; it reveals nothing about the key itself.
+    """
+    return hmac.new(session_key, CONFIRMATION_LABEL + bytes(peer_public), hashlib.sha256).digest()
+
+def derive_many(curve: str, private_raw: bytes, peers, info: bytes = b'', length: int = None):
+    """Session keys for many peer public keys under one private key; return (keys, elapsed_ms).
+
+    Takes and returns plain bytes so a batch can run on a process pool.
+    """
+    start_time = time.perf_counter_ns()
+    private_key = load_private_key(curve, private_raw)
+    keys = [derive_session_key(exchange(curve, private_key, load_public_key(curve, peer)), info, length) for peer in peers]
+    return keys, (time.perf_counter_ns() - start_time) / 1_000_000
+
+class StaticKey:
+    """A server key pair with a short id clients use to say which key they agreed with."""
+
+    def __init__(self, curve: str, private_key=None, key_id: str = None):
+        self.curve = curve
+        self.private_key = private_key or generate_private_key(curve)
+        self.public_bytes = public_bytes(curve, self.private_key.public_key())
+        self.key_id = key_id or hashlib.sha256(self.public_bytes).hexdigest()[:16]
+        self.created = time.time()
+
+    def describe(self, rotation_seconds: float) -> dict:
+        return {
+            'curve': self.curve,
+            'keyId': self.key_id,
+            'publicKey': self.public_bytes.hex(),
+            'createdAt': round(self.created, 3),
+            'expiresAt': round(self.created + rotation_seconds, 3) if rotation_seconds else None
+        }
+
+class ECDHEngine:
+    """Static-key ECDH for one curve with an LRU of derived session keys.
+
+    runner, if given, is called as runner(fn, *args) to compute the misses of
+    a batch (e.g. on a process pool); single agreements always run inline
+    since one exchange is cheaper than shipping it anywhere.
+
+    resolver, if given, is called with any key id that is neither the current
+    nor the previous key and may return a StaticKey for it (e.g. one kept in
+    a keystore), or None if it does not know the id.
+    """
+
+    def __init__(self, curve: str, rotation_seconds: float = None, cache_size: int = None, runner=None, resolver=None):
+        _check_curve(curve)
+        self.curve = curve
+        self.rotation_seconds = config.ECDH_KEY_ROTATION_SECONDS if rotation_seconds is None else rotation_seconds
+        self.cache_size = cache_size or config.ECDH_SESSION_CACHE_SIZE
+        self.runner = runner
+        self.resolver = resolver
+        self._lock = threading.Lock()
+        self._current = StaticKey(curve)
+        self._previous = None
+        self._sessions = OrderedDict()
+        self.rotations = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def rotate(self) -> StaticKey:
+        """Replace the static key now; the old one stays usable until the next rotation."""
+        fresh = StaticKey(self.curve)
+        with self._lock:
+            self._previous, self._current = self._current, fresh
+            self.rotations += 1
+        return fresh
+
+    def current(self) -> StaticKey:
+        with self._lock:
+            current = self._current
+        if self.rotation_seconds and time.time() - current.created >= self.rotation_seconds:
+            fresh = StaticKey(self.curve)
+            with self._lock:
+                # Another request may have rotated while this one generated
+                if self._current is current:
+                    self._previous, self._current = current, fresh
+                    self.rotations += 1
+                current = self._current
+        return current
+
+    def static_key(self, key_id: str = None) -> StaticKey:
+        """The current key, the previous one, or one from the resolver, as key_id names."""
+        current = self.current()
+        if not key_id or key_id == current.key_id:
+            return current
+        previous = self._previous
+        if previous is not None and key_id == previous.key_id:
+            return previous
+        static = self.resolver(key_id) if self.resolver else None
+        if static is not None:
+            return static
+        raise ValueError(f"Unknown or retired server key id {key_id!r}")
+
+    def _lookup(self, cache_key):
+        with self._lock:
+            session_key = self._sessions.get(cache_key)
+            if session_key is not None:
+                self._sessions.move_to_end(cache_key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return session_key
+
+    def _store(self, cache_key, session_key: bytes):
+        with self._lock:
+            self._sessions[cache_key] = session_key
+            self._sessions.move_to_end(cache_key)
+            while len(self._sessions) > self.cache_size:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def agree(self, peer_public: bytes, key_id: str = None, info: bytes = b''):
+        """Return (key id, session key, cached) for one peer public key."""
+        static = self.static_key(key_id)
+        cache_key = (static.key_id, bytes(peer_public), info)
+        session_key = self._lookup(cache_key)
+        if session_key is not None:
+            return static.key_id, session_key, True
+        shared = exchange(self.curve, static.private_key, load_public_key(self.curve, peer_public))
+        session_key = derive_session_key(shared, info)
+        self._store(cache_key, session_key)
+        return static.key_id, session_key, False
+
+    def agree_many(self, peers, key_id: str = None, info: bytes = b''):
+        """Return (key id, [(session key, cached), ...]) for many peer public keys, computing misses in one job."""
+        static = self.static_key(key_id)
+        results, misses = [], []
+        for peer in peers:
+            session_key = self._lookup((static.key_id, bytes(peer), info))
+            results.append((session_key, session_key is not None))
+            if session_key is None:
+                misses.append(bytes(peer))
+        if misses:
+            args = (self.curve, private_bytes(self.curve, static.private_key), misses, info)
+            derived, _ = self.runner(derive_many, *args) if self.runner else derive_many(*args)
+            fresh = dict(zip(misses, derived))
+            for peer, session_key in fresh.items():
+                self._store((static.key_id, peer, info), session_key)
+            results = [(fresh[bytes(peer)], False) if session_key is None else (session_key, True)
+                       for peer, (session_key, _) in zip(peers, results)]
+        return static.key_id, results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'curve': self.curve,
+                'keyId': self._current.key_id,
+                'rotations': self.rotations,
+                'sessions': len(self._sessions),
+                'maxSessions': self.cache_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,97 @@
+"""Streaming AES-GCM encryption of files in constant memory.
+
+An encrypted file is laid out as
+
+    iv (12 bytes) | ciphertext | tag (16 bytes)
+
+the same framing /api/aes/stream produces, with the IV moved into the file.
+Input is read through mmap or one reused buffer and encrypted with
+update_into into one preallocated output buffer, so memory use depends on
+the chunk size and not on the file size. Output goes to a temp file that
+only replaces the destination once everything, including tag verification
+on decrypt, has succeeded.
+"""
+import hashlib
+import os
+import time
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.backends import default_backend
+from crypto_tool import config
+from crypto_tool.algorithms.aes import BLOCK_SIZE
+from crypto_tool.utils import key_generator
+from crypto_tool.utils.file_handler import atomic_write, read_chunks
+
+OVERHEAD = config.GCM_IV_SIZE + config.GCM_TAG_SIZE
+
+def _pump(context, source, target, length: int, chunk_size: int, use_mmap: bool, progress, hasher=None):
+    """Run length bytes of source through context into target, reporting progress(done, length).
+
+    hasher, if given, sees every input chunk on the way through.
+    """
+    out = bytearray(chunk_size + BLOCK_SIZE - 1)
+    done = 0
+    with memoryview(out) as out_view:
+        for chunk in read_chunks(source, chunk_size, length, use_mmap):
+            if hasher is not None:
+                hasher.update(chunk)
+            count = context.update_into(chunk, out)
+            target.write(out_view[:count])
+            done += len(chunk)
+            if progress is not None:
+                progress(done, length)
+    return done
+
+def _stats(size: int, start_ns: int) -> dict:
+    elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+    return {
+        'bytes': size,
+        'elapsedMs': round(elapsed_ms, 3),
+        'mbPerS': round(size / 1_000_000 / (elapsed_ms / 1000), 1) if elapsed_ms else None
+    }
+
+def encrypt_file(src: str, dst: str, key: bytes, chunk_size: int = None, progress=None, use_mmap: bool = True,
+                 digest: str = None) -> dict:
+    """Encrypt src into dst atomically; return {'bytes', 'elapsedMs', 'mbPerS', 'iv'}.
+
+    progress, if given, is called as progress(bytes_done, bytes_total) after
+    every chunk. With digest (a hashlib name) the plaintext is hashed in the
+    same pass and its hex digest returned as 'digest'.
+    """
+    chunk_size = chunk_size or config.FILE_CHUNK_SIZE
+    start_ns = time.perf_counter_ns()
+    iv = key_generator.generate_iv(config.GCM_IV_SIZE)
+    hasher = hashlib.new(digest) if digest else None
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(iv), backend=default_backend()).encryptor()
+    with open(src, 'rb') as source, atomic_write(dst) as target:
+        target.write(iv)
+        size = _pump(encryptor, source, target, os.fstat(source.fileno()).st_size, chunk_size, use_mmap, progress, hasher)
+        encryptor.finalize()
+        target.write(encryptor.tag)
+    stats = _stats(size, start_ns)
+    stats['iv'] = iv.hex()
+    if hasher is not None:
+        stats['digest'] = hasher.hexdigest()
+    return stats
+
+def decrypt_file(src: str, dst: str, key: bytes, chunk_size: int = None, progress=None, use_mmap: bool = True) -> dict:
+    """Decrypt a file written by encrypt_file into dst atomically.
+
+    Raises cryptography.exceptions.InvalidTag if the file was tampered with;
+    dst is then left untouched.
+    """
+    chunk_size = chunk_size or config.FILE_CHUNK_SIZE
+    start_ns = time.perf_counter_ns()
+    with open(src, 'rb') as source:
+        total = os.fstat(source.fileno()).st_size
+        if total < OVERHEAD:
+            raise ValueError(f"{src} is too short to be an encrypted file")
+        length = total - OVERHEAD
+        iv = source.read(config.GCM_IV_SIZE)
+        source.seek(total - config.GCM_TAG_SIZE)
+        tag = source.read(config.GCM_TAG_SIZE)
+        source.seek(config.GCM_IV_SIZE)
+        decryptor = Cipher(algorithms.AES(key), modes.GCM(iv, tag), backend=default_backend()).decryptor()
+        with atomic_write(dst) as target:
+            size = _pump(decryptor, source, target, length, chunk_size, use_mmap, progress)
+            decryptor.finalize()
+    return _stats(size, start_ns)
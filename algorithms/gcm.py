@@ -0,0 +1,106 @@
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.backends import default_backend
+from crypto_tool import config
+from crypto_tool.algorithms.aes import update_into_chunks
+
+class StreamEncryptor:
+    """Incremental AES-GCM encryption: update() returns ciphertext, finalize() the 16-byte tag."""
+
+    def __init__(self, key: bytes, iv: bytes, associated_data: bytes = None):
+        self._encryptor = Cipher(algorithms.AES(key), modes.GCM(iv), backend=default_backend()).encryptor()
+        if associated_data:
+            self._encryptor.authenticate_additional_data(associated_data)
+
+    def update(self, chunk) -> bytes:
+        return self._encryptor.update(chunk)
+
+    def finalize(self) -> bytes:
+        # GCM never buffers, so finalize() is empty; the tag closes the stream
+        return self._encryptor.finalize() + self._encryptor.tag
+
+def encrypt_stream(chunks, key: bytes, iv: bytes, associated_data: bytes = None):
+    """Encrypt an iterable of plaintext chunks with AES-GCM.
+
+    Yields ciphertext chunks as they are produced, followed by the
+    16-byte authentication tag, so memory stays bounded by the chunk size.
+    """
+    encryptor = StreamEncryptor(key, iv, associated_data)
+    for chunk in chunks:
+        yield encryptor.update(chunk)
+    yield encryptor.finalize()
+
+def encrypt_into(data, key: bytes, iv: bytes, out, chunk_size: int = None) -> bytes:
+    """Encrypt data with AES-GCM into a caller buffer of at least len(data) bytes; return the tag.
+
+    out may be a bytearray, a writable memoryview or an mmap, so a large
+    payload needs one output allocation, or none when out maps a file.
+    """
+    if len(out) < len(data):
+        raise ValueError(f"Output buffer too small: need {len(data)} bytes, got {len(out)}")
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(iv), backend=default_backend()).encryptor()
+    update_into_chunks(encryptor, data, out, chunk_size)
+    encryptor.finalize()
+    return encryptor.tag
+
+def decrypt_into(data, key: bytes, iv: bytes, tag: bytes, out, chunk_size: int = None) -> int:
+    """Decrypt AES-GCM data into a caller buffer and verify the tag; return the plaintext length.
+
+    The buffer is written before the tag is checked, so on InvalidTag its
+    contents must be discarded.
+    """
+    if len(out) < len(data):
+        raise ValueError(f"Output buffer too small: need {len(data)} bytes, got {len(out)}")
+    decryptor = Cipher(algorithms.AES(key), modes.GCM(iv, tag), backend=default_backend()).decryptor()
+    written = update_into_chunks(decryptor, data, out, chunk_size)
+    decryptor.finalize()
+    return written
+
+class StreamDecryptor:
+    """Incremental AES-GCM decryption.
+
+    With tag=None the tag is taken from the last 16 bytes of the ciphertext
+    (the framing encrypt_stream produces), so the final bytes of every chunk
+    are held back until the next one arrives. update() returns plaintext that
+    is NOT yet authenticated: nothing it returns may be released before
+    finalize() has returned.
+    """
+
+    def __init__(self, key: bytes, iv: bytes, tag: bytes = None, associated_data: bytes = None):
+        self.trailing_tag = tag is None
+        mode = modes.GCM(iv) if self.trailing_tag else modes.GCM(iv, tag)
+        self._decryptor = Cipher(algorithms.AES(key), mode, backend=default_backend()).decryptor()
+        if associated_data:
+            self._decryptor.authenticate_additional_data(associated_data)
+        self._pending = b''
+
+    def update(self, chunk) -> bytes:
+        if not self.trailing_tag:
+            return self._decryptor.update(chunk)
+        if len(chunk) >= config.GCM_TAG_SIZE:
+            head, self._pending = self._pending + chunk[:-config.GCM_TAG_SIZE], chunk[-config.GCM_TAG_SIZE:]
+        else:
+            pending = self._pending + chunk
+            head, self._pending = pending[:-config.GCM_TAG_SIZE], pending[-config.GCM_TAG_SIZE:]
+        return self._decryptor.update(head) if head else b''
+
+    def finalize(self):
+        """Check the tag; raises cryptography.exceptions.InvalidTag on any mismatch."""
+        if not self.trailing_tag:
+            self._decryptor.finalize()
+        elif len(self._pending) < config.GCM_TAG_SIZE:
+            raise ValueError("Ciphertext is too short to hold a GCM tag")
+        else:
+            self._decryptor.finalize_with_tag(self._pending)
+
+def decrypt_stream(chunks, key: bytes, iv: bytes, tag: bytes = None, associated_data: bytes = None):
+    """Decrypt an iterable of AES-GCM ciphertext chunks; see StreamDecryptor.
+
+    The tag is checked after the last chunk, so the caller must not act on
+    the yielded plaintext until the generator finishes without InvalidTag.
+    """
+    decryptor = StreamDecryptor(key, iv, tag, associated_data)
+    for chunk in chunks:
+        block = decryptor.update(chunk)
+        if block:
+            yield block
+    decryptor.finalize()
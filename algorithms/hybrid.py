@@ -0,0 +1,140 @@
+"""Hybrid RSA-OAEP + AES-GCM envelopes for payloads of any size.
+
+A fresh 256-bit data key is wrapped once with RSA-OAEP (SHA-256) and the
+payload is encrypted with AES-GCM under it, so sealing costs one RSA
+public-key operation plus AES throughput however large the payload is.
+An envelope is self-describing:
+
+    b'CTH1' | u16 wrapped key length | wrapped key | nonce (12) | ciphertext | tag (16)
+
+Everything before the ciphertext is authenticated as associated data, so
+the wrapped key and nonce cannot be swapped without the tag failing.
+"""
+import struct
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.backends import default_backend
+from crypto_tool import config
+from crypto_tool.algorithms import gcm
+from crypto_tool.algorithms.aes import update_into_chunks
+from crypto_tool.utils import key_generator
+
+MAGIC = b'CTH1'
+DATA_KEY_SIZE = 32
+_PREFIX = struct.Struct('>4sH')
+
+class PlaintextTooLarge(ValueError):
+    """Raised for a payload too long for one RSA-OAEP block."""
+
+def oaep_padding():
+    return padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+
+def oaep_max_plaintext(key_size: int) -> int:
+    # OAEP with SHA-256 costs 66 bytes of padding
+    return key_size // 8 - 2 * 32 - 2
+
+def oaep_encrypt(public_key, data: bytes) -> bytes:
+    """RSA-OAEP (SHA-256) encryption of a payload that fits in one block."""
+    max_len = oaep_max_plaintext(public_key.key_size)
+    if len(data) > max_len:
+        raise PlaintextTooLarge(f"RSA-{public_key.key_size} can only encrypt up to {max_len} bytes. Your input is {len(data)} bytes.")
+    return public_key.encrypt(data, oaep_padding())
+
+def header_size(key_size: int) -> int:
+    return _PREFIX.size + key_size // 8 + config.GCM_IV_SIZE
+
+def envelope_size(plaintext_size: int, key_size: int) -> int:
+    return header_size(key_size) + plaintext_size + config.GCM_TAG_SIZE
+
+def new_header(public_key):
+    """Return (header, data key, nonce) for a new envelope to public_key."""
+    data_key = key_generator.generate_aes_key(DATA_KEY_SIZE)
+    nonce = key_generator.generate_iv(config.GCM_IV_SIZE)
+    wrapped = public_key.encrypt(data_key, oaep_padding())
+    return _PREFIX.pack(MAGIC, len(wrapped)) + wrapped + nonce, data_key, nonce
+
+def _header_length(data):
+    """Length of the header at the start of data, or None while its fixed prefix is incomplete."""
+    if len(data) < _PREFIX.size:
+        return None
+    magic, wrapped_size = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a hybrid envelope (bad magic)")
+    return _PREFIX.size + wrapped_size + config.GCM_IV_SIZE
+
+def parse_header(data) -> tuple:
+    """Return (wrapped key, nonce, header length) from the start of an envelope."""
+    end = _header_length(data)
+    if end is None or len(data) < end:
+        raise ValueError("Envelope is too short to hold its header")
+    wrapped = bytes(data[_PREFIX.size:end - config.GCM_IV_SIZE])
+    return wrapped, bytes(data[end - config.GCM_IV_SIZE:end]), end
+
+def _unwrap(private_key, wrapped: bytes) -> bytes:
+    try:
+        return private_key.decrypt(wrapped, oaep_padding())
+    except ValueError:
+        raise ValueError("Envelope key does not unwrap with this RSA key")
+
+def seal(public_key, plaintext, chunk_size: int = None) -> bytearray:
+    """Encrypt plaintext into one envelope, written into a single preallocated buffer."""
+    header, data_key, nonce = new_header(public_key)
+    size = len(plaintext)
+    out = bytearray(len(header) + size + config.GCM_TAG_SIZE)
+    out[:len(header)] = header
+    encryptor = Cipher(algorithms.AES(data_key), modes.GCM(nonce), backend=default_backend()).encryptor()
+    encryptor.authenticate_additional_data(header)
+    with memoryview(out) as view:
+        update_into_chunks(encryptor, plaintext, view[len(header):len(header) + size], chunk_size)
+        encryptor.finalize()
+        view[len(header) + size:] = encryptor.tag
+    return out
+
+def seal_stream(public_key, chunks):
+    """Yield an envelope piece by piece: header, ciphertext chunks, then the tag."""
+    header, data_key, nonce = new_header(public_key)
+    yield header
+    yield from gcm.encrypt_stream(chunks, data_key, nonce, associated_data=header)
+
+def unseal(private_key, envelope) -> bytes:
+    """Decrypt a whole envelope; raises cryptography.exceptions.InvalidTag if it was altered."""
+    wrapped, nonce, start = parse_header(envelope)
+    if len(envelope) - start < config.GCM_TAG_SIZE:
+        raise ValueError("Envelope is too short to hold a tag")
+    data_key = _unwrap(private_key, wrapped)
+    with memoryview(envelope) as view:
+        body, tag = view[start:-config.GCM_TAG_SIZE], view[-config.GCM_TAG_SIZE:]
+        decryptor = Cipher(algorithms.AES(data_key), modes.GCM(nonce, bytes(tag)), backend=default_backend()).decryptor()
+        decryptor.authenticate_additional_data(view[:start])
+        out = bytearray(len(body))
+        update_into_chunks(decryptor, body, out)
+        decryptor.finalize()
+    return bytes(out)
+
+def unseal_stream(private_key, chunks):
+    """Decrypt an envelope arriving in chunks; see gcm.decrypt_stream.
+
+    The tag is checked after the last chunk, so nothing yielded may be
+    acted on until the generator finishes without InvalidTag.
+    """
+    chunks = iter(chunks)
+    buffered = b''
+    # The wrapped key length is only known once the fixed prefix is in
+    while True:
+        end = _header_length(buffered)
+        if end is not None and len(buffered) >= end:
+            break
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise ValueError("Envelope is too short to hold its header")
+        buffered += chunk
+    wrapped, nonce, start = parse_header(buffered)
+    data_key = _unwrap(private_key, wrapped)
+
+    def body():
+        if len(buffered) > start:
+            yield buffered[start:]
+        yield from chunks
+
+    yield from gcm.decrypt_stream(body(), data_key, nonce, associated_data=buffered[:start])
@@ -0,0 +1,93 @@
+"""Crypto work behind the web API endpoints.
+
+Every function is a top-level callable taking and returning plain bytes and
+numbers so it can be shipped to a process pool as well as run in a thread.
+Timings are measured inside the worker and exclude queueing.
+"""
+import hashlib
+import time
+from crypto_tool.algorithms import digest, gcm, tree_hash
+
+# The asymmetric primitives are imported inside the functions that use them,
+# so workers that only ever run AES or hashing never load them
+
+def aes_gcm_encrypt(input_bytes: bytes, key: bytes, iv: bytes):
+    """Return (ciphertext, tag, elapsed_ms).
+
+    The ciphertext is written straight into the one bytearray returned.
+    """
+    encrypted_data = bytearray(len(input_bytes))
+    start_time = time.perf_counter_ns()
+    tag = gcm.encrypt_into(input_bytes, key, iv, encrypted_data)
+    return encrypted_data, tag, (time.perf_counter_ns() - start_time) / 1_000_000
+
+def rsa_generate_der(key_size: int = 2048) -> bytes:
+    """Generate an RSA private key and return it as unencrypted PKCS#8 DER."""
+    from cryptography.hazmat.primitives import serialization
+    from crypto_tool.utils.key_pool import generate_rsa_key
+    return generate_rsa_key(key_size).private_bytes(
+        serialization.Encoding.DER,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+
+def hybrid_seal(input_bytes: bytes, public_der: bytes):
+    """Seal a payload to a DER SubjectPublicKeyInfo RSA key; return (envelope, elapsed_ms)."""
+    from cryptography.hazmat.primitives import serialization
+    from crypto_tool.algorithms import hybrid
+    start_time = time.perf_counter_ns()
+    envelope = hybrid.seal(serialization.load_der_public_key(public_der), input_bytes)
+    return envelope, (time.perf_counter_ns() - start_time) / 1_000_000
+
+def hybrid_unseal(envelope: bytes, private_der: bytes):
+    """Open a hybrid envelope with a PKCS#8 DER private key; return (plaintext, elapsed_ms)."""
+    from cryptography.hazmat.primitives import serialization
+    from crypto_tool.algorithms import hybrid
+    start_time = time.perf_counter_ns()
+    # Only keys this service serialized are sent here, so skip the costly RSA checks
+    private_key = serialization.load_der_private_key(private_der, password=None, unsafe_skip_rsa_key_validation=True)
+    plaintext = hybrid.unseal(private_key, envelope)
+    return plaintext, (time.perf_counter_ns() - start_time) / 1_000_000
+
+def ecdh_agree():
+    """Run a P-256 key agreement between two fresh key pairs.
+
+    Return (alice_shared_key, bob_shared_key, elapsed_ms).
+    """
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.backends import default_backend
+    start_time = time.perf_counter_ns()
+    alice_private_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+    bob_private_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+    alice_shared_key = alice_private_key.exchange(ec.ECDH(), bob_private_key.public_key())
+    bob_shared_key = bob_private_key.exchange(ec.ECDH(), alice_private_key.public_key())
+    return alice_shared_key, bob_shared_key, (time.perf_counter_ns() - start_time) / 1_000_000
+
+def sha256_digest(input_bytes: bytes):
+    """Return (digest, elapsed_ms)."""
+    start_time = time.perf_counter_ns()
+    hash_digest = hashlib.sha256(input_bytes).digest()
+    return hash_digest, (time.perf_counter_ns() - start_time) / 1_000_000
+
+def sha256_tree_digest(input_bytes: bytes, leaf_size: int):
+    """Return (Merkle root, concatenated leaf digests, elapsed_ms)."""
+    start_time = time.perf_counter_ns()
+    root, leaves = tree_hash.tree_hash(input_bytes, leaf_size)
+    return root, b''.join(leaves), (time.perf_counter_ns() - start_time) / 1_000_000
+
+def multi_digest(input_bytes: bytes, algorithms):
+    """Return ({algorithm: digest}, {algorithm: MB/s}, elapsed_ms) from a single pass."""
+    start_time = time.perf_counter_ns()
+    engine = digest.multi_digest(input_bytes, algorithms)
+    elapsed_ms = (time.perf_counter_ns() - start_time) / 1_000_000
+    return engine.digests(), engine.throughput(), elapsed_ms
+
+def hash_outputs(input_bytes: bytes, mode: str, leaf_size: int = None, algorithms=None):
+    """Run one /api/hash mode; return ({blob name: digest}, throughput or None, elapsed_ms)."""
+    if mode == 'multi':
+        return multi_digest(input_bytes, algorithms)
+    if mode == 'tree':
+        root, leaves, elapsed_ms = sha256_tree_digest(input_bytes, leaf_size)
+        return {'hash': root, 'leaves': leaves}, None, elapsed_ms
+    hash_digest, elapsed_ms = sha256_digest(input_bytes)
+    return {'hash': hash_digest}, None, elapsed_ms
@@ -0,0 +1,382 @@
+"""Segmented AES-GCM container for parallel and random-access encryption.
+
+The plaintext is cut into fixed-size segments that are sealed independently,
+so segments can be encrypted or decrypted on many cores at once and any byte
+range can be read back by opening only the segments that cover it:
+
+    header  = b'CTS1' | u8 key id length | key id | u32 segment size | nonce prefix (7 bytes)
+    segment = AES-GCM(plaintext segment) | tag (16 bytes)
+
+Segment i is sealed under the nonce
+
+    nonce prefix | u32 i | u8 final flag
+
+with the whole header as associated data. The final flag is 1 only on the
+last segment, so a file cannot be truncated or extended at a segment
+boundary without a tag failure. Every segment but the last holds exactly
+segment size bytes of plaintext; empty plaintext is a single empty final
+segment. All integers are big-endian.
+"""
+import os
+import struct
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.backends import default_backend
+from crypto_tool import config
+from crypto_tool.utils import executor, key_generator
+from crypto_tool.utils.file_handler import atomic_write
+
+MAGIC = b'CTS1'
+NONCE_PREFIX_SIZE = 7
+TAG_SIZE = config.GCM_TAG_SIZE
+# update_into wants this much room past what it writes
+_SLACK = 15
+
+Header = namedtuple('Header', 'key_id segment_size nonce_prefix')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Threads for the in-memory API, where segments share one output buffer."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=config.SEGMENT_WORKERS, thread_name_prefix='segments')
+        return _pool
+
+def new_header(key_id=b'', segment_size: int = None) -> Header:
+    if isinstance(key_id, str):
+        key_id = key_id.encode('utf-8')
+    if len(key_id) > 255:
+        raise ValueError("Key id must be at most 255 bytes")
+    segment_size = segment_size or config.SEGMENT_SIZE
+    if not 0 < segment_size < 2 ** 32:
+        raise ValueError("Segment size must be between 1 byte and 4 GiB")
+    return Header(key_id, segment_size, key_generator.random_bytes(NONCE_PREFIX_SIZE))
+
+def pack_header(header: Header) -> bytes:
+    return b''.join([
+        MAGIC,
+        struct.pack('>B', len(header.key_id)),
+        header.key_id,
+        struct.pack('>I', header.segment_size),
+        header.nonce_prefix
+    ])
+
+def parse_header(data):
+    """Return (Header, header length) from the start of a container."""
+    view = memoryview(data)
+    if len(view) < 5 or bytes(view[:4]) != MAGIC:
+        raise ValueError("Not a segmented crypto-tool container")
+    key_id_len = view[4]
+    size = 5 + key_id_len + 4 + NONCE_PREFIX_SIZE
+    if len(view) < size:
+        raise ValueError("Container header is truncated")
+    key_id = bytes(view[5:5 + key_id_len])
+    (segment_size,) = struct.unpack_from('>I', view, 5 + key_id_len)
+    nonce_prefix = bytes(view[size - NONCE_PREFIX_SIZE:size])
+    return Header(key_id, segment_size, nonce_prefix), size
+
+def read_header(stream):
+    """Read the header from the start of a binary file; return (Header, raw header bytes)."""
+    start = stream.read(5)
+    raw = start + stream.read((start[4] if len(start) == 5 else 0) + 4 + NONCE_PREFIX_SIZE)
+    header, size = parse_header(raw)
+    return header, raw[:size]
+
+def segment_nonce(header: Header, index: int, final: bool) -> bytes:
+    return header.nonce_prefix + struct.pack('>IB', index, 1 if final else 0)
+
+def segment_count(plaintext_size: int, segment_size: int) -> int:
+    return max(1, -(-plaintext_size // segment_size))
+
+def encrypted_size(plaintext_size: int, header: Header) -> int:
+    count = segment_count(plaintext_size, header.segment_size)
+    return len(pack_header(header)) + plaintext_size + count * TAG_SIZE
+
+def layout(body_size: int, segment_size: int):
+    """Return (segment count, plaintext size) for the bytes after the header."""
+    count = max(1, -(-body_size // (segment_size + TAG_SIZE)))
+    plaintext_size = body_size - count * TAG_SIZE
+    # Only a lone final segment may be empty
+    if plaintext_size < 0 or (count > 1 and plaintext_size <= (count - 1) * segment_size):
+        raise ValueError("Container is truncated")
+    return count, plaintext_size
+
+def encrypt_segment(key: bytes, header: Header, aad: bytes, index: int, final: bool, plaintext, out) -> int:
+    """Seal one segment into out, which needs room for len(plaintext) + TAG_SIZE bytes."""
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(segment_nonce(header, index, final)), backend=default_backend()).encryptor()
+    encryptor.authenticate_additional_data(aad)
+    with memoryview(out) as target:
+        written = encryptor.update_into(plaintext, target) if len(plaintext) else 0
+        encryptor.finalize()
+        target[written:written + TAG_SIZE] = encryptor.tag
+    return written + TAG_SIZE
+
+def decrypt_segment(key: bytes, header: Header, aad: bytes, index: int, final: bool, sealed, out) -> int:
+    """Open one segment into out, which needs len(sealed) - TAG_SIZE + 15 bytes of room.
+
+    Raises InvalidTag if the segment, its position or the header was altered.
+    """
+    with memoryview(sealed) as source:
+        tag = bytes(source[-TAG_SIZE:])
+        decryptor = Cipher(algorithms.AES(key), modes.GCM(segment_nonce(header, index, final), tag), backend=default_backend()).decryptor()
+        decryptor.authenticate_additional_data(aad)
+        written = decryptor.update_into(source[:-TAG_SIZE], out) if len(source) > TAG_SIZE else 0
+    decryptor.finalize()
+    return written
+
+def encrypt(data, key: bytes, key_id=b'', segment_size: int = None) -> bytearray:
+    """Encrypt bytes-like data into a new container, sealing segments in parallel."""
+    header = new_header(key_id, segment_size)
+    aad = pack_header(header)
+    size = len(data)
+    count = segment_count(size, header.segment_size)
+    out = bytearray(len(aad) + size + count * TAG_SIZE)
+    out[:len(aad)] = aad
+    step = header.segment_size
+    with memoryview(data) as source, memoryview(out) as target:
+        def seal(index):
+            # Segments write only their own region; the view runs to the end for update_into's slack
+            offset = len(aad) + index * (step + TAG_SIZE)
+            return encrypt_segment(key, header, aad, index, index == count - 1, source[index * step:(index + 1) * step], target[offset:])
+        list(_get_pool().map(seal, range(count)))
+    return out
+
+def decrypt_segments(data, key: bytes, first: int = 0, stop: int = None):
+    """Decrypt segments first..stop-1 of an in-memory container (bytes, bytearray or mmap).
+
+    Return (plaintext of those segments, plaintext offset of segment first).
+    """
+    header, header_size = parse_header(data)
+    step = header.segment_size
+    count, plaintext_size = layout(len(data) - header_size, step)
+    stop = count if stop is None else min(stop, count)
+    if not 0 <= first < stop:
+        raise ValueError(f"Segment range {first}..{stop} is outside 0..{count}")
+    aad = bytes(memoryview(data)[:header_size])
+    size = min(stop * step, plaintext_size) - first * step
+    out = bytearray(size + _SLACK)
+    with memoryview(data) as source, memoryview(out) as target:
+        def open_segment(index):
+            offset = header_size + index * (step + TAG_SIZE)
+            sealed = source[offset:offset + step + TAG_SIZE]
+            return decrypt_segment(key, header, aad, index, index == count - 1, sealed, target[(index - first) * step:])
+        if stop - first == 1:
+            open_segment(first)
+        else:
+            list(_get_pool().map(open_segment, range(first, stop)))
+    del out[size:]
+    return out, first * step
+
+def decrypt(data, key: bytes) -> bytearray:
+    """Decrypt a whole in-memory container, opening segments in parallel."""
+    return decrypt_segments(data, key)[0]
+
+def decrypt_range(data, key: bytes, start: int, end: int) -> bytes:
+    """Return plaintext[start:end] of a container, decrypting only the segments that cover it."""
+    header, header_size = parse_header(data)
+    _, plaintext_size = layout(len(data) - header_size, header.segment_size)
+    start, end = max(0, start), min(end, plaintext_size)
+    if start >= end:
+        return b''
+    first, stop = start // header.segment_size, -(-end // header.segment_size)
+    plaintext, base = decrypt_segments(data, key, first, stop)
+    return bytes(memoryview(plaintext)[start - base:end - base])
+
+def open_container(stream):
+    """Read a container's header from a seekable binary file.
+
+    Return (Header, raw header bytes, segment count, plaintext size).
+    """
+    stream.seek(0)
+    header, raw = read_header(stream)
+    count, plaintext_size = layout(os.fstat(stream.fileno()).st_size - len(raw), header.segment_size)
+    return header, raw, count, plaintext_size
+
+def iter_range(stream, key: bytes, start: int, end: int):
+    """Yield plaintext[start:end] of a container file, one segment at a time.
+
+    Only the segments covering the range are read and opened, so the cost is
+    O(range) and memory stays at one segment whatever the file size. At
+    least one segment is always opened, even for an empty range or an empty
+    container, so a wrong key raises InvalidTag before anything is yielded.
+    """
+    header, aad, count, plaintext_size = open_container(stream)
+    step = header.segment_size
+    start, end = max(0, start), min(end, plaintext_size)
+    first = min(start // step, count - 1)
+    stop = max(first + 1, -(-end // step))
+    sealed = bytearray(step + TAG_SIZE)
+    plain = bytearray(step + _SLACK)
+    with memoryview(sealed) as sealed_view, memoryview(plain) as plain_view:
+        for index in range(first, stop):
+            stream.seek(len(aad) + index * (step + TAG_SIZE))
+            length = stream.readinto(sealed_view)
+            written = decrypt_segment(key, header, aad, index, index == count - 1, sealed_view[:length], plain)
+            base = index * step
+            if start < end:
+                yield bytes(plain_view[max(start, base) - base:min(end, base + written) - base])
+
+def read_range(stream, key: bytes, start: int, end: int) -> bytes:
+    """Return plaintext[start:end] of a container file, decrypting only the segments that cover it."""
+    return b''.join(iter_range(stream, key, start, end))
+
+def encrypt_stream(source, target, key: bytes, key_id=b'', segment_size: int = None):
+    """Seal a binary stream of unknown length into target, one segment at a time.
+
+    One segment is read ahead so the last one can carry the final flag.
+    Return (Header, plaintext size).
+    """
+    header = new_header(key_id, segment_size)
+    aad = pack_header(header)
+    target.write(aad)
+    step = header.segment_size
+    current, ahead = bytearray(step), bytearray(step)
+    sealed = bytearray(step + TAG_SIZE)
+    length = _read_full(source, current)
+    index = total = 0
+    while True:
+        next_length = _read_full(source, ahead) if length == step else 0
+        final = next_length == 0
+        written = encrypt_segment(key, header, aad, index, final, memoryview(current)[:length], sealed)
+        target.write(memoryview(sealed)[:written])
+        total += length
+        if final:
+            return header, total
+        current, ahead, length = ahead, current, next_length
+        index += 1
+
+def decrypt_stream(source, target, key: bytes):
+    """Open a container arriving on a binary stream (e.g. stdin) into target, one segment at a time.
+
+    A segment is written only after its tag verifies, so target never sees
+    unauthenticated plaintext. One sealed segment is read ahead to tell
+    which is last; a stream cut short at a segment boundary fails on its
+    final segment, after the authentic segments before it were written.
+    Return (Header, plaintext size).
+    """
+    header, aad = read_header(source)
+    step = header.segment_size
+    current, ahead = bytearray(step + TAG_SIZE), bytearray(step + TAG_SIZE)
+    plain = bytearray(step + _SLACK)
+    length = _read_full(source, current)
+    index = total = 0
+    while True:
+        if length < TAG_SIZE:
+            raise ValueError("Container is truncated")
+        next_length = _read_full(source, ahead) if length == len(current) else 0
+        final = next_length == 0
+        written = decrypt_segment(key, header, aad, index, final, memoryview(current)[:length], plain)
+        target.write(memoryview(plain)[:written])
+        total += written
+        if final:
+            return header, total
+        current, ahead, length = ahead, current, next_length
+        index += 1
+
+def _read_full(stream, buffer) -> int:
+    """Fill buffer from a stream that may return short reads; return the bytes read."""
+    view = memoryview(buffer)
+    filled = 0
+    while filled < len(view):
+        chunk = stream.read(len(view) - filled)
+        if not chunk:
+            break
+        view[filled:filled + len(chunk)] = chunk
+        filled += len(chunk)
+    return filled
+
+def _encrypt_file_segments(src: str, dst: str, key: bytes, header: Header, first: int, stop: int, count: int) -> int:
+    """Worker: seal segments first..stop-1 of src into their slots in dst; return plaintext bytes done.
+
+    Each worker opens its own handles, so only paths and key material cross
+    the process boundary.
+    """
+    aad = pack_header(header)
+    step = header.segment_size
+    buffer = bytearray(step)
+    sealed = bytearray(step + TAG_SIZE)
+    done = 0
+    with open(src, 'rb') as source, open(dst, 'r+b') as target, memoryview(buffer) as view:
+        source.seek(first * step)
+        target.seek(len(aad) + first * (step + TAG_SIZE))
+        for index in range(first, stop):
+            length = source.readinto(view)
+            written = encrypt_segment(key, header, aad, index, index == count - 1, view[:length], sealed)
+            target.write(memoryview(sealed)[:written])
+            done += length
+    return done
+
+def _decrypt_file_segments(src: str, dst: str, key: bytes, header: Header, header_size: int, first: int, stop: int, count: int) -> int:
+    aad = pack_header(header)
+    step = header.segment_size
+    buffer = bytearray(step + TAG_SIZE)
+    plain = bytearray(step + _SLACK)
+    done = 0
+    with open(src, 'rb') as source, open(dst, 'r+b') as target, memoryview(buffer) as view:
+        source.seek(header_size + first * (step + TAG_SIZE))
+        target.seek(first * step)
+        for index in range(first, stop):
+            length = source.readinto(view)
+            written = decrypt_segment(key, header, aad, index, index == count - 1, view[:length], plain)
+            target.write(memoryview(plain)[:written])
+            done += written
+    return done
+
+def _run_file_jobs(worker, count: int, args, progress, total: int):
+    """Spread segments over the 'segments' executor in runs of SEGMENT_BATCH, a bounded window at a time."""
+    pool = executor.get_executor('segments')
+    runs = [(first, min(first + config.SEGMENT_BATCH, count)) for first in range(0, count, config.SEGMENT_BATCH)]
+    window = max(1, min(config.EXECUTOR_WORKERS * 2, config.EXECUTOR_MAX_PENDING))
+    pending, done = set(), 0
+    try:
+        while runs or pending:
+            while runs and len(pending) < window:
+                first, stop = runs.pop(0)
+                pending.add(pool.submit(worker, *args(first, stop)))
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done += future.result()
+                if progress is not None:
+                    progress(done, total)
+    except BaseException:
+        # Let runs already in flight finish before the temp file goes away
+        for future in pending:
+            future.cancel()
+        wait(pending)
+        raise
+
+def encrypt_file(src: str, dst: str, key: bytes, key_id=b'', segment_size: int = None, progress=None) -> Header:
+    """Encrypt src into a container at dst (atomically), with segments sealed across worker processes."""
+    header = new_header(key_id, segment_size)
+    size = os.path.getsize(src)
+    count = segment_count(size, header.segment_size)
+    with atomic_write(dst) as target:
+        target.write(pack_header(header))
+        target.truncate(encrypted_size(size, header))
+        target.flush()
+        _run_file_jobs(
+            _encrypt_file_segments, count,
+            lambda first, stop: (src, target.name, key, header, first, stop, count),
+            progress, size
+        )
+    return header
+
+def decrypt_file(src: str, dst: str, key: bytes, progress=None) -> Header:
+    """Decrypt a container into dst (atomically), opening segments across worker processes."""
+    with open(src, 'rb') as source:
+        header, raw = read_header(source)
+    count, plaintext_size = layout(os.path.getsize(src) - len(raw), header.segment_size)
+    with atomic_write(dst) as target:
+        target.truncate(plaintext_size)
+        target.flush()
+        _run_file_jobs(
+            _decrypt_file_segments, count,
+            lambda first, stop: (src, target.name, key, header, len(raw), first, stop, count),
+            progress, plaintext_size
+        )
+    return header
@@ -0,0 +1,70 @@
+"""SHA-256 tree (Merkle) hashing over fixed-size leaves.
+
+The input is cut into leaf_size pieces that are hashed in parallel on a
+thread pool (hashlib releases the GIL on large buffers), then combined
+pairwise into a single root. Leaf and node hashes are domain separated as in
+RFC 6962 so a leaf can never be passed off as an inner node:
+
+    leaf = SHA-256(0x00 | piece)
+    node = SHA-256(0x01 | left | right)
+
+An odd node at the end of a level is carried up unchanged. Empty input is a
+single empty leaf. The leaf digests form a manifest a client can use to
+verify or resume a partial upload piece by piece.
+"""
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from crypto_tool import config
+
+DIGEST_SIZE = hashlib.sha256().digest_size
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=config.HASH_TREE_WORKERS, thread_name_prefix='tree-hash')
+        return _pool
+
+def hash_leaf(piece) -> bytes:
+    digest = hashlib.sha256(LEAF_PREFIX)
+    digest.update(piece)
+    return digest.digest()
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def leaf_hashes(data, leaf_size: int) -> list:
+    """Hash every leaf_size piece of data, in parallel when there is more than one."""
+    if leaf_size <= 0:
+        raise ValueError("leaf_size must be positive")
+    view = memoryview(data)
+    pieces = [view[offset:offset + leaf_size] for offset in range(0, len(view), leaf_size)] or [view]
+    if len(pieces) == 1:
+        return [hash_leaf(pieces[0])]
+    return list(_get_pool().map(hash_leaf, pieces))
+
+def merkle_root(leaves: list) -> bytes:
+    if not leaves:
+        raise ValueError("A Merkle tree needs at least one leaf")
+    level = leaves
+    while len(level) > 1:
+        paired = [hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+def tree_hash(data, leaf_size: int = None):
+    """Return (root, leaf digests) for data."""
+    leaves = leaf_hashes(data, leaf_size or config.HASH_TREE_LEAF_SIZE)
+    return merkle_root(leaves), leaves
+
+def split_manifest(blob) -> list:
+    """Split concatenated leaf digests back into a list."""
+    return [bytes(blob[offset:offset + DIGEST_SIZE]) for offset in range(0, len(blob), DIGEST_SIZE)]
@@ -0,0 +1,2 @@
+from crypto_tool.benchmarks.cases import CASES
+from crypto_tool.benchmarks.runner import run_benchmarks, measure
@@ -0,0 +1,93 @@
+"""Benchmark the crypto primitives used by crypto_tool.
+
+    python -m crypto_tool.benchmarks --sizes 1,1K,1M,1G --repeat 50 --format json -o bench.json
+"""
+import argparse
+import csv
+import fnmatch
+import json
+import platform
+import sys
+import time
+import cryptography
+from crypto_tool.benchmarks.cases import CASES
+from crypto_tool.benchmarks.runner import run_benchmarks
+
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+DEFAULT_SIZES = '1,64,1K,64K,1M,16M'
+FIELDS = ['case', 'size', 'repeat', 'min_us', 'mean_us', 'p50_us', 'p95_us', 'p99_us', 'max_us', 'mb_per_s']
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper().rstrip('B').rstrip('I')
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+def format_size(size) -> str:
+    if size is None:
+        return '-'
+    for suffix, factor in sorted(SIZE_SUFFIXES.items(), key=lambda item: -item[1]):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{suffix}iB"
+    return f"{size}B"
+
+def format_row(row) -> str:
+    throughput = f"{row['mb_per_s']:10.1f} MB/s" if row['mb_per_s'] else ' ' * 15
+    return (f"{row['case']:<22} {format_size(row['size']):>8} "
+            f"p50 {row['p50_us']:12.1f}µs  p95 {row['p95_us']:12.1f}µs  p99 {row['p99_us']:12.1f}µs  {throughput}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='crypto_tool.benchmarks', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"comma-separated payload sizes, K/M/G suffixes allowed (default {DEFAULT_SIZES})")
+    parser.add_argument('--cases', default='*', help="comma-separated case names or globs (default: all)")
+    parser.add_argument('--warmup', type=int, default=3, help="untimed calls before measuring")
+    parser.add_argument('--repeat', type=int, default=20, help="timed calls per case and size")
+    parser.add_argument('--format', choices=['table', 'json', 'csv'], default='table')
+    parser.add_argument('-o', '--output', help="write results here instead of stdout")
+    parser.add_argument('--list', action='store_true', help="list the available cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for case in CASES:
+            print(f"{case.name}{'  (sized)' if case.sized else ''}")
+        return 0
+
+    patterns = [pattern.strip() for pattern in args.cases.split(',')]
+    cases = [case for case in CASES if any(fnmatch.fnmatch(case.name, pattern) for pattern in patterns)]
+    if not cases:
+        parser.error(f"no benchmark case matches {args.cases!r}")
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+
+    # Progress goes to stderr so stdout stays clean for json/csv
+    stream = sys.stderr if args.format != 'table' or args.output else sys.stdout
+    rows = run_benchmarks(cases, sizes, args.warmup, args.repeat, lambda row: print(format_row(row), file=stream))
+
+    if args.format == 'table' and not args.output:
+        return 0
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump({
+                'timestamp': time.time(),
+                'python': platform.python_version(),
+                'cryptography': cryptography.__version__,
+                'machine': platform.machine(),
+                'warmup': args.warmup,
+                'results': rows,
+            }, out, indent=2)
+            out.write('\n')
+        elif args.format == 'csv':
+            writer = csv.DictWriter(out, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                out.write(format_row(row) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""The primitives the web app and algorithms/aes.py rely on, wrapped as benchmark cases.
+
+Each case's setup(size) prepares keys and input outside the timed region and
+returns the zero-argument callable that is actually measured.
+"""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from crypto_tool import config
+from crypto_tool.algorithms import aes, digest, ecdh, hybrid, operations
+from crypto_tool.utils import key_generator, result_cache
+from crypto_tool.utils.key_pool import generate_rsa_key
+from crypto_tool.utils.keystore import KeyStore
+
+Case = namedtuple('Case', 'name sized setup')
+
+OAEP = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+
+def _aes_gcm_encrypt(size):
+    data = os.urandom(size)
+    key, iv = os.urandom(32), os.urandom(config.GCM_IV_SIZE)
+    return lambda: operations.aes_gcm_encrypt(data, key, iv)
+
+def _aes_gcm_decrypt(size):
+    key, iv = os.urandom(32), os.urandom(config.GCM_IV_SIZE)
+    aesgcm = AESGCM(key)
+    sealed = aesgcm.encrypt(iv, os.urandom(size), None)
+    return lambda: aesgcm.decrypt(iv, sealed, None)
+
+def _aes_cbc_encrypt(size):
+    data = os.urandom(size)
+    key = key_generator.generate_aes_key(config.DEFAULT_KEY_SIZE)
+    iv = key_generator.generate_iv(config.DEFAULT_BLOCK_SIZE)
+    return lambda: aes.encrypt(data, key, iv)
+
+def _aes_cbc_encrypt_into(size):
+    data = os.urandom(size)
+    key = key_generator.generate_aes_key(config.DEFAULT_KEY_SIZE)
+    iv = key_generator.generate_iv(config.DEFAULT_BLOCK_SIZE)
+    out = bytearray(aes.encrypted_size(size))
+    return lambda: aes.encrypt_into(data, key, iv, out)
+
+def _aes_cbc_decrypt(size):
+    key = key_generator.generate_aes_key(config.DEFAULT_KEY_SIZE)
+    iv = key_generator.generate_iv(config.DEFAULT_BLOCK_SIZE)
+    ciphertext = aes.encrypt(os.urandom(size), key, iv)
+    return lambda: aes.decrypt(ciphertext, key, iv)
+
+def _sha256(size):
+    data = os.urandom(size)
+    return lambda: hashlib.sha256(data).digest()
+
+def _digest(name):
+    def setup(size):
+        data = os.urandom(size)
+        return lambda: digest.ALGORITHMS[name](data).digest()
+    return setup
+
+def _multi_digest(size):
+    data = os.urandom(size)
+    return lambda: digest.multi_digest(data, config.DIGEST_DEFAULT_ALGORITHMS).digests()
+
+def _rsa_keygen(_size):
+    return lambda: generate_rsa_key(config.RSA_KEY_SIZE)
+
+def _rsa_encrypt(_size):
+    public_key = generate_rsa_key(config.RSA_KEY_SIZE).public_key()
+    data = os.urandom(32)
+    return lambda: public_key.encrypt(data, OAEP)
+
+def _rsa_decrypt(_size):
+    private_key = generate_rsa_key(config.RSA_KEY_SIZE)
+    ciphertext = private_key.public_key().encrypt(os.urandom(32), OAEP)
+    return lambda: private_key.decrypt(ciphertext, OAEP)
+
+def _rsa_hybrid_seal(size):
+    public_key = generate_rsa_key(config.RSA_KEY_SIZE).public_key()
+    data = os.urandom(size)
+    return lambda: hybrid.seal(public_key, data)
+
+def _rsa_hybrid_unseal(size):
+    private_key = generate_rsa_key(config.RSA_KEY_SIZE)
+    envelope = hybrid.seal(private_key.public_key(), os.urandom(size))
+    return lambda: hybrid.unseal(private_key, envelope)
+
+def _ecdh_keygen(_size):
+    return lambda: ec.generate_private_key(ec.SECP256R1())
+
+def _ecdh_agreement(_size):
+    return operations.ecdh_agree
+
+def _static_agreement(curve):
+    def setup(_size):
+        # One exchange against a long-lived key plus HKDF: a session cache miss
+        server_key = ecdh.generate_private_key(curve)
+        peer = ecdh.generate_private_key(curve).public_key()
+        return lambda: ecdh.derive_session_key(ecdh.exchange(curve, server_key, peer))
+    return setup
+
+def _session_cache_hit(_size):
+    engine = ecdh.ECDHEngine('x25519')
+    peer = ecdh.public_bytes('x25519', ecdh.generate_private_key('x25519').public_key())
+    return lambda: engine.agree(peer)
+
+def _rsa_pem_load(_size):
+    # What a keystore of PEM files would pay per request without a cache
+    pem = generate_rsa_key(config.RSA_KEY_SIZE).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    return lambda: serialization.load_pem_private_key(pem, password=None)
+
+def _stored_key(hot):
+    def setup(_size):
+        root = tempfile.mkdtemp(prefix='crypto_tool_bench_keys')
+        store = KeyStore(root)
+        key_id = store.put(generate_rsa_key(config.RSA_KEY_SIZE))
+        if hot:
+            return lambda: store.get(key_id)
+        # A fresh store per call: lazy warm start, then one file read and DER parse
+        return lambda: KeyStore(root).get(key_id)
+    return setup
+
+def _result_cache_hit(size):
+    # What a repeat multi-digest /api/hash costs: fingerprint the input, then one LRU lookup
+    data = os.urandom(size)
+    params = ('hash', 'multi', 'raw', *config.DIGEST_DEFAULT_ALGORITHMS)
+    cache = result_cache.ResultCache()
+    cache.put(result_cache.address(data, *params), digest.multi_digest(data, config.DIGEST_DEFAULT_ALGORITHMS).digests())
+    return lambda: cache.get(result_cache.address(data, *params))
+
+def _urandom_key(_size):
+    return lambda: os.urandom(32)
+
+def _pooled_key(_size):
+    return lambda: key_generator.generate_aes_key(32)
+
+def _gcm_nonce_counter(_size):
+    return key_generator.NonceCounter().next
+
+CASES = [
+    Case('aes-gcm-encrypt', True, _aes_gcm_encrypt),
+    Case('aes-gcm-decrypt', True, _aes_gcm_decrypt),
+    Case('aes-cbc-encrypt', True, _aes_cbc_encrypt),
+    Case('aes-cbc-encrypt-into', True, _aes_cbc_encrypt_into),
+    Case('aes-cbc-decrypt', True, _aes_cbc_decrypt),
+    Case('sha256', True, _sha256),
+    Case('sha512', True, _digest('sha512')),
+    Case('sha3-256', True, _digest('sha3_256')),
+    Case('blake2b', True, _digest('blake2b')),
+    Case('blake2s', True, _digest('blake2s')),
+    Case('multi-digest', True, _multi_digest),
+    Case('result-cache-hit', True, _result_cache_hit),
+    Case('rsa-keygen', False, _rsa_keygen),
+    Case('rsa-oaep-encrypt', False, _rsa_encrypt),
+    Case('rsa-oaep-decrypt', False, _rsa_decrypt),
+    Case('rsa-hybrid-seal', True, _rsa_hybrid_seal),
+    Case('rsa-hybrid-unseal', True, _rsa_hybrid_unseal),
+    Case('ecdh-p256-keygen', False, _ecdh_keygen),
+    Case('ecdh-p256-agreement', False, _ecdh_agreement),
+    Case('x25519-keygen', False, lambda _size: lambda: ecdh.generate_private_key('x25519')),
+    Case('ecdh-x25519-static', False, _static_agreement('x25519')),
+    Case('ecdh-p256-static', False, _static_agreement('p256')),
+    Case('ecdh-session-cache-hit', False, _session_cache_hit),
+    Case('rsa-pem-load', False, _rsa_pem_load),
+    Case('keystore-cold-load', False, _stored_key(False)),
+    Case('keystore-hit', False, _stored_key(True)),
+    Case('urandom-key', False, _urandom_key),
+    Case('pooled-key', False, _pooled_key),
+    Case('gcm-nonce-counter', False, _gcm_nonce_counter),
+]
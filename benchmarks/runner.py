@@ -0,0 +1,45 @@
+import time
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def measure(fn, warmup: int = 3, repeat: int = 20) -> dict:
+    """Time fn() repeat times after warmup untimed calls; durations in microseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    samples.sort()
+    return {
+        'repeat': repeat,
+        'min_us': samples[0],
+        'mean_us': sum(samples) / len(samples),
+        'p50_us': percentile(samples, 0.50),
+        'p95_us': percentile(samples, 0.95),
+        'p99_us': percentile(samples, 0.99),
+        'max_us': samples[-1],
+    }
+
+def run_benchmarks(cases, sizes, warmup: int = 3, repeat: int = 20, progress=None):
+    """Run every case (over every size for sized cases) and return a list of result rows."""
+    rows = []
+    for case in cases:
+        for size in (sizes if case.sized else [None]):
+            fn = case.setup(size)
+            stats = measure(fn, warmup, repeat)
+            row = {'case': case.name, 'size': size, **stats}
+            # Throughput from the median so one slow outlier doesn't skew it
+            row['mb_per_s'] = size / stats['p50_us'] if size and stats['p50_us'] else None
+            rows.append(row)
+            if progress:
+                progress(row)
+    return rows
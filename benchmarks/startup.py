@@ -0,0 +1,101 @@
+"""Guard the cold-start time of the text-mode CLI.
+
+    python -m crypto_tool.benchmarks.startup                  # median of 10 runs per command
+    python -m crypto_tool.benchmarks.startup --repeat 30 --budget-ms 60
+
+Every run is a fresh interpreter executing one CLI command, so the timings
+include every import the command triggers. The cost of a bare interpreter
+start is measured the same way and subtracted, leaving what crypto_tool
+itself adds. The guard fails (exit status 1) when that median exceeds the
+budget, or when a command loads any of HEAVY_MODULES.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from crypto_tool import config
+
+# Text-mode commands timed, as (module run with -m, arguments)
+COMMANDS = {
+    'help': ('crypto_tool', ['--help']),
+    'keygen': ('crypto_tool', ['keygen']),
+    'hash': ('crypto_tool', ['hash', os.devnull]),
+    'main.py keygen': ('crypto_tool.main', ['keygen']),
+}
+
+# Modules no text-mode command should ever pull in
+HEAVY_MODULES = ('tkinter', 'flask', 'werkzeug', 'cryptography.hazmat.primitives.asymmetric')
+
+# Runs a command like -m would and reports which heavy modules it loaded on stderr
+_PROBE = """
+import json, os, runpy, sys
+sys.stdout = open(os.devnull, 'w')
+module, sys.argv = sys.argv[1], sys.argv[1:]
+try:
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+except SystemExit:
+    pass
+heavy = json.loads(os.environ['CRYPTO_TOOL_HEAVY_MODULES'])
+sys.stderr.write(json.dumps(sorted(name for name in heavy if name in sys.modules)))
+"""
+
+def _environment() -> dict:
+    # Make the package importable from wherever the benchmark was started
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, CRYPTO_TOOL_HEAVY_MODULES=json.dumps(HEAVY_MODULES))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, env.get('PYTHONPATH')]))
+    return env
+
+def time_command(argv, repeat: int, env: dict) -> float:
+    """Median wall time in ms of running argv in a fresh interpreter."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter_ns() - start) / 1_000_000)
+    return statistics.median(samples)
+
+def loaded_heavy_modules(module: str, args, env: dict) -> list:
+    probe = subprocess.run([sys.executable, '-c', _PROBE, module, *args], env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+    return json.loads(probe.stderr.decode().strip().splitlines()[-1])
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='crypto_tool.benchmarks.startup', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help="cold starts per command")
+    parser.add_argument('--budget-ms', type=float, default=config.CLI_STARTUP_BUDGET_MS,
+                        help=f"allowed median over a bare interpreter (default {config.CLI_STARTUP_BUDGET_MS})")
+    parser.add_argument('--format', choices=['table', 'json'], default='table')
+    args = parser.parse_args(argv)
+
+    env = _environment()
+    baseline = time_command([sys.executable, '-c', 'pass'], args.repeat, env)
+    rows = []
+    for name, (module, command) in COMMANDS.items():
+        median = time_command([sys.executable, '-m', module, *command], args.repeat, env)
+        heavy = loaded_heavy_modules(module, command, env)
+        overhead = median - baseline
+        rows.append({
+            'command': name,
+            'median_ms': round(median, 1),
+            'overhead_ms': round(overhead, 1),
+            'heavy_modules': heavy,
+            'ok': overhead <= args.budget_ms and not heavy
+        })
+
+    if args.format == 'json':
+        json.dump({'interpreter_ms': round(baseline, 1), 'budget_ms': args.budget_ms, 'results': rows}, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print(f"bare interpreter {baseline:8.1f} ms   budget +{args.budget_ms:g} ms")
+        for row in rows:
+            status = 'ok' if row['ok'] else 'FAIL'
+            loaded = f"  loaded {', '.join(row['heavy_modules'])}" if row['heavy_modules'] else ''
+            print(f"{row['command']:<16} {row['median_ms']:8.1f} ms  (+{row['overhead_ms']:.1f})  {status}{loaded}")
+    return 0 if all(row['ok'] for row in rows) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
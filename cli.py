@@ -0,0 +1,215 @@
+"""Command-line interface for crypto_tool.
+
+Every command runs without prompts and streams its input in fixed-size
+chunks, so it can sit in a pipeline:
+
+    python -m crypto_tool keygen -o backup.key
+    tar c photos/ | python -m crypto_tool encrypt --key-file backup.key > photos.tar.enc
+    python -m crypto_tool decrypt --key-file backup.key -i photos.tar.enc | tar x
+    python -m crypto_tool hash --algorithm sha256,blake2b photos.tar.enc
+    python -m crypto_tool encrypt-dir photos/ photos.enc/ --key-file backup.key
+    python -m crypto_tool decrypt-dir photos.enc/ photos/ --key-file backup.key
+    python -m crypto_tool bench --cases 'aes-*' --sizes 1M
+"""
+import argparse
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+_HEX_DIGITS = frozenset(b'0123456789abcdefABCDEF')
+
+def load_key(path: str) -> bytes:
+    """Read an AES key file holding either hex text or raw key bytes.
+
+    Hex wins: a 16-byte key written as 32 hex digits without a newline is
+    also 32 bytes long, and must not be taken for a raw 32-byte key.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    text = data.strip()
+    if len(text) in (32, 48, 64) and _HEX_DIGITS.issuperset(text):
+        return bytes.fromhex(text.decode('ascii'))
+    if len(data) not in (16, 24, 32):
+        raise ValueError(f"{path}: AES key must be 16, 24 or 32 bytes (raw) or 32, 48 or 64 hex digits, got {len(data)} bytes")
+    return data
+
+def write_key(path: str, key: bytes):
+    """Write a new key file as hex, readable by the owner only."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(key.hex() + '\n')
+
+@contextmanager
+def open_input(path: str):
+    """The named file, or stdin for '-' or no path."""
+    if not path or path == '-':
+        yield sys.stdin.buffer
+    else:
+        with open(path, 'rb') as f:
+            yield f
+
+@contextmanager
+def open_output(path: str):
+    """The named file (replaced atomically on success), or stdout for '-' or no path."""
+    if not path or path == '-':
+        yield sys.stdout.buffer
+        sys.stdout.buffer.flush()
+    else:
+        from crypto_tool.utils.file_handler import atomic_write
+        with atomic_write(path) as f:
+            yield f
+
+def resolve_key(args) -> bytes:
+    if args.generate_key and not os.path.exists(args.key_file):
+        from crypto_tool.utils import key_generator
+        write_key(args.key_file, key_generator.generate_aes_key(32))
+    return load_key(args.key_file)
+
+def cmd_encrypt(args) -> int:
+    """Write the input as a segmented AES-GCM container (algorithms.segmented)."""
+    from crypto_tool.algorithms import segmented
+
+    key = load_key(args.key_file)
+    with open_input(args.input) as source, open_output(args.output) as target:
+        segmented.encrypt_stream(source, target, key)
+    return EXIT_OK
+
+def cmd_decrypt(args) -> int:
+    """Write the plaintext of a container, one segment at a time and only once its tag verifies."""
+    from cryptography.exceptions import InvalidTag
+    from crypto_tool.algorithms import segmented
+
+    key = load_key(args.key_file)
+    with open_input(args.input) as source, open_output(args.output) as target:
+        try:
+            segmented.decrypt_stream(source, target, key)
+        except InvalidTag:
+            raise ValueError("Authentication failed: wrong key or corrupted input")
+    return EXIT_OK
+
+def cmd_hash(args) -> int:
+    """Print digests like sha256sum for one algorithm, or BSD style ('SHA256 (name) = ...') for several."""
+    from crypto_tool import config
+    from crypto_tool.algorithms import digest
+
+    algorithms = digest.parse_algorithms(args.algorithm)
+    for path in args.files or ['-']:
+        engine = digest.MultiDigest(algorithms)
+        with open_input(path) as source:
+            engine.update_stream(source, config.STREAM_CHUNK_SIZE)
+        for name, value in engine.digests().items():
+            if len(algorithms) == 1:
+                print(f"{value.hex()}  {path}")
+            else:
+                print(f"{name.upper()} ({path}) = {value.hex()}")
+    return EXIT_OK
+
+def cmd_keygen(args) -> int:
+    from crypto_tool.utils import key_generator
+
+    key = key_generator.generate_aes_key(args.size // 8)
+    if args.output and args.output != '-':
+        write_key(args.output, key)
+    else:
+        print(key.hex())
+    return EXIT_OK
+
+def cmd_bench(argv) -> int:
+    from crypto_tool.benchmarks.__main__ import main as bench_main
+    return bench_main(argv)
+
+def _run_tree(args, key: bytes, run, verb: str) -> int:
+    """Run bulk.encrypt_tree or decrypt_tree over args and print its summary."""
+
+    def on_file(entry):
+        if 'error' in entry:
+            print(f"FAILED {entry['path']}: {entry['error']}", file=sys.stderr)
+        elif args.verbose:
+            print(f"{entry['latencyMs']:10.2f} ms  {entry['size']:>12}  {entry['path']}", file=sys.stderr)
+
+    summary = run(args.source, args.destination, key, workers=args.workers, on_file=on_file)
+    if args.format == 'json':
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        latency = summary['latencyMs']
+        skipped = f", skipped {summary['skipped']}" if 'skipped' in summary else ''
+        print(f"{verb} {summary[verb]} files ({summary['bytes']} bytes){skipped}, failed {summary['failed']}")
+        print(f"{summary['elapsedMs'] / 1000:.2f} s, {summary['mbPerS'] or 0:.1f} MB/s, {summary['filesPerS'] or 0:.1f} files/s")
+        if latency['p50'] is not None:
+            print(f"per-file latency p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms, max {latency['max']:.2f} ms")
+    return EXIT_FAILED if summary['failed'] else EXIT_OK
+
+def cmd_encrypt_dir(args) -> int:
+    from crypto_tool.utils import bulk
+    return _run_tree(args, resolve_key(args), bulk.encrypt_tree, 'encrypted')
+
+def cmd_decrypt_dir(args) -> int:
+    from crypto_tool.utils import bulk
+    return _run_tree(args, load_key(args.key_file), bulk.decrypt_tree, 'decrypted')
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='crypto_tool', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    encrypt = commands.add_parser('encrypt', help="encrypt a stream into an authenticated, segmented AES-GCM container")
+    decrypt = commands.add_parser('decrypt', help="decrypt the output of 'encrypt'")
+    for command, handler in ((encrypt, cmd_encrypt), (decrypt, cmd_decrypt)):
+        command.add_argument('--key-file', required=True, help="AES key file (raw bytes or hex)")
+        command.add_argument('-i', '--input', help="read from this file instead of stdin")
+        command.add_argument('-o', '--output', help="write to this file instead of stdout")
+        command.set_defaults(handler=handler)
+
+    hash_parser = commands.add_parser('hash', help="digest files or stdin in one pass per input")
+    hash_parser.add_argument('files', nargs='*', help="files to hash ('-' or none for stdin)")
+    hash_parser.add_argument('-a', '--algorithm', default='sha256', help="comma-separated digest algorithms (default sha256)")
+    hash_parser.set_defaults(handler=cmd_hash)
+
+    keygen = commands.add_parser('keygen', help="generate an AES key as hex")
+    keygen.add_argument('--size', type=int, choices=[128, 192, 256], default=256, help="key size in bits")
+    keygen.add_argument('-o', '--output', help="new key file (created owner-only); stdout if omitted")
+    keygen.set_defaults(handler=cmd_keygen)
+
+    # Arguments after 'bench' go straight to crypto_tool.benchmarks (see main)
+    commands.add_parser('bench', help="run the benchmark suite (same options as python -m crypto_tool.benchmarks)", add_help=False)
+
+    encrypt_dir = commands.add_parser('encrypt-dir', help="encrypt a directory tree in parallel, resumably")
+    encrypt_dir.add_argument('source', help="directory to encrypt")
+    encrypt_dir.add_argument('destination', help="directory for the .enc files and the manifest")
+    encrypt_dir.add_argument('--generate-key', action='store_true', help="create --key-file with a new key if it is missing")
+    encrypt_dir.set_defaults(handler=cmd_encrypt_dir)
+    decrypt_dir = commands.add_parser('decrypt-dir', help="decrypt the output of 'encrypt-dir' in parallel")
+    decrypt_dir.add_argument('source', help="directory written by encrypt-dir")
+    decrypt_dir.add_argument('destination', help="directory for the decrypted files")
+    decrypt_dir.set_defaults(handler=cmd_decrypt_dir)
+    for command in (encrypt_dir, decrypt_dir):
+        command.add_argument('--key-file', required=True, help="AES key file (raw bytes or hex)")
+        command.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+        command.add_argument('--format', choices=['text', 'json'], default='text', help="summary format")
+        command.add_argument('-v', '--verbose', action='store_true', help="print each file's latency as it finishes")
+    return parser
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['bench']:
+        return cmd_bench(argv[1:])
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # The reader went away (e.g. '| head'); keep the interpreter from complaining at exit
+        sys.stdout = open(os.devnull, 'w')
+        return EXIT_FAILED
+    except (OSError, ValueError) as e:
+        print(f"crypto_tool: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+if __name__ == '__main__':
+    sys.exit(main())
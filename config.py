@@ -1,3 +1,93 @@
+import os
+
 DEFAULT_ALGORITHM = "AES"
 DEFAULT_KEY_SIZE = 32  # 256-bit AES
-DEFAULT_BLOCK_SIZE = 16  # AES block size in bytes
\ No newline at end of file
+DEFAULT_BLOCK_SIZE = 16  # AES block size in bytes
+
+# Streaming
+STREAM_CHUNK_SIZE = 64 * 1024  # bytes read per step when streaming request bodies
+GCM_IV_SIZE = 12  # 96-bit IV for GCM
+GCM_TAG_SIZE = 16  # bytes
+FILE_CHUNK_SIZE = 1024 * 1024  # bytes per step when encrypting files with algorithms.file_crypto
+DECRYPT_SPOOL_MEMORY = 8 * 1024 * 1024  # /api/aes/decrypt plaintext kept in memory before spilling to a temp file
+
+# Entropy pool (utils.key_generator): bytes read from os.urandom per refill
+ENTROPY_BLOCK_SIZE = 4096
+
+# RSA key pool
+RSA_KEY_SIZE = 2048
+RSA_POOL_KEY_SIZES = (2048, 3072, 4096)  # sizes clients may request
+RSA_POOL_DEPTH = 8  # ready keypairs kept per key size
+
+# Key agreement (/api/ecdh, algorithms.ecdh)
+ECDH_DEFAULT_CURVE = 'x25519'  # or 'p256'
+ECDH_KEY_ROTATION_SECONDS = 3600  # static server key lifetime; 0 never rotates
+ECDH_SESSION_CACHE_SIZE = 4096  # derived session keys kept per curve
+ECDH_SESSION_KEY_SIZE = 32  # bytes of HKDF output
+ECDH_MAX_PEERS = 1000  # peer keys accepted in one batch agreement
+
+# Executor backends for CPU-bound web operations: "process", "thread" or "inline"
+EXECUTOR_BACKENDS = {
+    'aes': 'thread',  # OpenSSL releases the GIL for bulk cipher work
+    'hash': 'thread',  # hashlib releases the GIL for large buffers
+    'rsa': 'process',
+    'ecdh': 'process',
+    'batch': 'process',
+    'segments': 'process',  # segmented file encryption; workers do their own file I/O
+    'keys': 'thread',  # key pool, keystore and static-key ECDH use this process's key objects, so never "process"
+    'stream': 'thread',  # large stream chunks and object reads on per-request cipher state, so never "process"
+}
+EXECUTOR_WORKERS = os.cpu_count() or 1
+EXECUTOR_MAX_PENDING = 64  # queued + running jobs per backend before rejecting
+EXECUTOR_TIMEOUT = 30.0  # seconds a request waits for its job
+
+# ASGI server
+ASGI_MAX_CONCURRENT_JOBS = 2 * EXECUTOR_WORKERS  # crypto jobs in flight before requests wait
+ASGI_MAX_WAITING = 256  # requests allowed to wait for a job slot before getting 503
+ASGI_MAX_BODY_SIZE = 64 * 1024 * 1024  # bytes accepted in a JSON request body
+ASGI_INLINE_CHUNK_SIZE = 256 * 1024  # streamed chunks up to this size are ciphered on the loop; a thread hop costs more
+ASGI_READ_BATCH_SIZE = 1024 * 1024  # object plaintext decrypted per job and sent per body message
+
+# Multi-digest engine (/api/hash with algorithms=...)
+DIGEST_CHUNK_SIZE = 256 * 1024  # bytes fed to every algorithm per step; small enough to stay in L2
+DIGEST_DEFAULT_ALGORITHMS = ('sha256', 'blake2b', 'sha3_256')  # used for mode=multi without a list
+
+# Tree hashing (/api/hash with mode=tree)
+HASH_TREE_LEAF_SIZE = 1024 * 1024  # default bytes per Merkle leaf
+HASH_TREE_MIN_LEAF_SIZE = 1024
+HASH_TREE_MAX_LEAF_SIZE = 64 * 1024 * 1024
+HASH_TREE_WORKERS = EXECUTOR_WORKERS  # threads hashing leaves in parallel
+
+# Result cache for /api/hash (utils.result_cache); the disk tier is off unless a directory is set
+RESULT_CACHE_MEMORY_BYTES = 32 * 1024 * 1024
+RESULT_CACHE_DIR = os.environ.get("CRYPTO_TOOL_RESULT_CACHE_DIR") or None
+
+# Segmented AEAD containers (algorithms.segmented)
+SEGMENT_SIZE = 64 * 1024  # plaintext bytes per independently sealed segment
+SEGMENT_WORKERS = EXECUTOR_WORKERS  # threads sealing segments of in-memory data
+SEGMENT_BATCH = 64  # segments per worker job when encrypting files
+
+# Per-user data directory for the object store and keystore; both must be
+# owned by the current user with mode 0700 (utils.file_handler.private_dir)
+DATA_DIR = os.environ.get("CRYPTO_TOOL_DATA_DIR") or os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"), "crypto_tool"
+)
+
+# Encrypted object store (/api/objects)
+OBJECT_STORE_DIR = os.environ.get("CRYPTO_TOOL_OBJECT_DIR") or os.path.join(DATA_DIR, "objects")
+
+# Persistent keystore (/api/keys, keyId on /api/rsa, /api/ecdh and /api/batch)
+KEYSTORE_DIR = os.environ.get("CRYPTO_TOOL_KEYSTORE_DIR") or os.path.join(DATA_DIR, "keys")
+KEYSTORE_CACHE_SIZE = 256  # parsed key objects kept in memory
+
+# Batch API
+BATCH_MAX_ITEMS = 10000
+
+# CLI cold start (python -m crypto_tool.benchmarks.startup): median time a
+# text-mode command may add on top of a bare interpreter start, in ms
+CLI_STARTUP_BUDGET_MS = 75
+
+# Logging
+LOG_LEVEL = os.environ.get("CRYPTO_TOOL_LOG_LEVEL", "INFO")
+LOG_SUCCESS_SAMPLE_RATE = 1.0  # fraction of routine success records kept
+LOG_RATE_LIMIT = 100  # records per second per endpoint below WARNING; 0 disables
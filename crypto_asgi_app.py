@@ -0,0 +1,696 @@
+"""Asyncio (ASGI) variant of the crypto web API.
+
+Serves the same API contracts as crypto_web_app (except that the streaming
+/api/aes/stream and /api/aes/decrypt take a raw body, not multipart), but every connection lives on one event loop
+and the crypto work goes through the job limiter onto the shared
+executors. Idle or slow clients therefore cost a coroutine rather than a
+thread, and a slow RSA keygen no longer stalls other requests. Only
+stream chunks small enough that a thread hop would cost more than the
+cipher work are handled on the loop itself.
+
+Run it with any ASGI server, for example:
+
+    uvicorn crypto_tool.crypto_asgi_app:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import io
+import json
+import time
+from urllib.parse import parse_qsl
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import serialization
+from crypto_tool import config
+from crypto_tool.algorithms import batch, gcm, hybrid, operations, segmented
+from crypto_tool.utils import executor, key_generator, wire
+from crypto_tool.utils.instrumentation import RequestTimer
+from crypto_tool.utils.keystore import KeyNotFound
+from crypto_tool.utils.log import event, get_logger, setup_logging, shutdown_logging
+from crypto_tool.utils.object_store import ObjectNotFound
+from crypto_tool.web_common import (
+    AUTHENTICATION_FAILED, DecryptSpool, RangeNotSatisfiable, batch_result, batch_rsa_key, create_stored_key, decrypt_params, ecdh_agreement, ecdh_engine, hash_cache,
+    hash_cache_key, hash_options, hash_result, keystore, metrics_text, object_store, parse_batch, parse_payload, parse_range, payload_bytes, range_headers,
+    read_payload, render_result, request_key, rsa_key_pool, rsa_key_size, rsa_mode, rsa_private_key, rsa_seal_key, rsa_unseal_key, upload_info
+)
+from crypto_tool.web_template import HTML_TEMPLATE
+
+log = get_logger('crypto_tool.web')
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-headers', b'Content-Type,Accept,Authorization,Range,X-AES-Key,X-AES-IV,X-AES-Tag,X-File-Name'),
+    (b'access-control-expose-headers', b'*'),
+    (b'access-control-allow-methods', b'GET,PUT,POST,DELETE,OPTIONS'),
+]
+
+class ServerBusy(Exception):
+    """Raised when too many requests are already waiting for a job slot."""
+
+class RequestTooLarge(Exception):
+    """Raised when a request body exceeds config.ASGI_MAX_BODY_SIZE."""
+
+class JobLimiter:
+    """Caps crypto jobs in flight. Excess requests wait on the event loop, up to a limit."""
+
+    def __init__(self, max_jobs: int, max_waiting: int):
+        self.max_jobs = max_jobs
+        self.max_waiting = max_waiting
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(max_jobs)
+
+    async def run(self, operation: str, fn, *args):
+        if self.waiting >= self.max_waiting:
+            raise ServerBusy(f"Server busy: {self.waiting} requests already waiting for a job slot")
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            pool = executor.get_executor(operation)
+            loop = asyncio.get_running_loop()
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(pool, fn, *args), pool.timeout)
+            except asyncio.TimeoutError:
+                raise executor.JobTimeout(f"{fn.__name__} did not finish within {pool.timeout}s")
+        finally:
+            self._slots.release()
+
+jobs = JobLimiter(config.ASGI_MAX_CONCURRENT_JOBS, config.ASGI_MAX_WAITING)
+
+async def run_job(timer, operation, fn, *args):
+    """Run fn through the job limiter, booking the worker-reported time (last return value) as 'crypto'."""
+    with timer.stage('dispatch'):
+        result = await jobs.run(operation, fn, *args)
+    timer.carve('dispatch', 'crypto', result[-1])
+    return result
+
+async def run_chunk(fn, chunk):
+    """fn(chunk) on the loop when chunk is at most ASGI_INLINE_CHUNK_SIZE bytes, else through the job limiter."""
+    if len(chunk) <= config.ASGI_INLINE_CHUNK_SIZE:
+        return fn(chunk)
+    return await jobs.run('stream', fn, chunk)
+
+def read_segments(chunks, size: int) -> bytes:
+    """Join pieces from an iter_range generator until there are at least size bytes, or it ends."""
+    parts, total = [], 0
+    for part in chunks:
+        parts.append(part)
+        total += len(part)
+        if total >= size:
+            break
+    return b''.join(parts)
+
+async def aes_encrypt(timer, data, input_bytes):
+    log.debug("API called", extra=event('aes', type=data.get('type'), size=data.get('size')))
+
+    # AES-GCM encryption
+    with timer.stage('keygen'):
+        key = key_generator.generate_aes_key(32)  # 256-bit key
+        iv = key_generator.generate_iv(config.GCM_IV_SIZE)
+    encrypted_data, tag, encrypt_time = await run_job(timer, 'aes', operations.aes_gcm_encrypt, input_bytes, key, iv)
+
+    log.info("Encryption successful", extra=event('aes', sample=True, inputSize=len(input_bytes), outputSize=len(encrypted_data)))
+    return {
+        'success': True,
+        'originalName': data['name'],
+        'originalSize': data['size'],
+        'encryptedSize': len(encrypted_data),
+        'key': key.hex(),
+        'iv': iv.hex(),
+        'tag': tag.hex(),
+        'encryptTime': f"{encrypt_time:.3f}"
+    }, {'encrypted': encrypted_data}
+
+async def rsa_encrypt(timer, data, input_bytes):
+    log.debug("API called", extra=event('rsa', type=data.get('type'), size=data.get('size')))
+
+    # Payloads past the OAEP limit go into a hybrid envelope
+    key_id = data.get('keyId')
+    key_size = rsa_key_size(data)
+    mode = rsa_mode(data, len(input_bytes), key_size)
+
+    # A pool miss generates inline, so never take a key on the loop thread
+    with timer.stage('keygen'):
+        if mode == 'hybrid':
+            # The envelope is sealed to a stored key so /api/rsa/unseal can open it
+            private_key, key_id, pool_hit = await jobs.run('keys', rsa_seal_key, key_size, key_id)
+        else:
+            private_key, pool_hit = await jobs.run('keys', rsa_private_key, key_size, key_id)
+    keygen_time = timer.stages_ns['keygen'] / 1_000_000
+
+    if mode == 'hybrid':
+        # One RSA wrap plus AES over the payload, so it runs where AES does
+        public_der = private_key.public_key().public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+        encrypted_data, _ = await run_job(timer, 'aes', operations.hybrid_seal, input_bytes, public_der)
+    else:
+        with timer.stage('crypto'):
+            encrypted_data = hybrid.oaep_encrypt(private_key.public_key(), input_bytes)
+
+    log.info("Encryption successful", extra=event('rsa', sample=True, inputSize=len(input_bytes), outputSize=len(encrypted_data)))
+    return {
+        'success': True,
+        'originalName': data['name'],
+        'originalSize': data['size'],
+        'encryptedSize': len(encrypted_data),
+        'mode': mode,
+        'keySize': key_size,
+        'keyId': key_id,
+        'keygenTime': f"{keygen_time:.3f}",
+        'keyPoolHit': pool_hit
+    }, {'encrypted': encrypted_data}
+
+async def rsa_unseal(timer, data, envelope):
+    """Open a hybrid envelope from /api/rsa with the stored key named by keyId."""
+    log.debug("API called", extra=event('rsa/unseal', type=data.get('type'), size=data.get('size')))
+    with timer.stage('keygen'):
+        private_der = rsa_unseal_key(data).private_bytes(serialization.Encoding.DER, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    # One RSA decryption unwraps the data key; the bulk of the work is AES-GCM, so it runs where AES does
+    plaintext, decrypt_time = await run_job(timer, 'aes', operations.hybrid_unseal, envelope, private_der)
+
+    log.info("Decryption successful", extra=event('rsa/unseal', sample=True, inputSize=len(envelope), outputSize=len(plaintext)))
+    return {
+        'success': True,
+        'originalName': data['name'],
+        'originalSize': data['size'],
+        'decryptedSize': len(plaintext),
+        'keyId': data['keyId'],
+        'decryptTime': f"{decrypt_time:.3f}"
+    }, {'decrypted': plaintext}
+
+async def ecdh_exchange(timer, data, input_bytes):
+    log.debug("API called", extra=event('ecdh', curve=data.get('curve'), peers=len(data.get('peerPublicKeys') or [])))
+    # Agreements use this process's static keys and session cache, so they run on 'keys' rather than the 'ecdh' pool
+    with timer.stage('crypto'):
+        result, blobs = await jobs.run('keys', ecdh_agreement, data)
+
+    log.info("Key exchange successful", extra=event('ecdh', sample=True, curve=result['curve'], keyId=result['keyId']))
+    return result, blobs
+
+async def hash_data(timer, data, sent):
+    """Handed the input as sent (see parse_payload), so a cache hit never decodes it."""
+    log.debug("API called", extra=event('hash', type=data.get('type'), size=data.get('size')))
+    mode, leaf_size, algorithms = hash_options(data)
+    with timer.stage('cache'):
+        cache_key = hash_cache_key(data, sent, mode, leaf_size, algorithms)
+        blobs = hash_cache.get(cache_key) if cache_key else None
+    if blobs is not None:
+        result = hash_result(data, mode, leaf_size, algorithms, blobs, timer.stages_ns['cache'] / 1_000_000, cached=True)
+    else:
+        with timer.stage('decode'):
+            input_bytes = payload_bytes(data, sent)
+        blobs, throughput, hash_time = await run_job(timer, 'hash', operations.hash_outputs, input_bytes, mode, leaf_size, algorithms)
+        if cache_key and hash_cache.directory:
+            # The disk tier writes and fsyncs a file, so keep it off the loop thread
+            await asyncio.get_running_loop().run_in_executor(None, hash_cache.put, cache_key, blobs)
+        elif cache_key:
+            hash_cache.put(cache_key, blobs)
+        result = hash_result(data, mode, leaf_size, algorithms, blobs, hash_time, throughput)
+    log.info("Hash successful", extra=event('hash', sample=True, inputSize=data['size'], mode=mode, cached=result['cached'],
+                                              algorithm=','.join(algorithms) if algorithms else 'SHA-256'))
+    return result, blobs
+
+async def batch_process(timer, data):
+    with timer.stage('decode'):
+        items = parse_batch(data)
+    log.debug("API called", extra=event('batch', items=len(items)))
+
+    key_size = rsa_key_size(data)
+    with timer.stage('keygen'):
+        rsa_public_der, pool_hit = await jobs.run('keys', batch_rsa_key, items, key_size, data.get('keyId'))
+        aes_key = key_generator.generate_aes_key(32)
+
+    results, batch_time = await run_job(timer, 'batch', batch.run_batch, items, aes_key, rsa_public_der)
+    with timer.stage('encode'):
+        result = batch_result(results, batch_time, pool_hit, aes_key)
+    log.info("Batch complete", extra=event('batch', sample=True, succeeded=result['succeeded'], items=result['itemCount'], batchMs=round(batch_time, 3)))
+    return result
+
+API_ROUTES = {
+    '/api/aes': aes_encrypt,
+    '/api/rsa': rsa_encrypt,
+    '/api/rsa/unseal': rsa_unseal,
+    '/api/ecdh': ecdh_exchange,
+    '/api/hash': hash_data,
+}
+
+# API routes handed their input undecoded (parse_payload) so they can check a cache first
+RAW_INPUT_ROUTES = ('/api/hash',)
+
+# Routes that always speak JSON in both directions
+JSON_ROUTES = {
+    '/api/batch': batch_process,
+}
+
+def test_api():
+    return {
+        'success': True,
+        'message': 'API is working',
+        'timestamp': time.time(),
+        'endpoints': ['aes', 'aes/stream', 'aes/decrypt', 'rsa', 'rsa/unseal', 'rsa/pool', 'ecdh', 'ecdh/key', 'hash', 'hash/cache', 'batch', 'objects', 'keys'],
+        'executors': executor.stats(),
+        'jobs': {'maxJobs': jobs.max_jobs, 'waiting': jobs.waiting}
+    }
+
+def request_headers(scope) -> dict:
+    return {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+async def read_body(receive) -> bytes:
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body += message.get('body', b'')
+        if len(body) > config.ASGI_MAX_BODY_SIZE:
+            raise RequestTooLarge(f"Request body exceeds {config.ASGI_MAX_BODY_SIZE} bytes")
+        if not message.get('more_body', False):
+            break
+    return bytes(body)
+
+async def send_response(send, status: int, body: bytes, content_type: bytes = b'application/json', extra_headers=None):
+    headers = [(b'content-type', content_type), (b'content-length', str(len(body)).encode())] + CORS_HEADERS
+    for name, value in (extra_headers or {}).items():
+        headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    # ASGI wants bytes; results encrypted in place arrive as a bytearray
+    await send({'type': 'http.response.body', 'body': body if isinstance(body, bytes) else bytes(body)})
+
+async def send_json(send, status: int, result: dict, extra_headers=None):
+    await send_response(send, status, json.dumps(result).encode('utf-8'), extra_headers=extra_headers)
+
+async def send_timed_json(send, timer, status: int, result: dict, extra_headers=None):
+    """send_json after recording the request in the metrics and adding its Server-Timing header."""
+    timer.finish(result.get('success', False))
+    await send_json(send, status, result, {'Server-Timing': timer.server_timing(), **(extra_headers or {})})
+
+async def object_upload(receive, send, headers):
+    """Store the request body as an encrypted, range-readable object; the key is returned, not kept."""
+    timer = RequestTimer('objects')
+    try:
+        body = await read_body(receive)
+        key = request_key(headers.get('x-aes-key'), generate=True)
+        with timer.stage('crypto'):
+            stored = await jobs.run('aes', object_store.put, io.BytesIO(body), key)
+        log.info("Object stored", extra=event('objects', sample=True, objectId=stored['objectId'], size=stored['size']))
+        status, success, result = 200, True, {'success': True, **stored, 'key': key.hex()}
+    except (ServerBusy, executor.ExecutorBusy) as e:
+        log.warning("Request rejected", extra=event('objects', status=503, error=str(e)))
+        status, success, result = 503, False, {'success': False, 'error': str(e)}
+    except RequestTooLarge as e:
+        log.warning("Request rejected", extra=event('objects', status=413, error=str(e)))
+        status, success, result = 413, False, {'success': False, 'error': str(e)}
+    except Exception as e:
+        log.error("Request failed", extra=event('objects', error=str(e)))
+        status, success, result = 200, False, {'success': False, 'error': str(e)}
+    timer.finish(success)
+    await send_response(send, status, json.dumps(result).encode('utf-8'), extra_headers={'Server-Timing': timer.server_timing()})
+
+async def stored_keys(receive, send, method, key_id=None):
+    """/api/keys: POST {"kind": ...} stores a new private key, GET lists ids; /api/keys/<id>: GET describes, DELETE removes."""
+    timer = RequestTimer('keys')
+    try:
+        if key_id is None and method == 'POST':
+            body = await read_body(receive)
+            with timer.stage('parse'):
+                data = json.loads(body or b'{}')
+            # A pool miss generates an RSA key, so keep it off the loop thread
+            with timer.stage('keygen'):
+                stored = await jobs.run('keys', create_stored_key, data.get('kind', f"rsa-{config.RSA_KEY_SIZE}"))
+            log.info("Key stored", extra=event('keys', sample=True, keyId=stored['keyId'], kind=stored['kind']))
+            status, result = 200, {'success': True, **stored}
+        elif key_id is None:
+            status, result = 200, {'success': True, 'keyIds': keystore.ids(), **keystore.stats()}
+        elif method == 'DELETE':
+            keystore.delete(key_id)
+            log.info("Key deleted", extra=event('keys', keyId=key_id))
+            status, result = 200, {'success': True, 'keyId': key_id, 'deleted': True}
+        else:
+            status, result = 200, {'success': True, **await jobs.run('keys', keystore.describe, key_id)}
+    except KeyNotFound as e:
+        status, result = 404, {'success': False, 'error': str(e)}
+    except (ServerBusy, executor.ExecutorBusy) as e:
+        log.warning("Request rejected", extra=event('keys', status=503, error=str(e)))
+        status, result = 503, {'success': False, 'error': str(e)}
+    except RequestTooLarge as e:
+        log.warning("Request rejected", extra=event('keys', status=413, error=str(e)))
+        status, result = 413, {'success': False, 'error': str(e)}
+    except Exception as e:
+        log.error("Request failed", extra=event('keys', error=str(e)))
+        status, result = 200, {'success': False, 'error': str(e)}
+    await send_timed_json(send, timer, status, result)
+
+async def aes_encrypt_stream(receive, send, headers):
+    """Encrypt an AES-GCM body as it arrives, sending each chunk's ciphertext straight back.
+
+    Same contract as the Flask /api/aes/stream: the 16-byte tag trails the
+    body, key and IV come back in X-AES-Key and X-AES-IV, and a client may
+    supply its own key as hex in X-AES-Key. The body is never buffered, so
+    it is not subject to ASGI_MAX_BODY_SIZE. The clock stops when the
+    headers go out.
+    """
+    timer = RequestTimer('aes/stream')
+    try:
+        with timer.stage('keygen'):
+            key = request_key(headers.get('x-aes-key'), generate=True)
+            iv = key_generator.generate_iv(config.GCM_IV_SIZE)
+        encryptor = gcm.StreamEncryptor(key, iv)
+    except Exception as e:
+        log.error("Request failed", extra=event('aes/stream', error=str(e)))
+        await send_timed_json(send, timer, 200, {'success': False, 'error': str(e)})
+        return
+    timer.finish(True)
+    response_headers = [
+        (b'content-type', wire.OCTET_STREAM.encode('ascii')),
+        (b'x-aes-key', key.hex().encode('ascii')),
+        (b'x-aes-iv', iv.hex().encode('ascii')),
+        (b'x-aes-tag-length', str(config.GCM_TAG_SIZE).encode('ascii')),
+        (b'server-timing', timer.server_timing().encode('latin-1')),
+    ] + CORS_HEADERS
+    await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+    total, start_time = 0, time.time()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            # Headers are out, so all that is left is to stop without a tag
+            log.warning("Client disconnected mid-stream", extra=event('aes/stream', outputSize=total))
+            return
+        if message.get('body'):
+            chunk = await run_chunk(encryptor.update, message['body'])
+            total += len(chunk)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        if not message.get('more_body', False):
+            break
+    tail = encryptor.finalize()
+    await send({'type': 'http.response.body', 'body': tail})
+    encrypt_time = (time.time() - start_time) * 1000
+    log.info("Encryption successful", extra=event('aes/stream', sample=True, outputSize=total + len(tail), encryptMs=round(encrypt_time, 3)))
+
+def seals_upload(headers) -> bool:
+    """Whether an /api/rsa request is a sized raw body answered as octet-stream, which rsa_seal_upload streams."""
+    mimetype = headers.get('content-type', '').split(';')[0].strip()
+    return mimetype == wire.OCTET_STREAM and 'content-length' in headers and wire.negotiate(headers.get('accept')) == wire.OCTET_STREAM
+
+async def rsa_seal_upload(receive, send, headers, args):
+    """/api/rsa for a raw body answered as octet-stream: a hybrid envelope is sealed as the body arrives.
+
+    Same contract as the Flask route: the envelope goes to a stored key whose
+    id comes back in X-Crypto-Key-Id. Like /api/aes/stream the body is never
+    buffered, so it is not subject to ASGI_MAX_BODY_SIZE, and the clock stops
+    when the headers go out. A payload small enough for OAEP is read whole
+    and answered as usual.
+    """
+    timer = RequestTimer('rsa')
+    data = {**args, **upload_info(headers.get('x-file-name'), int(headers['content-length']))}
+    try:
+        key_size = rsa_key_size(data)
+        if rsa_mode(data, data['size'], key_size) != 'hybrid':
+            result, blobs = await rsa_encrypt(timer, data, await read_body(receive))
+            body, content_type, extra_headers = render_result(result, blobs, headers.get('accept'), timer)
+            timer.finish(True)
+            await send_response(send, 200, body, content_type.encode('ascii'), {**extra_headers, 'Server-Timing': timer.server_timing()})
+            return
+        with timer.stage('keygen'):
+            private_key, key_id, pool_hit = await jobs.run('keys', rsa_seal_key, key_size, data.get('keyId'))
+            header, data_key, nonce = hybrid.new_header(private_key.public_key())
+        encryptor = gcm.StreamEncryptor(data_key, nonce, header)
+    except (ServerBusy, executor.ExecutorBusy) as e:
+        log.warning("Request rejected", extra=event('rsa', status=503, error=str(e)))
+        await send_timed_json(send, timer, 503, {'success': False, 'error': str(e)})
+        return
+    except Exception as e:
+        log.error("Request failed", extra=event('rsa', error=str(e)))
+        await send_timed_json(send, timer, 200, {'success': False, 'error': str(e)})
+        return
+    result = {
+        'success': True,
+        'originalName': data['name'],
+        'originalSize': data['size'],
+        'encryptedSize': hybrid.envelope_size(data['size'], key_size),
+        'mode': 'hybrid',
+        'keySize': key_size,
+        'keyId': key_id,
+        'keygenTime': f"{timer.stages_ns['keygen'] / 1_000_000:.3f}",
+        'keyPoolHit': pool_hit
+    }
+    timer.finish(True)
+    response_headers = [
+        (b'content-type', wire.OCTET_STREAM.encode('ascii')),
+        (b'content-length', str(result['encryptedSize']).encode('ascii')),
+        (b'server-timing', timer.server_timing().encode('latin-1')),
+    ] + CORS_HEADERS
+    for name, value in wire.metadata_headers(result).items():
+        response_headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': header, 'more_body': True})
+    total, start_time = 0, time.time()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            # Headers are out, so all that is left is to stop without a tag
+            log.warning("Client disconnected mid-stream", extra=event('rsa', inputSize=total))
+            return
+        if message.get('body'):
+            chunk = await run_chunk(encryptor.update, message['body'])
+            total += len(chunk)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        if not message.get('more_body', False):
+            break
+    if total != data['size']:
+        # Content-Length is already promised, so a short or long body gets no tag
+        log.warning("Body did not match Content-Length", extra=event('rsa', inputSize=total, expected=data['size']))
+        return
+    await send({'type': 'http.response.body', 'body': encryptor.finalize()})
+    encrypt_time = (time.time() - start_time) * 1000
+    log.info("Encryption successful", extra=event('rsa', sample=True, inputSize=total, outputSize=result['encryptedSize'], encryptMs=round(encrypt_time, 3)))
+
+async def aes_decrypt(receive, send, headers):
+    """Decrypt an AES-GCM body as it arrives and stream the plaintext back once the tag verifies.
+
+    Same contract as the Flask /api/aes/decrypt: key and IV in X-AES-Key and
+    X-AES-IV, the tag in X-AES-Tag or trailing the body. The body is not
+    subject to ASGI_MAX_BODY_SIZE since it is spooled, not buffered.
+    """
+    timer = RequestTimer('aes/decrypt')
+    spool = None
+    try:
+        key, iv, tag = decrypt_params(headers)
+        spool = DecryptSpool(key, iv, tag)
+        with timer.stage('crypto'):
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    raise Exception("Client disconnected before the body was complete")
+                if message.get('body'):
+                    await run_chunk(spool.write, message['body'])
+                if not message.get('more_body', False):
+                    break
+            plaintext = spool.verify()
+    except InvalidTag:
+        log.warning("Decryption failed authentication", extra=event('aes/decrypt'))
+        status, error = 200, AUTHENTICATION_FAILED
+    except (ServerBusy, executor.ExecutorBusy) as e:
+        log.warning("Request rejected", extra=event('aes/decrypt', status=503, error=str(e)))
+        status, error = 503, str(e)
+    except Exception as e:
+        log.error("Request failed", extra=event('aes/decrypt', error=str(e)))
+        status, error = 200, str(e)
+    else:
+        error = None
+    if error is not None:
+        if spool is not None:
+            spool.close()
+        timer.finish(False)
+        await send_json(send, status, {'success': False, 'error': error}, {'Server-Timing': timer.server_timing()})
+        return
+    log.info("Decryption successful", extra=event('aes/decrypt', sample=True, outputSize=spool.size))
+    timer.finish(True)
+    response_headers = [
+        (b'content-type', wire.OCTET_STREAM.encode('ascii')),
+        (b'content-length', str(spool.size).encode('ascii')),
+        (b'server-timing', timer.server_timing().encode('latin-1')),
+    ] + CORS_HEADERS
+    await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+    # The spool was just written, so these reads come from memory or the page cache
+    with plaintext:
+        chunk = plaintext.read(config.STREAM_CHUNK_SIZE)
+        while chunk:
+            following = plaintext.read(config.STREAM_CHUNK_SIZE)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': bool(following)})
+            chunk = following
+    if not spool.size:
+        await send({'type': 'http.response.body', 'body': b''})
+
+async def object_read(send, object_id, headers):
+    """Decrypt an object, or just the part named by a Range header, up to ASGI_READ_BATCH_SIZE bytes per job and body message."""
+    timer = RequestTimer('objects/read')
+    try:
+        with timer.stage('parse'):
+            key = request_key(headers.get('x-aes-key'))
+            stream = object_store.open(object_id)
+    except ObjectNotFound as e:
+        await send_timed_json(send, timer, 404, {'success': False, 'error': str(e)})
+        return
+    except Exception as e:
+        log.error("Request failed", extra=event('objects/read', error=str(e)))
+        await send_timed_json(send, timer, 200, {'success': False, 'error': str(e)})
+        return
+    with stream:
+        try:
+            with timer.stage('parse'):
+                size = object_store.size(stream)
+                byte_range = parse_range(headers.get('range'), size)
+                start, end = byte_range or (0, size)
+            with timer.stage('crypto'):
+                chunks = segmented.iter_range(stream, key, start, end)
+                # Open the first segments before answering so a wrong key fails cleanly
+                chunk = await jobs.run('stream', read_segments, chunks, config.ASGI_READ_BATCH_SIZE)
+        except RangeNotSatisfiable as e:
+            await send_timed_json(send, timer, 416, {'success': False, 'error': str(e)}, {'Content-Range': f"bytes */{size}"})
+            return
+        except InvalidTag:
+            log.warning("Object failed authentication", extra=event('objects', objectId=object_id))
+            await send_timed_json(send, timer, 200, {'success': False, 'error': "Object failed authentication: wrong key or corrupted data"})
+            return
+        except (ServerBusy, executor.ExecutorBusy) as e:
+            log.warning("Request rejected", extra=event('objects/read', status=503, error=str(e)))
+            await send_timed_json(send, timer, 503, {'success': False, 'error': str(e)})
+            return
+        except Exception as e:
+            log.error("Request failed", extra=event('objects/read', error=str(e)))
+            await send_timed_json(send, timer, 200, {'success': False, 'error': str(e)})
+            return
+        log.info("Object read", extra=event('objects', sample=True, objectId=object_id, start=start, end=end))
+        # As for /api/aes/decrypt, the clock stops when the headers go out
+        timer.finish(True)
+        response_headers = [
+            (b'content-type', wire.OCTET_STREAM.encode('ascii')),
+            (b'server-timing', timer.server_timing().encode('latin-1')),
+        ] + CORS_HEADERS
+        for name, value in range_headers(start, end, size, byte_range is not None).items():
+            response_headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': 206 if byte_range else 200, 'headers': response_headers})
+        while chunk:
+            try:
+                following = await jobs.run('stream', read_segments, chunks, config.ASGI_READ_BATCH_SIZE)
+            except Exception as e:
+                # Headers are out, so all that is left is to stop short of Content-Length
+                log.error("Object read failed mid-stream", extra=event('objects/read', objectId=object_id, error=repr(e)))
+                return
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': bool(following)})
+            chunk = following
+        if start == end:
+            await send({'type': 'http.response.body', 'body': b''})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            setup_logging()
+            rsa_key_pool.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            rsa_key_pool.stop()
+            executor.shutdown(wait=False)
+            shutdown_logging()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method, path = scope['method'], scope['path']
+    if method == 'OPTIONS':
+        await send_response(send, 204, b'')
+    elif method == 'GET' and path == '/':
+        await send_response(send, 200, HTML_TEMPLATE.encode('utf-8'), b'text/html; charset=utf-8')
+    elif method == 'GET' and path == '/api/test':
+        await send_json(send, 200, test_api())
+    elif method == 'GET' and path == '/metrics':
+        await send_response(send, 200, metrics_text().encode('utf-8'), b'text/plain; version=0.0.4; charset=utf-8')
+    elif method == 'GET' and path == '/api/ecdh/key':
+        timer = RequestTimer('ecdh/key')
+        try:
+            engine = ecdh_engine(dict(parse_qsl(scope.get('query_string', b'').decode('latin-1'))).get('curve'))
+            # current() generates the next static key when the old one is due for rotation
+            with timer.stage('keygen'):
+                result = {'success': True, **engine.current().describe(engine.rotation_seconds)}
+        except Exception as e:
+            log.error("Request failed", extra=event('ecdh/key', error=str(e)))
+            result = {'success': False, 'error': str(e)}
+        await send_timed_json(send, timer, 200, result)
+    elif method == 'GET' and path == '/api/hash/cache':
+        await send_timed_json(send, RequestTimer('hash/cache'), 200, {'success': True, **hash_cache.stats()})
+    elif method == 'GET' and path == '/api/rsa/pool':
+        await send_timed_json(send, RequestTimer('rsa/pool'), 200, {'success': True, **rsa_key_pool.stats()})
+    elif method == 'POST' and path == '/api/aes/stream':
+        await aes_encrypt_stream(receive, send, request_headers(scope))
+    elif method == 'POST' and path == '/api/rsa' and seals_upload(request_headers(scope)):
+        await rsa_seal_upload(receive, send, request_headers(scope), dict(parse_qsl(scope.get('query_string', b'').decode('latin-1'))))
+    elif method == 'POST' and path == '/api/aes/decrypt':
+        await aes_decrypt(receive, send, request_headers(scope))
+    elif method == 'POST' and path == '/api/objects':
+        await object_upload(receive, send, request_headers(scope))
+    elif method == 'GET' and path.startswith('/api/objects/'):
+        await object_read(send, path[len('/api/objects/'):], request_headers(scope))
+    elif method in ('GET', 'POST') and path == '/api/keys':
+        await stored_keys(receive, send, method)
+    elif method in ('GET', 'DELETE') and path.startswith('/api/keys/'):
+        await stored_keys(receive, send, method, path[len('/api/keys/'):])
+    elif method == 'POST' and (path in API_ROUTES or path in JSON_ROUTES):
+        timer = RequestTimer(path[len('/api/'):])
+        headers = request_headers(scope)
+        mimetype = headers.get('content-type', '').split(';')[0].strip()
+        try:
+            body = await read_body(receive)
+            if path in JSON_ROUTES:
+                with timer.stage('parse'):
+                    data = json.loads(body)
+                result = await JSON_ROUTES[path](timer, data)
+                result['timings'] = timer.stages_ms()
+                with timer.stage('serialize'):
+                    body, content_type, extra_headers = json.dumps(result).encode('utf-8'), wire.JSON, {}
+            else:
+                if path == '/api/ecdh' and mimetype != wire.OCTET_STREAM:
+                    # Key agreement ignores the input, so tolerate any JSON body
+                    with timer.stage('parse'):
+                        data, input_bytes = json.loads(body or b'{}'), b''
+                elif path in RAW_INPUT_ROUTES:
+                    data, input_bytes = parse_payload(mimetype, body, headers.get('x-file-name'), timer)
+                else:
+                    data, input_bytes = read_payload(mimetype, body, headers.get('x-file-name'), timer)
+                # Query args (e.g. /api/hash?mode=tree for binary uploads) fill in fields the body lacks
+                data = {**dict(parse_qsl(scope.get('query_string', b'').decode('latin-1'))), **data}
+                result, blobs = await API_ROUTES[path](timer, data, input_bytes)
+                body, content_type, extra_headers = render_result(result, blobs, headers.get('accept'), timer)
+            status, success = 200, True
+        except (ServerBusy, executor.ExecutorBusy) as e:
+            log.warning("Request rejected", extra=event(timer.endpoint, status=503, error=str(e)))
+            status, success, body = 503, False, json.dumps({'success': False, 'error': str(e)}).encode('utf-8')
+        except RequestTooLarge as e:
+            log.warning("Request rejected", extra=event(timer.endpoint, status=413, error=str(e)))
+            status, success, body = 413, False, json.dumps({'success': False, 'error': str(e)}).encode('utf-8')
+        except InvalidTag:
+            log.warning("Decryption failed authentication", extra=event(timer.endpoint))
+            status, success, body = 200, False, json.dumps({'success': False, 'error': AUTHENTICATION_FAILED}).encode('utf-8')
+        except Exception as e:
+            log.error("Request failed", extra=event(timer.endpoint, error=str(e)))
+            status, success, body = 200, False, json.dumps({'success': False, 'error': str(e)}).encode('utf-8')
+        if not success:
+            content_type, extra_headers = wire.JSON, {}
+        timer.finish(success)
+        extra_headers['Server-Timing'] = timer.server_timing()
+        log.info("Request timing", extra=event(sample=True, **timer.log_record()))
+        await send_response(send, status, body, content_type.encode('ascii'), extra_headers)
+    else:
+        await send_json(send, 404, {'success': False, 'error': f"No route for {method} {path}"})
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("The ASGI server needs uvicorn: pip install uvicorn")
+    uvicorn.run(app, host='0.0.0.0', port=5000)
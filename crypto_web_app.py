@@ -1,980 +1,73 @@
-from flask import Flask, request, jsonify, render_template_string
-import base64
-import hashlib
-import secrets
-import json
+from flask import Flask, Response, request, jsonify, render_template_string, stream_with_context
 import time
-from datetime import datetime
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.backends import default_backend
+from cryptography.exceptions import InvalidTag
+from werkzeug.formparser import parse_form_data
+from crypto_tool import config
+from crypto_tool.web_common import (
+    AUTHENTICATION_FAILED, DecryptSpool, RangeNotSatisfiable, batch_result, batch_rsa_key, create_stored_key, decrypt_params, ecdh_agreement, ecdh_engine, hash_cache,
+    hash_cache_key, hash_options, hash_result, keystore, metrics_text, object_store, parse_batch, parse_payload, parse_range, payload_bytes, range_headers,
+    read_payload, render_result, request_key, rsa_key_pool, rsa_key_size, rsa_mode, rsa_private_key, rsa_seal_key, rsa_unseal_key, upload_info
+)
+from crypto_tool.web_template import HTML_TEMPLATE
+from crypto_tool.algorithms import batch, hybrid, gcm, operations, segmented
+from crypto_tool.utils import executor, key_generator, wire
+from crypto_tool.utils.file_handler import iter_chunks
+from crypto_tool.utils.instrumentation import RequestTimer
+from crypto_tool.utils.keystore import KeyNotFound
+from crypto_tool.utils.log import event, get_logger, setup_logging
+from crypto_tool.utils.object_store import ObjectNotFound
 
 app = Flask(__name__)
+# WSGI servers import this module to get app, so this is the Flask app's startup
+setup_logging()
+log = get_logger('crypto_tool.web')
 
 # Enable CORS for debugging
 @app.after_request
 def after_request(response):
     response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Accept,Authorization,Range,X-AES-Key,X-AES-IV,X-AES-Tag,X-File-Name')
+    response.headers.add('Access-Control-Expose-Headers', '*')
     response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
     return response
 
-# HTML template with enhanced debugging
-HTML_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Animated Crypto Tool</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        body {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            min-height: 100vh;
-            padding: 20px;
-            color: white;
-            overflow-x: hidden;
-        }
-
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            position: relative;
-        }
-
-        .title {
-            text-align: center;
-            font-size: 2.5em;
-            margin-bottom: 30px;
-            text-shadow: 0 4px 15px rgba(0,0,0,0.3);
-            animation: titleGlow 3s ease-in-out infinite alternate;
-        }
-
-        @keyframes titleGlow {
-            from { text-shadow: 0 4px 15px rgba(0,0,0,0.3), 0 0 20px rgba(255,255,255,0.1); }
-            to { text-shadow: 0 4px 15px rgba(0,0,0,0.5), 0 0 30px rgba(255,255,255,0.3); }
-        }
-
-        .input-section {
-            background: rgba(255,255,255,0.1);
-            backdrop-filter: blur(10px);
-            border-radius: 20px;
-            padding: 30px;
-            margin-bottom: 30px;
-            border: 1px solid rgba(255,255,255,0.2);
-            box-shadow: 0 8px 32px rgba(0,0,0,0.1);
-            animation: slideUp 0.8s ease-out forwards;
-        }
-
-        @keyframes slideUp {
-            from {
-                transform: translateY(20px);
-                opacity: 0;
-            }
-            to {
-                transform: translateY(0);
-                opacity: 1;
-            }
-        }
-
-        .input-group {
-            margin-bottom: 20px;
-        }
-
-        .input-group label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: rgba(255,255,255,0.9);
-        }
-
-        .input-group input, .input-group textarea {
-            width: 100%;
-            padding: 15px;
-            border: none;
-            border-radius: 10px;
-            background: rgba(255,255,255,0.1);
-            color: white;
-            font-size: 14px;
-            backdrop-filter: blur(5px);
-            border: 1px solid rgba(255,255,255,0.2);
-            transition: all 0.3s ease;
-        }
-
-        .input-group input:focus, .input-group textarea:focus {
-            outline: none;
-            background: rgba(255,255,255,0.15);
-            border-color: rgba(255,255,255,0.4);
-            box-shadow: 0 0 20px rgba(255,255,255,0.1);
-            transform: scale(1.02);
-        }
-
-        .input-group input::placeholder, .input-group textarea::placeholder {
-            color: rgba(255,255,255,0.6);
-        }
-
-        .controls {
-            display: flex;
-            gap: 15px;
-            flex-wrap: wrap;
-            justify-content: center;
-        }
-
-        .btn {
-            padding: 15px 30px;
-            border: none;
-            border-radius: 25px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            position: relative;
-            overflow: hidden;
-            background: linear-gradient(45deg, #ff6b6b, #4ecdc4);
-            color: white;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-        }
-
-        .btn:hover {
-            transform: translateY(-3px) scale(1.05);
-            box-shadow: 0 8px 25px rgba(0,0,0,0.3);
-        }
-
-        .btn:disabled {
-            opacity: 0.6;
-            cursor: not-allowed;
-            transform: none;
-        }
-
-        .crypto-operations {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
-            gap: 20px;
-            margin-top: 30px;
-        }
-
-        .crypto-card {
-            background: rgba(255,255,255,0.1);
-            backdrop-filter: blur(10px);
-            border-radius: 20px;
-            padding: 25px;
-            border: 1px solid rgba(255,255,255,0.2);
-            box-shadow: 0 8px 32px rgba(0,0,0,0.1);
-            transform: translateY(0);
-            opacity: 1;
-            transition: all 0.3s ease;
-        }
-
-        .crypto-card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 15px 45px rgba(0,0,0,0.2);
-            border-color: rgba(255,255,255,0.3);
-        }
-
-        .crypto-card h3 {
-            font-size: 1.4em;
-            margin-bottom: 15px;
-            color: #4ecdc4;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }
-
-        .progress-container {
-            width: 100%;
-            height: 8px;
-            background: rgba(255,255,255,0.1);
-            border-radius: 10px;
-            margin: 15px 0;
-            overflow: hidden;
-        }
-
-        .progress-bar {
-            height: 100%;
-            background: linear-gradient(90deg, #4ecdc4, #44a08d);
-            border-radius: 10px;
-            width: 0%;
-            transition: width 0.3s ease;
-        }
-
-        .result {
-            margin-top: 15px;
-            padding: 15px;
-            background: rgba(0,0,0,0.2);
-            border-radius: 10px;
-            font-family: 'Courier New', monospace;
-            font-size: 12px;
-            line-height: 1.4;
-            border-left: 4px solid #4ecdc4;
-            word-break: break-all;
-            min-height: 50px;
-        }
-
-        .status {
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            font-size: 14px;
-            margin: 10px 0;
-        }
-
-        .status-indicator {
-            width: 12px;
-            height: 12px;
-            border-radius: 50%;
-            background: #666;
-            transition: all 0.3s ease;
-        }
-
-        .status-indicator.running {
-            background: #ff9800;
-            animation: pulse 1.5s infinite;
-        }
-
-        .status-indicator.success {
-            background: #4caf50;
-        }
-
-        .status-indicator.error {
-            background: #f44336;
-        }
-
-        @keyframes pulse {
-            0%, 100% { transform: scale(1); }
-            50% { transform: scale(1.2); }
-        }
-
-        .file-input-wrapper {
-            position: relative;
-            border: 2px dashed rgba(255,255,255,0.3);
-            border-radius: 15px;
-            padding: 20px;
-            text-align: center;
-            cursor: pointer;
-            background: rgba(255,255,255,0.05);
-        }
-
-        #fileInput {
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            opacity: 0;
-            cursor: pointer;
-        }
-
-        .input-mode-selector {
-            display: flex;
-            justify-content: center;
-            gap: 30px;
-            margin-bottom: 20px;
-            padding: 15px;
-            background: rgba(255,255,255,0.05);
-            border-radius: 15px;
-        }
-
-        .input-mode-selector label {
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            cursor: pointer;
-            padding: 8px 16px;
-            border-radius: 20px;
-        }
-
-        .error-message {
-            color: #ff6b6b;
-            background: rgba(255, 107, 107, 0.1);
-            padding: 10px;
-            border-radius: 5px;
-            margin: 10px 0;
-        }
-
-        .download-btn {
-            background: linear-gradient(45deg, #3498db, #2980b9);
-            color: white;
-            border: none;
-            padding: 8px 16px;
-            border-radius: 15px;
-            cursor: pointer;
-            font-size: 12px;
-            margin-left: 10px;
-            transition: all 0.3s ease;
-        }
-
-        .download-btn:hover {
-            background: linear-gradient(45deg, #2980b9, #21618c);
-            transform: translateY(-2px);
-        }
-
-        .result-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 10px;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1 class="title">🔐 Animated Cryptographic Tool</h1>
-        
-        <div class="input-section">
-            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 20px; margin-bottom: 20px;">
-                <div class="input-group">
-                    <label for="plaintext">Text Input:</label>
-                    <textarea id="plaintext" rows="4" placeholder="Enter your message to encrypt...">The quick brown fox jumps over the lazy dog</textarea>
-                </div>
-                
-                <div class="input-group">
-                    <label for="fileInput">File Input:</label>
-                    <div class="file-input-wrapper">
-                        <input type="file" id="fileInput" accept="*/*" onchange="handleFileInput(this)">
-                        <div id="fileInfo">Choose any file</div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="input-mode-selector">
-                <label>
-                    <input type="radio" name="inputMode" value="text" checked onchange="switchInputMode()">
-                    <span>Text Mode</span>
-                </label>
-                <label>
-                    <input type="radio" name="inputMode" value="file" onchange="switchInputMode()">
-                    <span>File Mode</span>
-                </label>
-            </div>
-            
-            <div class="controls">
-                <button class="btn" onclick="runAllOperations()">🚀 Run All Operations</button>
-                <button class="btn" onclick="runAESGCM()">🔒 AES-GCM</button>
-                <button class="btn" onclick="runRSA()">🗝️ RSA OAEP</button>
-                <button class="btn" onclick="runECDH()">🤝 ECDH</button>
-                <button class="btn" onclick="runHashing()">🔢 SHA-256</button>
-                <button class="btn" onclick="downloadAllResults()" style="background: linear-gradient(45deg, #2ecc71, #27ae60);">📥 Download All</button>
-                <button class="btn" onclick="clearResults()" style="background: linear-gradient(45deg, #ff4757, #ff3742);">🗑️ Clear</button>
-            </div>
-        </div>
-        
-        <div class="crypto-operations">
-            <div class="crypto-card" id="aes-card">
-                <h3>🔒 AES-GCM (256-bit)</h3>
-                <div class="status">
-                    <div class="status-indicator" id="aes-status"></div>
-                    <span id="aes-status-text">Ready</span>
-                </div>
-                <div class="progress-container">
-                    <div class="progress-bar" id="aes-progress"></div>
-                </div>
-                <div class="result" id="aes-result">Click AES-GCM button to encrypt</div>
-            </div>
-            
-            <div class="crypto-card" id="rsa-card">
-                <h3>🗝️ RSA OAEP (2048-bit)</h3>
-                <div class="status">
-                    <div class="status-indicator" id="rsa-status"></div>
-                    <span id="rsa-status-text">Ready</span>
-                </div>
-                <div class="progress-container">
-                    <div class="progress-bar" id="rsa-progress"></div>
-                </div>
-                <div class="result" id="rsa-result">Click RSA button to encrypt (max 190 bytes)</div>
-            </div>
-            
-            <div class="crypto-card" id="ecdh-card">
-                <h3>🤝 ECDH (P-256)</h3>
-                <div class="status">
-                    <div class="status-indicator" id="ecdh-status"></div>
-                    <span id="ecdh-status-text">Ready</span>
-                </div>
-                <div class="progress-container">
-                    <div class="progress-bar" id="ecdh-progress"></div>
-                </div>
-                <div class="result" id="ecdh-result">Click ECDH button to perform key exchange</div>
-            </div>
-            
-            <div class="crypto-card" id="hash-card">
-                <h3>🔢 SHA-256 Hashing</h3>
-                <div class="status">
-                    <div class="status-indicator" id="hash-status"></div>
-                    <span id="hash-status-text">Ready</span>
-                </div>
-                <div class="progress-container">
-                    <div class="progress-bar" id="hash-progress"></div>
-                </div>
-                <div class="result" id="hash-result">Click Hash button to generate SHA-256</div>
-            </div>
-        </div>
-
-        <!-- Debug panel - remove or uncomment to hide -->
-        <!--
-        <div class="debug-info" id="debug-info">
-            <strong>Debug Log:</strong><br>
-            Application loaded successfully...<br>
-        </div>
-        -->
-    </div>
-
-    <script>
-        // Global storage for results
-        let cryptoResults = {
-            aes: null,
-            rsa: null,
-            ecdh: null,
-            hash: null
-        };
-
-        // Download functionality
-        function downloadFile(content, filename, contentType = 'text/plain') {
-            const blob = new Blob([content], { type: contentType });
-            const url = window.URL.createObjectURL(blob);
-            const link = document.createElement('a');
-            link.href = url;
-            link.download = filename;
-            document.body.appendChild(link);
-            link.click();
-            document.body.removeChild(link);
-            window.URL.revokeObjectURL(url);
-            logDebug(`Downloaded: ${filename}`);
-        }
-
-        function downloadCryptoResult(operation) {
-            const result = cryptoResults[operation];
-            if (!result || !result.success) {
-                alert(`No ${operation.toUpperCase()} result available to download`);
-                return;
-            }
-
-            let content = '';
-            let filename = '';
-
-            switch (operation) {
-                case 'aes':
-                    content = `AES-GCM Encryption Results
-=============================
-Original File: ${result.originalName}
-Original Size: ${result.originalSize} bytes
-Encrypted Size: ${result.encryptedSize} bytes
-Initialization Vector (IV): ${result.iv}
-Encryption Time: ${result.encryptTime}ms
-Algorithm: AES-GCM 256-bit
-
-Encrypted Data (Base64):
-${result.encrypted}
-
-Generated on: ${new Date().toISOString()}
-`;
-                    filename = `aes_encrypted_${new Date().getTime()}.txt`;
-                    break;
-
-                case 'rsa':
-                    content = `RSA-OAEP Encryption Results
-===========================
-Original File: ${result.originalName}
-Original Size: ${result.originalSize} bytes
-Encrypted Size: ${result.encryptedSize} bytes
-Key Generation Time: ${result.keygenTime}ms
-Algorithm: RSA-OAEP 2048-bit
-
-Encrypted Data (Base64):
-${result.encrypted}
-
-Generated on: ${new Date().toISOString()}
-`;
-                    filename = `rsa_encrypted_${new Date().getTime()}.txt`;
-                    break;
-
-                case 'ecdh':
-                    content = `ECDH Key Exchange Results
-=========================
-Key Agreement: ${result.keyAgreement ? 'Successful' : 'Failed'}
-Shared Key Length: ${result.sharedKeyLength} bytes
-Curve: P-256 (SECP256R1)
-Algorithm: ECDH
-
-Shared Key (Hex):
-${result.sharedKey}
-
-Generated on: ${new Date().toISOString()}
-`;
-                    filename = `ecdh_shared_key_${new Date().getTime()}.txt`;
-                    break;
-
-                case 'hash':
-                    content = `SHA-256 Hash Results
-====================
-Original File: ${result.originalName}
-Original Size: ${result.originalSize} bytes
-Hash Time: ${result.hashTime}ms
-Algorithm: SHA-256
-
-Hash:
-${result.hash}
-
-Generated on: ${new Date().toISOString()}
-`;
-                    filename = `sha256_hash_${new Date().getTime()}.txt`;
-                    break;
-            }
-
-            downloadFile(content, filename);
-        }
-
-        function downloadAllResults() {
-            const hasResults = Object.values(cryptoResults).some(result => result && result.success);
-            
-            if (!hasResults) {
-                alert('No results available to download. Please run some crypto operations first.');
-                return;
-            }
-
-            let allContent = `CRYPTOGRAPHIC OPERATIONS REPORT
-===============================================
-Generated on: ${new Date().toISOString()}
-Input Mode: ${currentInputMode}
-`;
-
-            if (currentInputMode === 'text') {
-                allContent += `Input Text: "${document.getElementById('plaintext').value.substring(0, 100)}${document.getElementById('plaintext').value.length > 100 ? '...' : ''}"\n`;
-            } else if (selectedFile) {
-                allContent += `Input File: ${selectedFile.name} (${selectedFile.size} bytes)\n`;
-            }
-
-            allContent += `\n`;
-
-            // Add each result
-            if (cryptoResults.aes && cryptoResults.aes.success) {
-                allContent += `
-1. AES-GCM ENCRYPTION
-=====================
-Original Size: ${cryptoResults.aes.originalSize} bytes
-Encrypted Size: ${cryptoResults.aes.encryptedSize} bytes
-IV: ${cryptoResults.aes.iv}
-Time: ${cryptoResults.aes.encryptTime}ms
-Encrypted Data: ${cryptoResults.aes.encrypted.substring(0, 100)}...
-
-`;
-            }
-
-            if (cryptoResults.rsa && cryptoResults.rsa.success) {
-                allContent += `
-2. RSA-OAEP ENCRYPTION
-======================
-Original Size: ${cryptoResults.rsa.originalSize} bytes
-Encrypted Size: ${cryptoResults.rsa.encryptedSize} bytes
-Key Generation: ${cryptoResults.rsa.keygenTime}ms
-Encrypted Data: ${cryptoResults.rsa.encrypted.substring(0, 100)}...
-
-`;
-            }
-
-            if (cryptoResults.ecdh && cryptoResults.ecdh.success) {
-                allContent += `
-3. ECDH KEY EXCHANGE
-====================
-Key Agreement: ${cryptoResults.ecdh.keyAgreement ? 'Success' : 'Failed'}
-Shared Key Length: ${cryptoResults.ecdh.sharedKeyLength} bytes
-Shared Key: ${cryptoResults.ecdh.sharedKey}
-
-`;
-            }
-
-            if (cryptoResults.hash && cryptoResults.hash.success) {
-                allContent += `
-4. SHA-256 HASH
-===============
-Original Size: ${cryptoResults.hash.originalSize} bytes
-Time: ${cryptoResults.hash.hashTime}ms
-Hash: ${cryptoResults.hash.hash}
-
-`;
-            }
-
-            allContent += `
-===============================================
-Report generated by Animated Cryptographic Tool
-`;
-
-            const filename = `crypto_report_${new Date().toISOString().replace(/[:.]/g, '-')}.txt`;
-            downloadFile(allContent, filename);
-        }
-
-        // Debug function - remove or comment out to disable logging
-        function logDebug(message) {
-            // Uncomment the lines below to re-enable debug panel
-            /*
-            const debugDiv = document.getElementById('debug-info');
-            if (debugDiv) {
-                const timestamp = new Date().toLocaleTimeString();
-                debugDiv.innerHTML += `[${timestamp}] ${message}<br>`;
-                debugDiv.scrollTop = debugDiv.scrollHeight;
-            }
-            */
-            console.log(`[${new Date().toLocaleTimeString()}] ${message}`);
-        }
-
-        function handleFileInput(input) {
-            const file = input.files[0];
-            if (file) {
-                selectedFile = file;
-                document.getElementById('fileInfo').innerHTML = `Selected: ${file.name} (${file.size} bytes)`;
-                document.querySelector('input[value="file"]').checked = true;
-                switchInputMode();
-                logDebug(`File selected: ${file.name} (${file.size} bytes)`);
-            }
-        }
-
-        function switchInputMode() {
-            const mode = document.querySelector('input[name="inputMode"]:checked').value;
-            currentInputMode = mode;
-            logDebug(`Switched to ${mode} mode`);
-        }
-
-        async function getInputData() {
-            if (currentInputMode === 'text') {
-                const text = document.getElementById('plaintext').value;
-                if (!text.trim()) {
-                    throw new Error('Please enter some text');
-                }
-                return {
-                    data: text,
-                    name: 'text_input.txt',
-                    size: new Blob([text]).size,
-                    type: 'text'
-                };
-            } else {
-                if (!selectedFile) {
-                    throw new Error('Please select a file first');
-                }
-                const reader = new FileReader();
-                return new Promise((resolve, reject) => {
-                    reader.onload = function(e) {
-                        resolve({
-                            data: e.target.result,
-                            name: selectedFile.name,
-                            size: selectedFile.size,
-                            type: 'file'
-                        });
-                    };
-                    reader.onerror = reject;
-                    reader.readAsDataURL(selectedFile);
-                });
-            }
-        }
-
-        async function updateProgress(progressId, statusId, statusTextId, duration) {
-            const progressBar = document.getElementById(progressId);
-            const statusIndicator = document.getElementById(statusId);
-            const statusText = document.getElementById(statusTextId);
-            
-            statusIndicator.className = 'status-indicator running';
-            statusText.textContent = 'Processing...';
-            
-            progressBar.style.width = '0%';
-            
-            return new Promise(resolve => {
-                let progress = 0;
-                const interval = setInterval(() => {
-                    progress += 4;
-                    progressBar.style.width = progress + '%';
-                    
-                    if (progress >= 100) {
-                        clearInterval(interval);
-                        resolve();
-                    }
-                }, duration / 25);
-            });
-        }
-
-        function setOperationComplete(statusId, statusTextId, success = true) {
-            const statusIndicator = document.getElementById(statusId);
-            const statusText = document.getElementById(statusTextId);
-            
-            if (success) {
-                statusIndicator.className = 'status-indicator success';
-                statusText.textContent = 'Completed';
-            } else {
-                statusIndicator.className = 'status-indicator error';
-                statusText.textContent = 'Error';
-            }
-        }
-
-        async function callPythonAPI(endpoint, data) {
-            try {
-                logDebug(`Calling API endpoint: /api/${endpoint}`);
-                const response = await fetch(`/api/${endpoint}`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify(data)
-                });
-                
-                if (!response.ok) {
-                    throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-                }
-                
-                const result = await response.json();
-                logDebug(`API ${endpoint} completed: ${result.success ? 'SUCCESS' : 'FAILED'}`);
-                return result;
-            } catch (error) {
-                logDebug(`API ${endpoint} failed: ${error.message}`);
-                throw error;
-            }
-        }
-
-        async function runAESGCM() {
-            const resultDiv = document.getElementById('aes-result');
-            try {
-                logDebug('Starting AES-GCM encryption...');
-                const inputData = await getInputData();
-                const progressPromise = updateProgress('aes-progress', 'aes-status', 'aes-status-text', 1500);
-                
-                const result = await callPythonAPI('aes', inputData);
-                
-                await progressPromise;
-                
-                if (result.success) {
-                    cryptoResults.aes = result; // Store result for download
-                    setOperationComplete('aes-status', 'aes-status-text', true);
-                    resultDiv.innerHTML = `
-                        <div class="result-header">
-                            <strong>✓ AES-GCM Results:</strong>
-                            <button class="download-btn" onclick="downloadCryptoResult('aes')">📥 Download</button>
-                        </div>
-                        File: ${result.originalName} (${result.originalSize} bytes)<br>
-                        Encrypted Size: ${result.encryptedSize} bytes<br>
-                        IV: ${result.iv.substring(0, 16)}...<br>
-                        Time: ${result.encryptTime}ms<br>
-                        <span style="color: #4caf50;">Status: ✓ Encryption Successful</span>
-                    `;
-                } else {
-                    setOperationComplete('aes-status', 'aes-status-text', false);
-                    resultDiv.innerHTML = `<div class="error-message"><strong>AES-GCM Error:</strong> ${result.error}</div>`;
-                }
-            } catch (error) {
-                setOperationComplete('aes-status', 'aes-status-text', false);
-                resultDiv.innerHTML = `<div class="error-message"><strong>AES-GCM Error:</strong> ${error.message}</div>`;
-                logDebug(`AES-GCM Error: ${error.message}`);
-            }
-        }
-
-        async function runRSA() {
-            const resultDiv = document.getElementById('rsa-result');
-            try {
-                logDebug('Starting RSA-OAEP encryption...');
-                const inputData = await getInputData();
-                const progressPromise = updateProgress('rsa-progress', 'rsa-status', 'rsa-status-text', 2000);
-                
-                const result = await callPythonAPI('rsa', inputData);
-                
-                await progressPromise;
-                
-                if (result.success) {
-                    cryptoResults.rsa = result; // Store result for download
-                    setOperationComplete('rsa-status', 'rsa-status-text', true);
-                    resultDiv.innerHTML = `
-                        <div class="result-header">
-                            <strong>✓ RSA OAEP Results:</strong>
-                            <button class="download-btn" onclick="downloadCryptoResult('rsa')">📥 Download</button>
-                        </div>
-                        File: ${result.originalName} (${result.originalSize} bytes)<br>
-                        Encrypted Size: ${result.encryptedSize} bytes<br>
-                        Key Generation: ${result.keygenTime}ms<br>
-                        Key Size: 2048 bits<br>
-                        <span style="color: #4caf50;">Status: ✓ Encryption Successful</span>
-                    `;
-                } else {
-                    setOperationComplete('rsa-status', 'rsa-status-text', false);
-                    resultDiv.innerHTML = `<div class="error-message"><strong>RSA Error:</strong> ${result.error}</div>`;
-                }
-            } catch (error) {
-                setOperationComplete('rsa-status', 'rsa-status-text', false);
-                resultDiv.innerHTML = `<div class="error-message"><strong>RSA Error:</strong> ${error.message}</div>`;
-                logDebug(`RSA Error: ${error.message}`);
-            }
-        }
-
-        async function runECDH() {
-            const resultDiv = document.getElementById('ecdh-result');
-            try {
-                logDebug('Starting ECDH key exchange...');
-                const inputData = await getInputData();
-                const progressPromise = updateProgress('ecdh-progress', 'ecdh-status', 'ecdh-status-text', 1800);
-                
-                const result = await callPythonAPI('ecdh', inputData);
-                
-                await progressPromise;
-                
-                if (result.success) {
-                    cryptoResults.ecdh = result; // Store result for download
-                    setOperationComplete('ecdh-status', 'ecdh-status-text', true);
-                    resultDiv.innerHTML = `
-                        <div class="result-header">
-                            <strong>✓ ECDH Key Exchange Results:</strong>
-                            <button class="download-btn" onclick="downloadCryptoResult('ecdh')">📥 Download</button>
-                        </div>
-                        Key Agreement: ${result.keyAgreement ? '✓ Success' : '✗ Failed'}<br>
-                        Shared Key Length: ${result.sharedKeyLength} bytes<br>
-                        Curve: P-256 (SECP256R1)<br>
-                        Shared Key: ${result.sharedKey.substring(0, 32)}...<br>
-                        <span style="color: #4caf50;">Status: ✓ Key Exchange Successful</span>
-                    `;
-                } else {
-                    setOperationComplete('ecdh-status', 'ecdh-status-text', false);
-                    resultDiv.innerHTML = `<div class="error-message"><strong>ECDH Error:</strong> ${result.error}</div>`;
-                }
-            } catch (error) {
-                setOperationComplete('ecdh-status', 'ecdh-status-text', false);
-                resultDiv.innerHTML = `<div class="error-message"><strong>ECDH Error:</strong> ${error.message}</div>`;
-                logDebug(`ECDH Error: ${error.message}`);
-            }
-        }
-
-        async function runHashing() {
-            const resultDiv = document.getElementById('hash-result');
-            try {
-                logDebug('Starting SHA-256 hashing...');
-                const inputData = await getInputData();
-                const progressPromise = updateProgress('hash-progress', 'hash-status', 'hash-status-text', 1200);
-                
-                const result = await callPythonAPI('hash', inputData);
-                
-                await progressPromise;
-                
-                if (result.success) {
-                    cryptoResults.hash = result; // Store result for download
-                    setOperationComplete('hash-status', 'hash-status-text', true);
-                    resultDiv.innerHTML = `
-                        <div class="result-header">
-                            <strong>✓ SHA-256 Hash Results:</strong>
-                            <button class="download-btn" onclick="downloadCryptoResult('hash')">📥 Download</button>
-                        </div>
-                        File: ${result.originalName} (${result.originalSize} bytes)<br>
-                        Algorithm: SHA-256<br>
-                        Hash: ${result.hash}<br>
-                        Time: ${result.hashTime}ms<br>
-                        <span style="color: #4caf50;">Status: ✓ Hash Generated Successfully</span>
-                    `;
-                } else {
-                    setOperationComplete('hash-status', 'hash-status-text', false);
-                    resultDiv.innerHTML = `<div class="error-message"><strong>Hash Error:</strong> ${result.error}</div>`;
-                }
-            } catch (error) {
-                setOperationComplete('hash-status', 'hash-status-text', false);
-                resultDiv.innerHTML = `<div class="error-message"><strong>Hash Error:</strong> ${error.message}</div>`;
-                logDebug(`Hash Error: ${error.message}`);
-            }
-        }
-
-        function clearResults() {
-            // Clear stored results
-            cryptoResults = {
-                aes: null,
-                rsa: null,
-                ecdh: null,
-                hash: null
-            };
-            
-            // Clear all result divs
-            document.querySelectorAll('.result').forEach((result, index) => {
-                const operations = ['AES-GCM', 'RSA', 'ECDH', 'SHA-256'];
-                const messages = [
-                    'Click AES-GCM button to encrypt',
-                    'Click RSA button to encrypt (max 190 bytes)', 
-                    'Click ECDH button to perform key exchange',
-                    'Click Hash button to generate SHA-256'
-                ];
-                result.innerHTML = messages[index];
-            });
-            
-            // Reset progress bars
-            document.querySelectorAll('.progress-bar').forEach(bar => {
-                bar.style.width = '0%';
-            });
-            
-            // Reset status indicators
-            document.querySelectorAll('.status-indicator').forEach(indicator => {
-                indicator.className = 'status-indicator';
-            });
-            
-            // Reset status text
-            document.querySelectorAll('.status span').forEach(text => {
-                text.textContent = 'Ready';
-            });
-            
-            logDebug('All results cleared');
-        }
+def open_upload():
+    """Return (source, upload) for a raw or multipart request body; close upload, if any, when done."""
+    if request.mimetype != 'multipart/form-data':
+        return request.stream, None
+    # Parse outside of request.files so Flask does not close the
+    # spooled upload when the view returns, before streaming starts
+    _, _, files = parse_form_data(request.environ)
+    if 'file' not in files:
+        raise Exception("Multipart upload must include a 'file' field")
+    return files['file'].stream, files['file']
+
+def read_request(timer):
+    """Return (data, input_bytes) from a JSON or application/octet-stream request."""
+    return read_payload(request.mimetype, request.get_data(), request.headers.get('X-File-Name'), timer)
+
+def run_job(timer, operation, fn, *args):
+    """Run fn on its executor, booking the worker-reported time (last return value) as 'crypto'."""
+    with timer.stage('dispatch'):
+        result = executor.run(operation, fn, *args)
+    timer.carve('dispatch', 'crypto', result[-1])
+    return result
+
+def finish(timer, response, success=True):
+    """Record the request's stage timings and expose them in a Server-Timing header."""
+    timer.finish(success)
+    response.headers['Server-Timing'] = timer.server_timing()
+    log.info("Request timing", extra=event(sample=True, **timer.log_record()))
+    return response
 
-        async function runAllOperations() {
-            logDebug('Starting all cryptographic operations...');
-            clearResults();
-            
-            // Disable buttons during processing
-            document.querySelectorAll('.btn').forEach(btn => btn.disabled = true);
-            
-            try {
-                // Run operations sequentially with delays
-                await new Promise(resolve => {
-                    setTimeout(async () => {
-                        await runAESGCM();
-                        resolve();
-                    }, 200);
-                });
-                
-                await new Promise(resolve => {
-                    setTimeout(async () => {
-                        await runRSA();
-                        resolve();
-                    }, 800);
-                });
-                
-                await new Promise(resolve => {
-                    setTimeout(async () => {
-                        await runECDH();
-                        resolve();
-                    }, 1400);
-                });
-                
-                await new Promise(resolve => {
-                    setTimeout(async () => {
-                        await runHashing();
-                        resolve();
-                    }, 2000);
-                });
-                
-                logDebug('All operations completed successfully!');
-            } catch (error) {
-                logDebug(`Error in batch operations: ${error.message}`);
-            } finally {
-                // Re-enable buttons
-                document.querySelectorAll('.btn').forEach(btn => btn.disabled = false);
-            }
-        }
+def respond(timer, result, **blobs):
+    """Answer in the format the client negotiated through its Accept header."""
+    body, content_type, headers = render_result(result, blobs, request.headers.get('Accept'), timer)
+    return finish(timer, Response(body, content_type=content_type, headers=headers))
 
-        // Initialize
-        document.addEventListener('DOMContentLoaded', () => {
-            switchInputMode();
-            logDebug('Crypto tool initialized and ready');
-        });
-    </script>
-</body>
-</html>
-'''
+def fail(timer, error):
+    log.error("Request failed", extra=event(timer.endpoint, error=str(error)))
+    return finish(timer, jsonify({'success': False, 'error': str(error)}), success=False)
 
 @app.route('/')
 def index():
@@ -982,177 +75,425 @@ def index():
 
 @app.route('/api/aes', methods=['POST'])
 def aes_encrypt():
+    timer = RequestTimer('aes')
     try:
-        data = request.json
-        print(f"[AES] API called with data type: {data.get('type', 'unknown')}, size: {data.get('size', 'unknown')}")
-        
-        input_text = data['data']
-        
-        # Convert input to bytes
-        if data['type'] == 'text':
-            input_bytes = input_text.encode('utf-8')
-        else:
-            # Handle base64 encoded file data
-            if ',' in input_text:
-                input_bytes = base64.b64decode(input_text.split(',')[1])
-            else:
-                input_bytes = base64.b64decode(input_text)
+        data, input_bytes = read_request(timer)
+        log.debug("API called", extra=event('aes', type=data.get('type'), size=data.get('size')))
         
         # AES-GCM encryption
-        key = secrets.token_bytes(32)  # 256-bit key
-        iv = secrets.token_bytes(12)   # 96-bit IV for GCM
+        with timer.stage('keygen'):
+            key = key_generator.generate_aes_key(32)  # 256-bit key
+            iv = key_generator.generate_iv(config.GCM_IV_SIZE)
         
-        cipher = Cipher(algorithms.AES(key), modes.GCM(iv), backend=default_backend())
-        encryptor = cipher.encryptor()
-        
-        start_time = time.time()
-        encrypted_data = encryptor.update(input_bytes) + encryptor.finalize()
-        encrypt_time = (time.time() - start_time) * 1000  # Convert to ms
+        encrypted_data, tag, encrypt_time = run_job(timer, 'aes', operations.aes_gcm_encrypt, input_bytes, key, iv)
         
         result = {
             'success': True,
             'originalName': data['name'],
             'originalSize': data['size'],
             'encryptedSize': len(encrypted_data),
+            'key': key.hex(),
             'iv': iv.hex(),
-            'encryptTime': f"{encrypt_time:.2f}",
-            'encrypted': base64.b64encode(encrypted_data).decode('utf-8')
+            'tag': tag.hex(),
+            'encryptTime': f"{encrypt_time:.3f}"
         }
         
-        print(f"[AES] Encryption successful: {len(input_bytes)} -> {len(encrypted_data)} bytes")
-        return jsonify(result)
+        log.info("Encryption successful", extra=event('aes', sample=True, inputSize=len(input_bytes), outputSize=len(encrypted_data)))
+        return respond(timer, result, encrypted=encrypted_data)
         
     except Exception as e:
-        print(f"[AES] Error: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)})
+        return fail(timer, e)
+
+@app.route('/api/aes/stream', methods=['POST'])
+def aes_encrypt_stream():
+    """Encrypt a raw (octet-stream or multipart) request body with AES-GCM in chunks.
+
+    The ciphertext is streamed back as it is produced and the 16-byte GCM tag
+    is appended as the last bytes of the body. Key and IV travel in headers;
+    a client may supply its own key as hex in X-AES-Key. Like
+    /api/aes/decrypt, the timer stops when the headers go out; the streamed
+    encryption itself is logged by the generator.
+    """
+    timer = RequestTimer('aes/stream')
+    try:
+        log.debug("API called", extra=event('aes/stream', contentType=request.mimetype, length=request.content_length))
+
+        with timer.stage('parse'):
+            source, upload = open_upload()
+        with timer.stage('keygen'):
+            key = request_key(request.headers.get('X-AES-Key'), generate=True)
+            iv = key_generator.generate_iv(config.GCM_IV_SIZE)
+
+        def generate():
+            total = 0
+            start_time = time.time()
+            try:
+                for chunk in gcm.encrypt_stream(iter_chunks(source, config.STREAM_CHUNK_SIZE), key, iv):
+                    total += len(chunk)
+                    yield chunk
+            finally:
+                if upload is not None:
+                    upload.close()
+            encrypt_time = (time.time() - start_time) * 1000
+            log.info("Encryption successful", extra=event('aes/stream', sample=True, outputSize=total, encryptMs=round(encrypt_time, 3)))
+
+        headers = {
+            'X-AES-Key': key.hex(),
+            'X-AES-IV': iv.hex(),
+            'X-AES-Tag-Length': str(config.GCM_TAG_SIZE),
+        }
+        return finish(timer, Response(stream_with_context(generate()), mimetype='application/octet-stream', headers=headers))
+
+    except Exception as e:
+        return fail(timer, e)
+
+@app.route('/api/aes/decrypt', methods=['POST'])
+def aes_decrypt_stream():
+    """Decrypt a raw (octet-stream or multipart) AES-GCM body in chunks and verify its tag.
+
+    Key and IV come in X-AES-Key and X-AES-IV; the tag in X-AES-Tag or, as
+    /api/aes/stream produces it, as the last 16 bytes of the body. Plaintext
+    is spooled and only streamed back once the tag has verified, so a
+    tampered upload never releases a byte.
+    """
+    timer = RequestTimer('aes/decrypt')
+    spool = upload = None
+    try:
+        log.debug("API called", extra=event('aes/decrypt', contentType=request.mimetype, length=request.content_length))
+        key, iv, tag = decrypt_params(request.headers)
+        source, upload = open_upload()
+        spool = DecryptSpool(key, iv, tag)
+        with timer.stage('crypto'):
+            for chunk in iter_chunks(source, config.STREAM_CHUNK_SIZE):
+                spool.write(chunk)
+            plaintext = spool.verify()
+    except InvalidTag:
+        if spool is not None:
+            spool.close()
+        log.warning("Decryption failed authentication", extra=event('aes/decrypt'))
+        return finish(timer, jsonify({'success': False, 'error': AUTHENTICATION_FAILED}), success=False)
+    except Exception as e:
+        if spool is not None:
+            spool.close()
+        return fail(timer, e)
+    finally:
+        if upload is not None:
+            upload.close()
+
+    def generate():
+        with plaintext:
+            yield from iter_chunks(plaintext, config.STREAM_CHUNK_SIZE)
+
+    log.info("Decryption successful", extra=event('aes/decrypt', sample=True, outputSize=spool.size))
+    headers = {'Content-Length': str(spool.size)}
+    return finish(timer, Response(generate(), mimetype='application/octet-stream', headers=headers))
 
 @app.route('/api/rsa', methods=['POST'])
 def rsa_encrypt():
+    """Encrypt with RSA-OAEP, or seal a hybrid envelope that /api/rsa/unseal opens.
+
+    A hybrid envelope is always sealed to a stored key and its keyId is
+    returned; without a keyId in the payload or query a pooled key is
+    stored for it. A raw body answered as octet-stream is sealed chunk by
+    chunk as it is read, so neither it nor the envelope is ever buffered.
+    """
+    timer = RequestTimer('rsa')
     try:
-        data = request.json
-        print(f"[RSA] API called with data type: {data.get('type', 'unknown')}, size: {data.get('size', 'unknown')}")
+        streamable = (request.mimetype == wire.OCTET_STREAM and request.content_length is not None
+                      and wire.negotiate(request.headers.get('Accept')) == wire.OCTET_STREAM)
+        if streamable:
+            data, input_bytes = upload_info(request.headers.get('X-File-Name'), request.content_length), None
+        else:
+            data, input_bytes = read_request(timer)
+        # Query args fill in fields a raw body cannot carry, e.g. /api/rsa?mode=hybrid&keyId=...
+        data = {**request.args.to_dict(), **data}
+        input_size = data['size'] if input_bytes is None else len(input_bytes)
+        log.debug("API called", extra=event('rsa', type=data.get('type'), size=data.get('size')))
         
-        input_text = data['data']
+        # Payloads past the OAEP limit go into a hybrid envelope
+        key_id = data.get('keyId')
+        key_size = rsa_key_size(data)
+        mode = rsa_mode(data, input_size, key_size)
         
-        # Convert input to bytes
-        if data['type'] == 'text':
-            input_bytes = input_text.encode('utf-8')
-        else:
-            if ',' in input_text:
-                input_bytes = base64.b64decode(input_text.split(',')[1])
+        # Use the stored key named by keyId, or take a pre-generated key pair from the pool
+        with timer.stage('keygen'):
+            if mode == 'hybrid':
+                private_key, key_id, pool_hit = rsa_seal_key(key_size, key_id)
             else:
-                input_bytes = base64.b64decode(input_text)
+                private_key, pool_hit = rsa_private_key(key_size, key_id)
+            public_key = private_key.public_key()
+        keygen_time = timer.stages_ns['keygen'] / 1_000_000
         
-        # Check size limitation
-        if len(input_bytes) > 190:
-            raise Exception(f"RSA-2048 can only encrypt up to 190 bytes. Your input is {len(input_bytes)} bytes.")
+        result = {
+            'success': True,
+            'originalName': data['name'],
+            'originalSize': data['size'],
+            'encryptedSize': hybrid.envelope_size(input_size, key_size) if mode == 'hybrid' else key_size // 8,
+            'mode': mode,
+            'keySize': key_size,
+            'keyId': key_id,
+            'keygenTime': f"{keygen_time:.3f}",
+            'keyPoolHit': pool_hit
+        }
         
-        # Generate RSA key pair
-        keygen_start = time.time()
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
-        )
-        public_key = private_key.public_key()
-        keygen_time = (time.time() - keygen_start) * 1000
+        if mode == 'hybrid' and streamable:
+            return seal_upload(timer, result, public_key)
+        if input_bytes is None:
+            input_bytes = request.get_data()
         
         # Encrypt
-        encrypted_data = public_key.encrypt(
-            input_bytes,
-            padding.OAEP(
-                mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
+        with timer.stage('crypto'):
+            if mode == 'hybrid':
+                encrypted_data = hybrid.seal(public_key, input_bytes)
+            else:
+                encrypted_data = hybrid.oaep_encrypt(public_key, input_bytes)
+        
+        log.info("Encryption successful", extra=event('rsa', sample=True, inputSize=len(input_bytes), outputSize=len(encrypted_data)))
+        return respond(timer, result, encrypted=encrypted_data)
         
+    except Exception as e:
+        return fail(timer, e)
+
+def seal_upload(timer, result, public_key):
+    """Stream the request body back as a hybrid envelope; the clock stops when the headers go out."""
+
+    def generate():
+        start_time = time.time()
+        for chunk in hybrid.seal_stream(public_key, iter_chunks(request.stream, config.STREAM_CHUNK_SIZE)):
+            yield chunk
+        encrypt_time = (time.time() - start_time) * 1000
+        log.info("Encryption successful", extra=event('rsa', sample=True, inputSize=result['originalSize'], outputSize=result['encryptedSize'],
+                                                      encryptMs=round(encrypt_time, 3)))
+
+    headers = {**wire.metadata_headers(result), 'Content-Length': str(result['encryptedSize'])}
+    return finish(timer, Response(stream_with_context(generate()), mimetype=wire.OCTET_STREAM, headers=headers))
+
+@app.route('/api/rsa/unseal', methods=['POST'])
+def rsa_unseal():
+    """Open a hybrid envelope from /api/rsa with the stored key named by keyId (payload or query)."""
+    timer = RequestTimer('rsa/unseal')
+    try:
+        data, envelope = read_request(timer)
+        data = {**request.args.to_dict(), **data}
+        log.debug("API called", extra=event('rsa/unseal', type=data.get('type'), size=data.get('size')))
+
+        with timer.stage('keygen'):
+            private_key = rsa_unseal_key(data)
+        with timer.stage('crypto'):
+            plaintext = hybrid.unseal(private_key, envelope)
+
         result = {
             'success': True,
             'originalName': data['name'],
             'originalSize': data['size'],
-            'encryptedSize': len(encrypted_data),
-            'keygenTime': f"{keygen_time:.0f}",
-            'encrypted': base64.b64encode(encrypted_data).decode('utf-8')
+            'decryptedSize': len(plaintext),
+            'keyId': data['keyId']
         }
-        
-        print(f"[RSA] Encryption successful: {len(input_bytes)} -> {len(encrypted_data)} bytes")
-        return jsonify(result)
-        
+
+        log.info("Decryption successful", extra=event('rsa/unseal', sample=True, inputSize=len(envelope), outputSize=len(plaintext)))
+        return respond(timer, result, decrypted=plaintext)
+
+    except InvalidTag:
+        log.warning("Decryption failed authentication", extra=event('rsa/unseal'))
+        return finish(timer, jsonify({'success': False, 'error': AUTHENTICATION_FAILED}), success=False)
     except Exception as e:
-        print(f"[RSA] Error: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)})
+        return fail(timer, e)
+
+@app.route('/api/rsa/pool', methods=['GET'])
+def rsa_pool_stats():
+    timer = RequestTimer('rsa/pool')
+    return finish(timer, jsonify({'success': True, **rsa_key_pool.stats()}))
 
 @app.route('/api/ecdh', methods=['POST'])
 def ecdh_exchange():
+    timer = RequestTimer('ecdh')
     try:
-        data = request.json
-        print(f"[ECDH] API called with data type: {data.get('type', 'unknown')}")
-        
-        # Generate ECDH key pairs for Alice and Bob
-        alice_private_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
-        alice_public_key = alice_private_key.public_key()
-        
-        bob_private_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
-        bob_public_key = bob_private_key.public_key()
+        with timer.stage('parse'):
+            data = request.get_json(silent=True) or {}
+        log.debug("API called", extra=event('ecdh', curve=data.get('curve'), peers=len(data.get('peerPublicKeys') or [])))
         
-        # Perform key exchange
-        alice_shared_key = alice_private_key.exchange(ec.ECDH(), bob_public_key)
-        bob_shared_key = bob_private_key.exchange(ec.ECDH(), alice_public_key)
+        # Agree against the static server key; repeat peers come from the session key cache
+        with timer.stage('crypto'):
+            result, blobs = ecdh_agreement(data)
         
-        # Verify keys are the same
-        keys_equal = alice_shared_key == bob_shared_key
-        
-        result = {
-            'success': True,
-            'keyAgreement': keys_equal,
-            'sharedKeyLength': len(alice_shared_key),
-            'sharedKey': alice_shared_key.hex()
-        }
-        
-        print(f"[ECDH] Key exchange successful: {len(alice_shared_key)} byte shared key")
-        return jsonify(result)
+        log.info("Key exchange successful", extra=event('ecdh', sample=True, curve=result['curve'], keyId=result['keyId']))
+        return respond(timer, result, **blobs)
         
     except Exception as e:
-        print(f"[ECDH] Error: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)})
+        return fail(timer, e)
+
+@app.route('/api/ecdh/key', methods=['GET'])
+def ecdh_server_key():
+    """The static public key clients agree with, for ?curve=x25519 (default) or p256."""
+    timer = RequestTimer('ecdh/key')
+    try:
+        engine = ecdh_engine(request.args.get('curve'))
+        # current() generates the next static key when the old one is due for rotation
+        with timer.stage('keygen'):
+            described = engine.current().describe(engine.rotation_seconds)
+        return finish(timer, jsonify({'success': True, **described}))
+    except Exception as e:
+        return fail(timer, e)
 
 @app.route('/api/hash', methods=['POST'])
 def hash_data():
+    timer = RequestTimer('hash')
     try:
-        data = request.json
-        print(f"[HASH] API called with data type: {data.get('type', 'unknown')}, size: {data.get('size', 'unknown')}")
-        
-        input_text = data['data']
+        data, sent = parse_payload(request.mimetype, request.get_data(), request.headers.get('X-File-Name'), timer)
+        log.debug("API called", extra=event('hash', type=data.get('type'), size=data.get('size')))
         
-        # Convert input to bytes
-        if data['type'] == 'text':
-            input_bytes = input_text.encode('utf-8')
+        mode, leaf_size, algorithms = hash_options(data, request.args)
+        # Repeat multi-digest or base64 inputs are answered by content address, without decoding them again
+        with timer.stage('cache'):
+            cache_key = hash_cache_key(data, sent, mode, leaf_size, algorithms)
+            blobs = hash_cache.get(cache_key) if cache_key else None
+        if blobs is not None:
+            result = hash_result(data, mode, leaf_size, algorithms, blobs, timer.stages_ns['cache'] / 1_000_000, cached=True)
         else:
-            if ',' in input_text:
-                input_bytes = base64.b64decode(input_text.split(',')[1])
-            else:
-                input_bytes = base64.b64decode(input_text)
+            with timer.stage('decode'):
+                input_bytes = payload_bytes(data, sent)
+            # sha256, a Merkle root plus leaf manifest (tree) or every requested digest in one pass (multi)
+            blobs, throughput, hash_time = run_job(timer, 'hash', operations.hash_outputs, input_bytes, mode, leaf_size, algorithms)
+            if cache_key:
+                hash_cache.put(cache_key, blobs)
+            result = hash_result(data, mode, leaf_size, algorithms, blobs, hash_time, throughput)
         
-        # Hash the data
-        start_time = time.time()
-        hash_digest = hashlib.sha256(input_bytes).hexdigest()
-        hash_time = (time.time() - start_time) * 1000
+        log.info("Hash successful", extra=event('hash', sample=True, inputSize=data['size'], mode=mode, cached=result['cached'],
+                                                  algorithm=','.join(algorithms) if algorithms else 'SHA-256'))
+        return respond(timer, result, **blobs)
         
-        result = {
-            'success': True,
-            'originalName': data['name'],
-            'originalSize': data['size'],
-            'hash': hash_digest,
-            'hashTime': f"{hash_time:.2f}"
-        }
+    except Exception as e:
+        return fail(timer, e)
+
+@app.route('/api/hash/cache', methods=['GET'])
+def hash_cache_stats():
+    timer = RequestTimer('hash/cache')
+    return finish(timer, jsonify({'success': True, **hash_cache.stats()}))
+
+@app.route('/api/batch', methods=['POST'])
+def batch_process():
+    """Run many aes/hash/rsa/ecdh items in one request, sharing key material across them."""
+    timer = RequestTimer('batch')
+    try:
+        with timer.stage('parse'):
+            data = request.json
+        with timer.stage('decode'):
+            items = parse_batch(data)
+        log.debug("API called", extra=event('batch', items=len(items)))
+        
+        key_size = rsa_key_size(data)
+        with timer.stage('keygen'):
+            rsa_public_der, pool_hit = batch_rsa_key(items, key_size, data.get('keyId'))
+            aes_key = key_generator.generate_aes_key(32)
+        
+        # The whole batch is a single executor job
+        results, batch_time = run_job(timer, 'batch', batch.run_batch, items, aes_key, rsa_public_der)
         
-        print(f"[HASH] Hash successful: {len(input_bytes)} bytes -> SHA-256")
-        return jsonify(result)
+        with timer.stage('encode'):
+            result = batch_result(results, batch_time, pool_hit, aes_key)
+        result['timings'] = timer.stages_ms()
+        log.info("Batch complete", extra=event('batch', sample=True, succeeded=result['succeeded'], items=result['itemCount'], batchMs=round(batch_time, 3)))
+        with timer.stage('serialize'):
+            response = jsonify(result)
+        return finish(timer, response)
         
     except Exception as e:
-        print(f"[HASH] Error: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)})
+        return fail(timer, e)
+
+@app.route('/api/objects', methods=['POST'])
+def object_upload():
+    """Store a raw request body as an encrypted, range-readable object.
+
+    The key (X-AES-Key, or a fresh one) is returned and never kept; reads
+    must present it again.
+    """
+    timer = RequestTimer('objects')
+    try:
+        log.debug("API called", extra=event('objects', contentType=request.mimetype, length=request.content_length))
+        key = request_key(request.headers.get('X-AES-Key'), generate=True)
+        with timer.stage('crypto'):
+            stored = object_store.put(request.stream, key)
+        log.info("Object stored", extra=event('objects', sample=True, objectId=stored['objectId'], size=stored['size']))
+        return finish(timer, jsonify({'success': True, **stored, 'key': key.hex()}))
+    except Exception as e:
+        return fail(timer, e)
+
+@app.route('/api/objects/<object_id>', methods=['GET'])
+def object_read(object_id):
+    """Decrypt an object, or just the part named by a Range header, segment by segment."""
+    timer = RequestTimer('objects/read')
+    stream = None
+    try:
+        with timer.stage('parse'):
+            key = request_key(request.headers.get('X-AES-Key'))
+            stream = object_store.open(object_id)
+            size = object_store.size(stream)
+            byte_range = parse_range(request.headers.get('Range'), size)
+            start, end = byte_range or (0, size)
+        with timer.stage('crypto'):
+            chunks = segmented.iter_range(stream, key, start, end)
+            # Open the first segment now so a wrong key fails before any headers go out
+            first = next(chunks, b'')
+        log.info("Object read", extra=event('objects', sample=True, objectId=object_id, start=start, end=end))
+
+        def generate(source):
+            try:
+                yield first
+                yield from chunks
+            finally:
+                source.close()
+
+        headers = range_headers(start, end, size, byte_range is not None)
+        response = Response(generate(stream), status=206 if byte_range else 200, mimetype='application/octet-stream', headers=headers)
+        stream = None
+        return finish(timer, response)
+    except ObjectNotFound as e:
+        return finish(timer, jsonify({'success': False, 'error': str(e)}), success=False), 404
+    except RangeNotSatisfiable as e:
+        return finish(timer, jsonify({'success': False, 'error': str(e)}), success=False), 416, {'Content-Range': f"bytes */{size}"}
+    except InvalidTag:
+        log.warning("Object failed authentication", extra=event('objects', objectId=object_id))
+        return finish(timer, jsonify({'success': False, 'error': "Object failed authentication: wrong key or corrupted data"}), success=False)
+    except Exception as e:
+        return fail(timer, e)
+    finally:
+        if stream is not None:
+            stream.close()
+
+@app.route('/api/keys', methods=['GET', 'POST'])
+def stored_keys():
+    """POST {"kind": "rsa-2048"|...|"x25519"} stores a new private key; GET lists the stored key ids."""
+    timer = RequestTimer('keys')
+    try:
+        if request.method == 'POST':
+            with timer.stage('parse'):
+                data = request.get_json(silent=True) or {}
+            with timer.stage('keygen'):
+                stored = create_stored_key(data.get('kind', f"rsa-{config.RSA_KEY_SIZE}"))
+            log.info("Key stored", extra=event('keys', sample=True, keyId=stored['keyId'], kind=stored['kind']))
+            return finish(timer, jsonify({'success': True, **stored}))
+        return finish(timer, jsonify({'success': True, 'keyIds': keystore.ids(), **keystore.stats()}))
+    except Exception as e:
+        return fail(timer, e)
+
+@app.route('/api/keys/<key_id>', methods=['GET', 'DELETE'])
+def stored_key(key_id):
+    """Describe a stored key (kind and public key), or DELETE it."""
+    timer = RequestTimer('keys')
+    try:
+        if request.method == 'DELETE':
+            keystore.delete(key_id)
+            log.info("Key deleted", extra=event('keys', keyId=key_id))
+            return finish(timer, jsonify({'success': True, 'keyId': key_id, 'deleted': True}))
+        return finish(timer, jsonify({'success': True, **keystore.describe(key_id)}))
+    except KeyNotFound as e:
+        return finish(timer, jsonify({'success': False, 'error': str(e)}), success=False), 404
+    except Exception as e:
+        return fail(timer, e)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # Add a test endpoint to verify server is working
 @app.route('/api/test', methods=['GET'])
@@ -1161,7 +502,8 @@ def test_api():
         'success': True,
         'message': 'API is working',
         'timestamp': time.time(),
-        'endpoints': ['aes', 'rsa', 'ecdh', 'hash']
+        'endpoints': ['aes', 'aes/stream', 'aes/decrypt', 'rsa', 'rsa/unseal', 'rsa/pool', 'ecdh', 'ecdh/key', 'hash', 'hash/cache', 'batch', 'objects', 'keys'],
+        'executors': executor.stats()
     })
 
 if __name__ == '__main__':
@@ -1171,10 +513,12 @@ if __name__ == '__main__':
     print("Features enabled:")
     print("  ✓ AES-GCM 256-bit encryption")
     print("  ✓ RSA-OAEP 2048-bit encryption")
-    print("  ✓ ECDH P-256 key exchange")
+    print("  ✓ ECDH (X25519, P-256) against static server keys")
     print("  ✓ SHA-256 hashing")
-    print("  ✓ Debug logging enabled")
+    print("  ✓ Structured JSON logging enabled")
     print("=" * 60)
+    print("Warming RSA key pool...")
+    rsa_key_pool.start()
     print("Server starting...")
     print("Open your browser and go to: http://localhost:5000")
     print("Test API endpoint: http://localhost:5000/api/test")
@@ -1,21 +1,26 @@
-from crypto_tool.algorithms import aes
-from crypto_tool.utils import key_generator
-from crypto_tool import config
-from crypto_tool.simulation.simulator import run_simulation
-from crypto_tool.simulation.gui_simulator import AESGuiSimulator
-import tkinter as tk
+import sys
+
+# tkinter, the simulators and cryptography are imported inside main() so
+# that 'main.py <command>' hands over to the CLI without loading any of them
 
 def main():
     choice = input("Choose mode:\n1. Command-line Simulation\n2. GUI Simulation\nEnter 1 or 2: ")
 
     if choice == "2":
         # Run GUI simulation
+        import tkinter as tk
+        from crypto_tool.simulation.gui_simulator import AESGuiSimulator
         root = tk.Tk()
         gui = AESGuiSimulator(root)
         root.mainloop()
         return
 
     # Command-line simulation
+    from crypto_tool import config
+    from crypto_tool.algorithms import aes
+    from crypto_tool.simulation.simulator import run_simulation
+    from crypto_tool.utils import key_generator
+
     text_input = input("Enter text to encrypt: ")
     plaintext = text_input.encode()
 
@@ -35,4 +40,8 @@ def main():
     run_simulation(plaintext, key, iv)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Arguments mean the non-interactive CLI
+        from crypto_tool.cli import main as cli_main
+        sys.exit(cli_main())
     main()
@@ -0,0 +1,206 @@
+"""Encrypt and decrypt whole directory trees in parallel, resumably.
+
+Every file under the source directory is encrypted with
+algorithms.file_crypto into the same relative path under the destination,
+plus ENCRYPTED_SUFFIX, on a process pool. Each finished file is appended to a
+JSON-lines manifest in the destination (path, size, mtime, digest, nonce and
+the key's fingerprint), so an interrupted run picks up where it stopped and
+files that are unchanged and already encrypted under the same key are
+skipped on the next one. decrypt_tree reverses this for every .enc file.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from crypto_tool import config
+from crypto_tool.algorithms import file_crypto
+from crypto_tool.utils.file_handler import atomic_write
+
+MANIFEST_NAME = '.crypto_tool_manifest.jsonl'
+ENCRYPTED_SUFFIX = '.enc'
+
+_FINGERPRINT_LABEL = b'crypto_tool bulk key fingerprint\n'
+
+def key_fingerprint(key: bytes) -> str:
+    """Short hex id of a key, safe to store next to the files it encrypted."""
+    return hashlib.sha256(_FINGERPRINT_LABEL + key).hexdigest()[:32]
+
+def load_manifest(path: str) -> dict:
+    """Read a manifest into {relative path: entry}; later lines win, a torn last line is ignored."""
+    entries = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[entry['path']] = entry
+    except FileNotFoundError:
+        pass
+    return entries
+
+def save_manifest(path: str, entries: dict):
+    """Rewrite the manifest atomically with one line per file."""
+    with atomic_write(path) as f:
+        for rel in sorted(entries):
+            f.write((json.dumps(entries[rel], sort_keys=True) + '\n').encode('utf-8'))
+
+def walk(src_dir: str, skip_dir: str = None):
+    """Yield (relative path, size, mtime_ns) for every regular file under src_dir."""
+    skip_dir = os.path.abspath(skip_dir) if skip_dir else None
+    for root, dirs, files in os.walk(src_dir):
+        # Never descend into the output tree when it lives inside the source
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != skip_dir)
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if os.path.isfile(path) and not os.path.islink(path):
+                stat = os.stat(path)
+                yield os.path.relpath(path, src_dir), stat.st_size, stat.st_mtime_ns
+
+def _encrypt_one(src: str, dst: str, key: bytes, rel: str, size: int, mtime_ns: int) -> dict:
+    """Worker: encrypt one file and return its manifest entry."""
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    stats = file_crypto.encrypt_file(src, dst, key, digest='sha256')
+    return {
+        'path': rel,
+        'size': size,
+        'mtime': mtime_ns,
+        'digest': stats['digest'],
+        'nonce': stats['iv'],
+        'key': key_fingerprint(key),
+        'latencyMs': stats['elapsedMs']
+    }
+
+def _decrypt_one(src: str, dst: str, key: bytes, rel: str) -> dict:
+    """Worker: decrypt one file and return {'path', 'size', 'latencyMs'}."""
+    from cryptography.exceptions import InvalidTag
+    os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    try:
+        stats = file_crypto.decrypt_file(src, dst, key)
+    except InvalidTag:
+        raise ValueError("Authentication failed: wrong key or corrupted file")
+    return {'path': rel, 'size': stats['bytes'], 'latencyMs': stats['elapsedMs']}
+
+def _percentile(values, fraction: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def _run(jobs: list, worker, workers: int, on_file, on_done=None) -> dict:
+    """Run worker(*job) for every job on a process pool; return the run summary.
+
+    Each job's fourth field is its relative path. on_done, if given, sees
+    each finished entry before on_file does.
+    """
+    start_ns = time.perf_counter_ns()
+    done, failures, latencies, total_bytes = [], [], [], 0
+    workers = workers or config.EXECUTOR_WORKERS
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending, queue = {}, list(reversed(jobs))
+        while queue or pending:
+            # Keep a bounded window in flight so huge trees do not pile up futures
+            while queue and len(pending) < workers * 4:
+                job = queue.pop()
+                pending[pool.submit(worker, *job)] = job[3]
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                rel = pending.pop(future)
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    failure = {'path': rel, 'error': str(e)}
+                    failures.append(failure)
+                    if on_file is not None:
+                        on_file(failure)
+                    continue
+                if on_done is not None:
+                    on_done(entry)
+                done.append(rel)
+                latencies.append(entry['latencyMs'])
+                total_bytes += entry['size']
+                if on_file is not None:
+                    on_file(entry)
+    elapsed_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+    return {
+        'done': len(done),
+        'failed': len(failures),
+        'failures': failures,
+        'bytes': total_bytes,
+        'elapsedMs': round(elapsed_ms, 3),
+        'mbPerS': round(total_bytes / 1_000_000 / (elapsed_ms / 1000), 1) if elapsed_ms else None,
+        'filesPerS': round(len(done) / (elapsed_ms / 1000), 1) if elapsed_ms else None,
+        'latencyMs': {
+            'p50': _percentile(latencies, 0.50),
+            'p95': _percentile(latencies, 0.95),
+            'max': max(latencies) if latencies else None
+        }
+    }
+
+def encrypt_tree(src_dir: str, dst_dir: str, key: bytes, workers: int = None, on_file=None) -> dict:
+    """Encrypt every changed file under src_dir into dst_dir; return a run summary.
+
+    A file counts as changed when its size or mtime differs from the
+    manifest, its .enc file is gone, or it was encrypted under another key.
+    on_file, if given, is called with each finished entry (or {'path', 'error'}
+    for a failure) as results come in.
+    """
+    if not os.path.isdir(src_dir):
+        raise NotADirectoryError(f"{src_dir} is not a directory")
+    os.makedirs(dst_dir, exist_ok=True)
+    manifest_path = os.path.join(dst_dir, MANIFEST_NAME)
+    entries = load_manifest(manifest_path)
+    fingerprint = key_fingerprint(key)
+    todo, skipped = [], 0
+    for rel, size, mtime_ns in walk(src_dir, skip_dir=dst_dir):
+        dst = os.path.join(dst_dir, rel + ENCRYPTED_SUFFIX)
+        known = entries.get(rel)
+        if (known and known['size'] == size and known['mtime'] == mtime_ns and known.get('key') == fingerprint
+                and os.path.exists(dst)):
+            skipped += 1
+            continue
+        todo.append((os.path.join(src_dir, rel), dst, key, rel, size, mtime_ns))
+
+    with open(manifest_path, 'a', encoding='utf-8') as journal:
+        def record(entry):
+            entries[entry['path']] = entry
+            journal.write(json.dumps(entry, sort_keys=True) + '\n')
+            journal.flush()
+
+        summary = _run(todo, _encrypt_one, workers, on_file, on_done=record)
+    # Compact the journal now that the run is over
+    save_manifest(manifest_path, entries)
+    return {'encrypted': summary.pop('done'), 'skipped': skipped, **summary}
+
+def decrypt_tree(src_dir: str, dst_dir: str, key: bytes, workers: int = None, on_file=None) -> dict:
+    """Decrypt every .enc file under src_dir (an encrypt_tree destination) into dst_dir.
+
+    Each file's GCM tag is checked before its plaintext replaces the
+    destination. When src_dir's manifest says a file was encrypted under a
+    different key it is reported as failed without being read.
+    """
+    if not os.path.isdir(src_dir):
+        raise NotADirectoryError(f"{src_dir} is not a directory")
+    os.makedirs(dst_dir, exist_ok=True)
+    entries = load_manifest(os.path.join(src_dir, MANIFEST_NAME))
+    fingerprint = key_fingerprint(key)
+    todo, failures = [], []
+    for rel, _, _ in walk(src_dir, skip_dir=dst_dir):
+        if not rel.endswith(ENCRYPTED_SUFFIX):
+            continue
+        plain_rel = rel[:-len(ENCRYPTED_SUFFIX)]
+        known = entries.get(plain_rel)
+        if known and known.get('key', fingerprint) != fingerprint:
+            failure = {'path': plain_rel, 'error': "Encrypted under a different key"}
+            failures.append(failure)
+            if on_file is not None:
+                on_file(failure)
+            continue
+        todo.append((os.path.join(src_dir, rel), os.path.join(dst_dir, plain_rel), key, plain_rel))
+
+    summary = _run(todo, _decrypt_one, workers, on_file)
+    summary['failures'] = failures + summary['failures']
+    summary['failed'] = len(summary['failures'])
+    return {'decrypted': summary.pop('done'), **summary}
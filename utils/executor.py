@@ -0,0 +1,137 @@
+"""Pluggable executors for CPU-bound crypto work.
+
+Each operation name (aes, rsa, ecdh, hash) maps to a backend in
+config.EXECUTOR_BACKENDS. Backends are created lazily and shared, so a
+process pool is only spun up if something is actually routed to it.
+"""
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from crypto_tool import config
+
+class ExecutorBusy(Exception):
+    """Raised when a backend already has its maximum number of pending jobs."""
+
+class JobTimeout(Exception):
+    """Raised when a job does not finish within its timeout."""
+
+class _InlineExecutor:
+    """Runs jobs on the calling thread; useful for debugging and tiny workloads."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+class CryptoExecutor(Executor):
+    """Wraps a thread or process pool with a queue-depth limit and per-job timeout.
+
+    Being a concurrent.futures.Executor it can be handed straight to
+    asyncio's loop.run_in_executor().
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = None, max_pending: int = 64, timeout: float = 30.0):
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=max_workers)
+        elif kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crypto")
+        elif kind == "inline":
+            self._pool = _InlineExecutor()
+        else:
+            raise ValueError(f"Unknown executor backend: {kind}")
+        self.kind = kind
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ExecutorBusy(f"{self.kind} executor is at its limit of {self.max_pending} pending jobs")
+        with self._lock:
+            self.pending += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, fn, *args, timeout: float = None):
+        """Submit a job and wait for its result."""
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise JobTimeout(f"{getattr(fn, '__name__', 'job')} did not finish within {timeout}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'backend': self.kind,
+                'pending': self.pending,
+                'maxPending': self.max_pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timedOut': self.timed_out,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+    def _release(self, _future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+        self._slots.release()
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def get_executor(operation: str) -> CryptoExecutor:
+    """Return the shared executor configured for an operation name."""
+    kind = config.EXECUTOR_BACKENDS.get(operation, "inline")
+    with _executors_lock:
+        executor = _executors.get(kind)
+        if executor is None:
+            executor = CryptoExecutor(
+                kind,
+                max_workers=config.EXECUTOR_WORKERS,
+                max_pending=config.EXECUTOR_MAX_PENDING,
+                timeout=config.EXECUTOR_TIMEOUT
+            )
+            _executors[kind] = executor
+        return executor
+
+def run(operation: str, fn, *args, timeout: float = None):
+    """Run fn(*args) on the backend configured for operation and return its result."""
+    return get_executor(operation).run(fn, *args, timeout=timeout)
+
+def stats() -> dict:
+    with _executors_lock:
+        return {kind: executor.stats() for kind, executor in _executors.items()}
+
+def shutdown(wait: bool = True):
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=wait)
+        _executors.clear()
@@ -1,3 +1,9 @@
+import mmap
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
 def read_file_bytes(path: str) -> bytes:
     """Read bytes from a file."""
     with open(path, "rb") as f:
@@ -7,3 +13,82 @@ def write_file_bytes(path: str, data: bytes):
     """Write bytes to a file."""
     with open(path, "wb") as f:
         f.write(data)
+
+def iter_chunks(stream, chunk_size: int):
+    """Yield successive chunks read from a binary stream until it is exhausted."""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def read_chunks(stream, chunk_size: int, length: int = None, use_mmap: bool = False):
+    """Yield memoryviews over up to length bytes of a binary file, from its current position.
+
+    With use_mmap the file is mapped and sliced without copying; otherwise
+    one buffer of chunk_size bytes is filled with readinto and reused, so
+    each view is only valid until the next one is requested.
+    """
+    start = stream.tell()
+    if length is None:
+        length = os.fstat(stream.fileno()).st_size - start
+    if length <= 0:
+        return
+    if use_mmap:
+        with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            for offset in range(start, start + length, chunk_size):
+                with view[offset:min(offset + chunk_size, start + length)] as chunk:
+                    yield chunk
+        stream.seek(start + length)
+        return
+    buffer = bytearray(chunk_size)
+    with memoryview(buffer) as view:
+        remaining = length
+        while remaining:
+            count = stream.readinto(view[:min(chunk_size, remaining)])
+            if not count:
+                raise EOFError(f"File ended {remaining} bytes early")
+            remaining -= count
+            yield view[:count]
+
+@contextmanager
+def atomic_write(path: str):
+    """Open a temp file next to path for writing; it replaces path only if the block succeeds."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        # Opened by path so f.name can be handed to other processes
+        with open(temp_path, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def private_dir(path: str) -> str:
+    """Create path owner-only if it is missing; refuse one that another user could read or replace.
+
+    Raises PermissionError unless path is a real directory (not a symlink)
+    owned by the current user with mode 0700.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    # Windows has no uid or POSIX modes; there the directory is trusted as found
+    if hasattr(os, 'getuid'):
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"{path} is owned by uid {info.st_uid}, not the current user")
+        if stat.S_IMODE(info.st_mode) != 0o700:
+            raise PermissionError(f"{path} has mode {stat.S_IMODE(info.st_mode):o}; chmod 700 it to use it")
+    return path
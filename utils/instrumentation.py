@@ -0,0 +1,141 @@
+"""Per-request, per-stage timing with perf_counter_ns.
+
+A RequestTimer is created for each API call and records how long each stage
+took (parse, decode, keygen, dispatch, crypto, encode, serialize). Finished
+timers feed a process-wide MetricsRegistry, which renders Prometheus text
+for the /metrics endpoint.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ('parse', 'decode', 'keygen', 'dispatch', 'crypto', 'encode', 'serialize')
+
+# Histogram bucket upper bounds in seconds, 10µs .. 10s
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+class RequestTimer:
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.stages_ns = {}
+        self._start_ns = time.perf_counter_ns()
+        self.total_ns = None
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter_ns() - start)
+
+    def add(self, name: str, duration_ns: int):
+        """Record a stage duration; repeated stages accumulate."""
+        self.stages_ns[name] = self.stages_ns.get(name, 0) + duration_ns
+
+    def add_ms(self, name: str, duration_ms: float):
+        self.add(name, int(duration_ms * 1_000_000))
+
+    def carve(self, from_stage: str, stage: str, duration_ms: float):
+        """Move time measured elsewhere (e.g. inside a worker) out of from_stage into stage.
+
+        Used to split an executor round trip into its 'crypto' part and the
+        'dispatch' overhead around it.
+        """
+        duration_ns = min(int(duration_ms * 1_000_000), self.stages_ns.get(from_stage, 0))
+        self.add(from_stage, -duration_ns)
+        self.add(stage, duration_ns)
+
+    def elapsed_ns(self) -> int:
+        return time.perf_counter_ns() - self._start_ns
+
+    def stages_ms(self) -> dict:
+        return {name: round(ns / 1_000_000, 3) for name, ns in self.stages_ns.items()}
+
+    def server_timing(self) -> str:
+        """Render the stages as a Server-Timing header value (durations in ms)."""
+        parts = [f"{name};dur={ns / 1_000_000:.3f}" for name, ns in self.stages_ns.items()]
+        parts.append(f"total;dur={(self.total_ns or self.elapsed_ns()) / 1_000_000:.3f}")
+        return ', '.join(parts)
+
+    def log_record(self) -> dict:
+        return {
+            'endpoint': self.endpoint,
+            'totalMs': round((self.total_ns or self.elapsed_ns()) / 1_000_000, 3),
+            'stages': self.stages_ms(),
+        }
+
+    def finish(self, success: bool = True, registry=None):
+        """Stop the clock and record this request in the registry (the global one by default)."""
+        self.total_ns = self.elapsed_ns()
+        (registry or metrics).record(self, success)
+        return self
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}  # (endpoint, outcome) -> count
+        self._durations = {}  # (endpoint, stage) -> _Histogram
+
+    def record(self, timer: RequestTimer, success: bool):
+        outcome = 'success' if success else 'error'
+        with self._lock:
+            key = (timer.endpoint, outcome)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            observations = list(timer.stages_ns.items()) + [('total', timer.total_ns)]
+            for stage, ns in observations:
+                histogram = self._durations.get((timer.endpoint, stage))
+                if histogram is None:
+                    histogram = self._durations[(timer.endpoint, stage)] = _Histogram()
+                histogram.observe(ns / 1_000_000_000)
+
+    def render_prometheus(self, gauges: dict = None, counters: dict = None) -> str:
+        """Render all metrics in the Prometheus text exposition format.
+
+        gauges maps a metric name to {((label, value), ...): sample} and lets
+        callers publish point-in-time values such as key pool depth. counters
+        has the same shape for values that only ever go up (hits, evictions);
+        they are typed counter and get a _total suffix so rate() works.
+        """
+        lines = [
+            '# HELP crypto_requests_total API requests handled, by endpoint and outcome.',
+            '# TYPE crypto_requests_total counter',
+        ]
+        with self._lock:
+            for (endpoint, outcome), count in sorted(self._requests.items()):
+                lines.append(f'crypto_requests_total{{endpoint="{endpoint}",outcome="{outcome}"}} {count}')
+            lines.append('# HELP crypto_stage_duration_seconds Time spent in each stage of a request.')
+            lines.append('# TYPE crypto_stage_duration_seconds histogram')
+            for (endpoint, stage), histogram in sorted(self._durations.items()):
+                labels = f'endpoint="{endpoint}",stage="{stage}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'crypto_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'crypto_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'crypto_stage_duration_seconds_sum{{{labels}}} {histogram.sum:.9f}')
+                lines.append(f'crypto_stage_duration_seconds_count{{{labels}}} {histogram.count}')
+        typed = [(name, 'gauge', samples) for name, samples in (gauges or {}).items()]
+        typed += [(f'{name}_total', 'counter', samples) for name, samples in (counters or {}).items()]
+        for name, kind, samples in typed:
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples.items():
+                label_text = ','.join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
@@ -1,11 +1,108 @@
+"""Keys, IVs and nonces.
+
+Random bytes come from an EntropyPool that reads os.urandom a block at a
+time and hands out slices of it, so a request that needs a key and an IV
+costs no syscall most of the time. Handed-out bytes are wiped from the
+buffer. After a fork the child throws its copy of the buffer away (and
+NonceCounters pick a new fixed field) so parent and child never hand out
+the same bytes.
+"""
 import os
 import base64
+import threading
+import weakref
+from crypto_tool import config
+
+# Live pools and counters, reset in a forked child
+_fork_sensitive = weakref.WeakSet()
+
+class EntropyPool:
+    """Thread-safe buffer of os.urandom output, refilled block_size bytes at a time."""
+
+    def __init__(self, block_size: int = None):
+        self.block_size = block_size or config.ENTROPY_BLOCK_SIZE
+        self._lock = threading.Lock()
+        self._zeros = bytes(self.block_size)
+        self._buffer = bytearray(self.block_size)
+        self._view = memoryview(self._buffer)
+        # Start empty so the first take() fills the buffer
+        self._offset = self.block_size
+        _fork_sensitive.add(self)
+
+    def take(self, size: int) -> bytes:
+        # Requests bigger than a block gain nothing from buffering
+        if size > self.block_size:
+            return os.urandom(size)
+        with self._lock:
+            start = self._offset
+            if self.block_size - start < size:
+                self._view[:] = os.urandom(self.block_size)
+                start = 0
+            end = self._offset = start + size
+            data = bytes(self._view[start:end])
+            self._view[start:end] = self._zeros[:size]
+        return data
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._view[:] = self._zeros
+        self._offset = self.block_size
+
+class NonceCounter:
+    """Deterministic GCM nonces for one key: fixed field | big-endian invocation counter.
+
+    Nonces never repeat for the lifetime of the counter without touching the
+    entropy source; OverflowError is raised once the counter is exhausted,
+    at which point the key must be retired.
+    """
+
+    def __init__(self, size: int = None, fixed_size: int = 4):
+        self.size = size or config.GCM_IV_SIZE
+        self.fixed_size = fixed_size
+        self._limit = 1 << (8 * (self.size - fixed_size))
+        self._lock = threading.Lock()
+        self._reseed()
+        _fork_sensitive.add(self)
+
+    def _reseed(self):
+        self.fixed = default_pool.take(self.fixed_size)
+        self._counter = 0
+
+    def next(self) -> bytes:
+        with self._lock:
+            if self._counter >= self._limit:
+                raise OverflowError("Nonce counter exhausted; use a new key")
+            counter, self._counter = self._counter, self._counter + 1
+        return self.fixed + counter.to_bytes(self.size - self.fixed_size, 'big')
+
+    def _after_fork(self):
+        # The child shares the key but must not replay the parent's nonces
+        self._lock = threading.Lock()
+        self._reseed()
+
+def _after_fork_in_child():
+    # Pools first, so counters reseed from fresh entropy
+    objects = list(_fork_sensitive)
+    for obj in objects:
+        if isinstance(obj, EntropyPool):
+            obj._after_fork()
+    for obj in objects:
+        if isinstance(obj, NonceCounter):
+            obj._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+default_pool = EntropyPool()
+
+def random_bytes(size: int) -> bytes:
+    return default_pool.take(size)
 
 def generate_aes_key(key_size: int = 32) -> bytes:
-    return os.urandom(key_size)
+    return default_pool.take(key_size)
 
 def generate_iv(block_size: int = 16) -> bytes:
-    return os.urandom(block_size)
+    return default_pool.take(block_size)
 
 def to_base64(data: bytes) -> str:
     return base64.b64encode(data).decode()
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import deque
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.backends import default_backend
+from crypto_tool.utils.log import event, get_logger
+
+log = get_logger('crypto_tool.key_pool')
+
+def generate_rsa_key(key_size: int = 2048):
+    return rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=key_size,
+        backend=default_backend()
+    )
+
+class RSAKeyPool:
+    """Pool of pre-generated RSA private keys, kept topped up by a background thread.
+
+    acquire() hands out a ready key when one is available and only falls back
+    to generating inline when the pool for that key size has run dry.
+    generate(key_size) produces keys for both refills and misses and may hand
+    the work off to another process.
+    """
+
+    def __init__(self, key_sizes=(2048,), depth: int = 8, generate=generate_rsa_key):
+        self.depth = depth
+        self._generate = generate
+        self._keys = {size: deque() for size in key_sizes}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._running = False
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.last_refill_ms = 0.0
+        self.total_refill_ms = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._refill_loop, name="rsa-key-pool", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def acquire(self, key_size: int = 2048):
+        """Return (private_key, hit) where hit is False if the key was generated inline."""
+        if key_size not in self._keys:
+            raise ValueError(f"Unsupported RSA key size {key_size}; pool serves {sorted(self._keys)}")
+        self.start()
+        with self._lock:
+            keys = self._keys[key_size]
+            key = keys.popleft() if keys else None
+            if key is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._wakeup.set()
+        if key is None:
+            return self._generate(key_size), False
+        return key, True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'depth': {str(size): len(keys) for size, keys in self._keys.items()},
+                'target': self.depth,
+                'hits': self.hits,
+                'misses': self.misses,
+                'refills': self.refills,
+                'lastRefillMs': round(self.last_refill_ms, 2),
+                'avgRefillMs': round(self.total_refill_ms / self.refills, 2) if self.refills else 0.0,
+            }
+
+    def _next_size(self):
+        with self._lock:
+            # Refill the emptiest size first so one hot size can't starve the rest
+            size = min(self._keys, key=lambda s: len(self._keys[s]))
+            return size if len(self._keys[size]) < self.depth else None
+
+    def _refill_loop(self):
+        while self._running:
+            size = self._next_size()
+            if size is None:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            start = time.perf_counter()
+            try:
+                key = self._generate(size)
+            except Exception as e:
+                # Back off instead of spinning; acquire() still works via inline generation
+                log.warning("RSA key pool refill failed", extra=event('rsa/pool', keySize=size, error=str(e)))
+                self._wakeup.wait(1.0)
+                self._wakeup.clear()
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._keys[size].append(key)
+                self.refills += 1
+                self.last_refill_ms = elapsed
+                self.total_refill_ms += elapsed
@@ -0,0 +1,142 @@
+"""Private keys kept on disk and reused across requests and restarts.
+
+Each key is one unencrypted PKCS#8 DER file, <key id>.der, readable by the
+owner only, in a directory the store refuses to use unless it is owned by
+the current user with mode 0700. Nothing is read at startup: a key is parsed the first time it
+is asked for and the key object then stays in a bounded LRU, so startup
+time does not depend on how many keys the store holds and a hot key is
+never parsed twice.
+"""
+import os
+import re
+import secrets
+import threading
+from collections import OrderedDict
+from crypto_tool import config
+from crypto_tool.utils.file_handler import atomic_write, private_dir
+
+KEY_KINDS = ('rsa-2048', 'rsa-3072', 'rsa-4096', 'p256', 'x25519')
+
+_KEY_ID = re.compile(r'^[0-9a-f]{32}$')
+
+class KeyNotFound(Exception):
+    """Raised for a key id that is malformed or not in the store."""
+
+def key_kind(private_key) -> str:
+    """The KEY_KINDS entry describing a loaded private key."""
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa, x25519
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return f"rsa-{private_key.key_size}"
+    if isinstance(private_key, ec.EllipticCurvePrivateKey) and private_key.curve.name == 'secp256r1':
+        return 'p256'
+    if isinstance(private_key, x25519.X25519PrivateKey):
+        return 'x25519'
+    raise ValueError(f"Unsupported key type {type(private_key).__name__}")
+
+class KeyStore:
+    def __init__(self, root: str, cache_size: int = None):
+        self.root = root
+        self.cache_size = cache_size or config.KEYSTORE_CACHE_SIZE
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._checked = False
+
+    def _private_root(self) -> str:
+        # Checked once per store, on first use, so an unsafe directory is refused before any key touches it
+        if not self._checked:
+            private_dir(self.root)
+            self._checked = True
+        return self.root
+
+    def path(self, key_id: str) -> str:
+        if not _KEY_ID.match(key_id or ''):
+            raise KeyNotFound(f"Invalid key id {key_id!r}")
+        return os.path.join(self._private_root(), key_id + '.der')
+
+    def _remember(self, key_id: str, private_key):
+        with self._lock:
+            self._keys[key_id] = private_key
+            self._keys.move_to_end(key_id)
+            while len(self._keys) > self.cache_size:
+                self._keys.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, private_key) -> str:
+        """Persist a private key under a new id and return the id."""
+        from cryptography.hazmat.primitives import serialization
+        key_kind(private_key)
+        der = private_key.private_bytes(
+            serialization.Encoding.DER,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )
+        key_id = secrets.token_hex(16)
+        # atomic_write's temp file is created 0600, so the key is never world-readable
+        with atomic_write(self.path(key_id)) as f:
+            f.write(der)
+        self._remember(key_id, private_key)
+        return key_id
+
+    def get(self, key_id: str):
+        """The private key object for key_id, parsed from disk only on a cache miss."""
+        path = self.path(key_id)
+        with self._lock:
+            private_key = self._keys.get(key_id)
+            if private_key is not None:
+                self._keys.move_to_end(key_id)
+                self.hits += 1
+                return private_key
+            self.misses += 1
+        from cryptography.hazmat.primitives import serialization
+        try:
+            with open(path, 'rb') as f:
+                der = f.read()
+        except FileNotFoundError:
+            raise KeyNotFound(f"No key {key_id}")
+        # The store only holds keys it serialized itself, so skip the costly RSA checks
+        private_key = serialization.load_der_private_key(der, password=None, unsafe_skip_rsa_key_validation=True)
+        self._remember(key_id, private_key)
+        return private_key
+
+    def get_kind(self, key_id: str, *kinds):
+        """get(key_id), checking the key is one of kinds; kinds may be prefixes such as 'rsa-'."""
+        private_key = self.get(key_id)
+        kind = key_kind(private_key)
+        if not any(kind == wanted or (wanted.endswith('-') and kind.startswith(wanted)) for wanted in kinds):
+            raise ValueError(f"Key {key_id} is {kind}, expected {' or '.join(kinds)}")
+        return private_key
+
+    def delete(self, key_id: str):
+        try:
+            os.remove(self.path(key_id))
+        except FileNotFoundError:
+            raise KeyNotFound(f"No key {key_id}")
+        with self._lock:
+            self._keys.pop(key_id, None)
+
+    def ids(self) -> list:
+        """Every stored key id, from a directory listing; no key is parsed."""
+        names = os.listdir(self._private_root())
+        return sorted(name[:-4] for name in names if name.endswith('.der') and _KEY_ID.match(name[:-4]))
+
+    def describe(self, key_id: str) -> dict:
+        from cryptography.hazmat.primitives import serialization
+        private_key = self.get(key_id)
+        public_der = private_key.public_key().public_bytes(
+            serialization.Encoding.DER,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        return {'keyId': key_id, 'kind': key_kind(private_key), 'publicKey': public_der.hex()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'loaded': len(self._keys),
+                'maxLoaded': self.cache_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
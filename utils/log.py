@@ -0,0 +1,141 @@
+"""Structured, non-blocking logging for the web servers.
+
+Records are turned into one JSON object per line, but only on a background
+QueueListener thread: the request thread just runs two cheap filters and
+appends the record to a queue. Success logs can be sampled and every
+endpoint is rate limited, so a flood of requests cannot turn logging into
+the bottleneck. Warnings and errors always get through.
+
+Records go to stderr so they never mix with data a command writes to
+stdout. Nothing starts on import: a server calls setup_logging() once at
+startup, and until then crypto_tool loggers fall back to the logging
+module's last-resort handler (warnings and errors only, on stderr).
+
+    setup_logging()
+    log = get_logger('crypto_tool.web')
+    log.info("Hash successful", extra=event('hash', sample=True, inputSize=n))
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from crypto_tool import config
+
+_setup_lock = threading.Lock()
+_listener = None
+_handler = None
+
+def event(endpoint: str, sample: bool = False, **fields) -> dict:
+    """Build the `extra` mapping for a structured record.
+
+    sample=True marks routine success records that may be dropped according
+    to config.LOG_SUCCESS_SAMPLE_RATE.
+    """
+    return {'fields': {'endpoint': endpoint, **fields}, 'sample': sample}
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records flagged with sample=True."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1.0 or not getattr(record, 'sample', False):
+            return True
+        return random.random() < self.rate
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per endpoint for records below WARNING."""
+
+    def __init__(self, per_second: float):
+        super().__init__()
+        self.per_second = per_second
+        self._buckets = {}  # endpoint -> [tokens, last refill time]
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record):
+        if self.per_second <= 0 or record.levelno >= logging.WARNING:
+            return True
+        endpoint = (getattr(record, 'fields', None) or {}).get('endpoint', record.name)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                bucket = self._buckets[endpoint] = [self.per_second, now]
+            bucket[0] = min(self.per_second, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                self.dropped += 1
+                return False
+            bucket[0] -= 1.0
+            return True
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves JSON formatting to the listener thread."""
+
+    def prepare(self, record):
+        # Resolve %-args and tracebacks now, since they may not be picklable or
+        # may change later; everything else is formatted off the request thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging(level=None, sample_rate: float = None, rate_limit: float = None, stream=None):
+    """Route the crypto_tool logger through a queue to a JSON handler on stderr (idempotent)."""
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+        log_queue = queue.SimpleQueue()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JSONFormatter())
+        _listener = QueueListener(log_queue, output, respect_handler_level=False)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        _handler = _DeferredQueueHandler(log_queue)
+        _handler.addFilter(SamplingFilter(config.LOG_SUCCESS_SAMPLE_RATE if sample_rate is None else sample_rate))
+        _handler.addFilter(RateLimitFilter(config.LOG_RATE_LIMIT if rate_limit is None else rate_limit))
+
+        root = logging.getLogger('crypto_tool')
+        root.setLevel(level or config.LOG_LEVEL)
+        root.addHandler(_handler)
+        root.propagate = False
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is not None:
+            logging.getLogger('crypto_tool').removeHandler(_handler)
+            _listener.stop()
+            _listener = None
+            _handler = None
+
+def get_logger(name: str = 'crypto_tool') -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,61 @@
+"""Encrypted objects on disk, readable by byte range.
+
+Each object is a segmented AES-GCM container (algorithms.segmented) named by
+a random id. The server never keeps the key: it is handed back on upload and
+must accompany every read, so a range read decrypts only the segments that
+cover it. Like the keystore, the store only uses a directory owned by the
+current user with mode 0700.
+"""
+import os
+import re
+import secrets
+from crypto_tool.algorithms import segmented
+from crypto_tool.utils.file_handler import atomic_write, private_dir
+
+_OBJECT_ID = re.compile(r'^[0-9a-f]{32}$')
+
+class ObjectNotFound(Exception):
+    """Raised for an object id that is malformed or not in the store."""
+
+class ObjectStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._checked = False
+
+    def _private_root(self) -> str:
+        if not self._checked:
+            private_dir(self.root)
+            self._checked = True
+        return self.root
+
+    def path(self, object_id: str) -> str:
+        if not _OBJECT_ID.match(object_id or ''):
+            raise ObjectNotFound(f"Invalid object id {object_id!r}")
+        return os.path.join(self._private_root(), object_id + '.cts')
+
+    def put(self, source, key: bytes, key_id=b'', segment_size: int = None) -> dict:
+        """Encrypt a binary stream into a new object; return its id, sizes and segment size."""
+        object_id = secrets.token_hex(16)
+        path = self.path(object_id)
+        with atomic_write(path) as target:
+            header, size = segmented.encrypt_stream(source, target, key, key_id, segment_size)
+        return {
+            'objectId': object_id,
+            'size': size,
+            'encryptedSize': os.path.getsize(path),
+            'segmentSize': header.segment_size
+        }
+
+    def open(self, object_id: str):
+        try:
+            return open(self.path(object_id), 'rb')
+        except FileNotFoundError:
+            raise ObjectNotFound(f"No object {object_id}")
+
+    def size(self, stream) -> int:
+        """Plaintext size of an object opened with open()."""
+        return segmented.open_container(stream)[3]
+
+    def read_range(self, object_id: str, key: bytes, start: int, end: int) -> bytes:
+        with self.open(object_id) as stream:
+            return segmented.read_range(stream, key, start, end)
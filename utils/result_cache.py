@@ -0,0 +1,105 @@
+"""Content-addressed cache for the outputs of deterministic operations.
+
+A result is addressed by its input size plus a SHA-256 fingerprint of the
+operation's parameters and input, so the same bytes hashed the same way
+are only ever hashed once. SHA-256 is the fingerprint because on CPUs with
+SHA extensions it is the cheapest collision-resistant hash hashlib has, and
+a weaker one would let crafted inputs share an address and be served each
+other's results.
+
+Results are dicts of named blobs. They live in an in-memory LRU bounded by
+bytes and, when a directory is given, also as one wire envelope file per
+address; a disk hit is promoted back into memory. Disk entries are a few
+dozen bytes each and are never evicted, so clearing the directory is the
+way to reclaim it.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from crypto_tool import config
+from crypto_tool.utils import wire
+from crypto_tool.utils.file_handler import atomic_write
+
+# Rough per-entry cost of the dict, key and bytes objects, counted against max_bytes
+_ENTRY_OVERHEAD = 256
+
+def address(data, *params) -> str:
+    """Content address of data under an operation's params: hex size, then the SHA-256 fingerprint."""
+    # repr() never yields a raw newline, so the separator keeps params and data apart
+    fingerprint = hashlib.sha256(f"{params!r}\n".encode('utf-8'))
+    fingerprint.update(data)
+    return f"{len(data):x}-{fingerprint.hexdigest()}"
+
+class ResultCache:
+    def __init__(self, max_bytes: int = None, directory: str = None):
+        self.max_bytes = config.RESULT_CACHE_MEMORY_BYTES if max_bytes is None else max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.cte')
+
+    def _remember(self, key: str, blobs: dict):
+        size = _ENTRY_OVERHEAD + len(key) + sum(len(blob) for blob in blobs.values())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (blobs, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def get(self, key: str):
+        """The blobs stored under key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        if self.directory:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    blobs = {name: bytes(blob) for name, blob in wire.unpack_envelope(f.read()).items()}
+            except (OSError, ValueError):
+                pass
+            else:
+                self._remember(key, blobs)
+                with self._lock:
+                    self.disk_hits += 1
+                return blobs
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, blobs: dict):
+        self._remember(key, blobs)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            with atomic_write(self._path(key)) as f:
+                f.write(wire.pack_envelope(blobs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'maxBytes': self.max_bytes,
+                'directory': self.directory,
+                'hits': self.hits,
+                'diskHits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,81 @@
+"""Binary wire formats for the web API.
+
+Clients that send raw bytes (Content-Type: application/octet-stream) and ask
+for a binary reply through the Accept header skip the base64 data URL and
+JSON round trip entirely. Scalar metadata (IV, sizes, timings) then travels
+in X-Crypto-* headers and the body is either the single result blob or a
+length-prefixed envelope holding several blobs:
+
+    b'CTE1' | u8 field count | { u8 name length | name | u32 value length | value }*
+
+All integers are big-endian.
+"""
+import json
+import re
+import struct
+from urllib.parse import quote
+
+JSON = 'application/json'
+OCTET_STREAM = 'application/octet-stream'
+ENVELOPE = 'application/vnd.crypto-tool.envelope'
+ENVELOPE_MAGIC = b'CTE1'
+HEADER_PREFIX = 'X-Crypto-'
+
+def negotiate(accept: str) -> str:
+    """Pick the response format for an Accept header; JSON unless binary is asked for."""
+    accept = accept or ''
+    if ENVELOPE in accept:
+        return ENVELOPE
+    if OCTET_STREAM in accept:
+        return OCTET_STREAM
+    return JSON
+
+def pack_envelope(fields: dict) -> bytes:
+    parts = [ENVELOPE_MAGIC, struct.pack('>B', len(fields))]
+    for name, value in fields.items():
+        encoded = name.encode('ascii')
+        parts.append(struct.pack('>B', len(encoded)))
+        parts.append(encoded)
+        parts.append(struct.pack('>I', len(value)))
+        parts.append(value)
+    return b''.join(parts)
+
+def unpack_envelope(data) -> dict:
+    """Parse an envelope into {name: memoryview}, without copying the values."""
+    view = memoryview(data)
+    if bytes(view[:4]) != ENVELOPE_MAGIC:
+        raise ValueError("Not a crypto-tool envelope")
+    count = view[4]
+    offset = 5
+    fields = {}
+    for _ in range(count):
+        name_len = view[offset]
+        name = bytes(view[offset + 1:offset + 1 + name_len]).decode('ascii')
+        offset += 1 + name_len
+        (value_len,) = struct.unpack_from('>I', view, offset)
+        offset += 4
+        if offset + value_len > len(view):
+            raise ValueError(f"Envelope field {name!r} is truncated")
+        fields[name] = view[offset:offset + value_len]
+        offset += value_len
+    return fields
+
+def metadata_headers(result: dict) -> dict:
+    """Turn scalar result fields into headers, e.g. encryptTime -> X-Crypto-Encrypt-Time.
+
+    Lists and dicts are sent as compact JSON; non-ASCII values (file names) are
+    percent-encoded. None means the field is absent, so no header is sent.
+    """
+    headers = {}
+    for name, value in result.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        elif isinstance(value, (list, dict)):
+            value = json.dumps(value, separators=(',', ':'))
+        else:
+            value = str(value)
+        header = HEADER_PREFIX + '-'.join(part.capitalize() for part in re.split(r'(?<=[a-z0-9])(?=[A-Z])', name))
+        headers[header] = value if value.isascii() else quote(value)
+    return headers
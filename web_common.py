@@ -0,0 +1,446 @@
+"""Pieces shared by the Flask (crypto_web_app) and ASGI (crypto_asgi_app) servers."""
+import base64
+import json
+import re
+import tempfile
+from contextlib import nullcontext
+from urllib.parse import unquote
+from crypto_tool import config
+from crypto_tool.algorithms import batch, digest, ecdh, gcm, hybrid, operations, tree_hash
+from crypto_tool.utils import executor, key_generator, result_cache, wire
+from crypto_tool.utils.instrumentation import metrics
+from crypto_tool.utils.key_pool import RSAKeyPool
+from crypto_tool.utils.keystore import KEY_KINDS, KeyNotFound, KeyStore
+from crypto_tool.utils.object_store import ObjectStore
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header asks for bytes past the end of an object."""
+
+# Reported for any tag mismatch; never says which of key, IV, tag or data was wrong
+AUTHENTICATION_FAILED = "Authentication failed: wrong key, IV or tag, or corrupted data"
+
+class DecryptSpool:
+    """Decrypts an AES-GCM upload into a spool and only hands the plaintext out once the tag verifies.
+
+    Plaintext stays in memory up to config.DECRYPT_SPOOL_MEMORY bytes and
+    spills to a temp file beyond that, so large bodies are never held whole.
+    """
+
+    def __init__(self, key: bytes, iv: bytes, tag: bytes = None):
+        self._decryptor = gcm.StreamDecryptor(key, iv, tag)
+        self._spool = tempfile.SpooledTemporaryFile(max_size=config.DECRYPT_SPOOL_MEMORY)
+        self.size = 0
+
+    def write(self, chunk):
+        block = self._decryptor.update(chunk)
+        self._spool.write(block)
+        self.size += len(block)
+
+    def verify(self):
+        """Check the tag (InvalidTag on mismatch) and return the plaintext as a readable stream."""
+        self._decryptor.finalize()
+        self._spool.seek(0)
+        return self._spool
+
+    def close(self):
+        self._spool.close()
+
+def decrypt_params(headers) -> tuple:
+    """(key, iv, tag or None) for /api/aes/decrypt from the X-AES-Key, X-AES-IV and X-AES-Tag headers.
+
+    headers is any mapping with lower-case lookups (Flask's request.headers
+    or request_headers(scope)). Without X-AES-Tag the tag is read from the
+    end of the body.
+    """
+    key = request_key(headers.get('x-aes-key'))
+    iv_hex = headers.get('x-aes-iv')
+    if not iv_hex:
+        raise Exception("X-AES-IV header is required")
+    iv = bytes.fromhex(iv_hex)
+    if len(iv) != config.GCM_IV_SIZE:
+        raise Exception(f"AES-GCM IV must be {config.GCM_IV_SIZE} bytes, got {len(iv)}")
+    tag_hex = headers.get('x-aes-tag')
+    tag = bytes.fromhex(tag_hex) if tag_hex else None
+    if tag is not None and len(tag) != config.GCM_TAG_SIZE:
+        raise Exception(f"AES-GCM tag must be {config.GCM_TAG_SIZE} bytes, got {len(tag)}")
+    return key, iv, tag
+
+def decode_input(data: dict) -> bytes:
+    """Convert a JSON request payload ({'data', 'type', ...}) to the bytes to process."""
+    input_text = data['data']
+    if data['type'] == 'text':
+        return input_text.encode('utf-8')
+    # Handle base64 encoded file data, with or without a data URL prefix
+    if ',' in input_text:
+        return base64.b64decode(input_text.split(',')[1])
+    return base64.b64decode(input_text)
+
+def stage(timer, name: str):
+    """timer.stage(name), or a no-op when no RequestTimer is in play."""
+    return timer.stage(name) if timer is not None else nullcontext()
+
+def upload_info(file_name: str, size: int) -> dict:
+    """The request data describing a raw binary body of size bytes."""
+    # X-File-Name is percent-encoded so non-ASCII names survive the header
+    name = unquote(file_name) if file_name else 'upload.bin'
+    return {'name': name, 'size': size, 'type': 'file'}
+
+def read_payload(mimetype: str, body: bytes, file_name: str = None, timer=None):
+    """Return (data, input_bytes) for either a JSON payload or a raw binary body."""
+    if mimetype == wire.OCTET_STREAM:
+        return upload_info(file_name, len(body)), body
+    with stage(timer, 'parse'):
+        data = json.loads(body)
+    with stage(timer, 'decode'):
+        return data, decode_input(data)
+
+def parse_payload(mimetype: str, body: bytes, file_name: str = None, timer=None):
+    """Like read_payload, but return the input as sent rather than decoded.
+
+    That is the body of a binary upload, the UTF-8 of a text payload or the
+    base64 text of a file payload (data URL prefix dropped); payload_bytes()
+    decodes it. Lets a route consult a cache before paying for base64.
+    """
+    if mimetype == wire.OCTET_STREAM:
+        return read_payload(mimetype, body, file_name)
+    with stage(timer, 'parse'):
+        data = json.loads(body)
+    text = data['data']
+    if data['type'] == 'text':
+        return data, text.encode('utf-8')
+    return data, (text.split(',')[1] if ',' in text else text).encode('ascii')
+
+def _base64_input(data: dict) -> bool:
+    return 'data' in data and data['type'] != 'text'
+
+def payload_bytes(data: dict, sent: bytes) -> bytes:
+    """Decode input returned by parse_payload."""
+    return base64.b64decode(sent) if _base64_input(data) else sent
+
+# Blobs the JSON contract carries as hex (including per-algorithm digests); everything else is base64
+HEX_FIELDS = ('hash', 'sharedKey', 'keyConfirmation', 'tag', *digest.ALGORITHMS)
+# Blobs of concatenated SHA-256 digests, carried in JSON as a list of hex strings
+MANIFEST_FIELDS = ('leaves',)
+
+def encode_blobs(result: dict, blobs: dict) -> dict:
+    """Merge raw binary outputs into a JSON-ready result."""
+    merged = dict(result)
+    for name, blob in blobs.items():
+        if name in MANIFEST_FIELDS:
+            merged[name] = [digest.hex() for digest in tree_hash.split_manifest(blob)]
+        else:
+            merged[name] = blob.hex() if name in HEX_FIELDS else base64.b64encode(blob).decode('utf-8')
+    return merged
+
+def render_result(result: dict, blobs: dict, accept: str, timer=None):
+    """Render a successful result as (body, content_type, headers) for the negotiated format.
+
+    blobs holds the raw binary outputs; they are only base64/hex encoded when
+    the client wants JSON. With a timer, the stages measured so far are
+    included as 'timings' (JSON) or X-Crypto-Timings (binary).
+    """
+    content_type = wire.negotiate(accept)
+    if content_type == wire.JSON:
+        with stage(timer, 'encode'):
+            merged = encode_blobs(result, blobs)
+        if timer is not None:
+            merged['timings'] = timer.stages_ms()
+        with stage(timer, 'serialize'):
+            return json.dumps(merged).encode('utf-8'), content_type, {}
+    headers = wire.metadata_headers(result)
+    if timer is not None:
+        headers['X-Crypto-Timings'] = json.dumps(timer.stages_ms(), separators=(',', ':'))
+    if content_type == wire.OCTET_STREAM and len(blobs) == 1:
+        (body,) = blobs.values()
+        return body, content_type, headers
+    with stage(timer, 'encode'):
+        return wire.pack_envelope(blobs), wire.ENVELOPE, headers
+
+HASH_MODES = ('sha256', 'tree', 'multi')
+
+def hash_options(data: dict, args=None):
+    """Return (mode, leaf_size, algorithms) for /api/hash from the JSON payload, falling back to query args.
+
+    Naming digest algorithms implies mode 'multi'.
+    """
+    args = args or {}
+    requested = data.get('algorithms') or args.get('algorithms')
+    mode = data.get('mode') or args.get('mode') or ('multi' if requested else 'sha256')
+    if mode not in HASH_MODES:
+        raise Exception(f"Unknown hash mode {mode!r}, expected one of {', '.join(HASH_MODES)}")
+    if requested and mode != 'multi':
+        raise Exception(f"Hash mode {mode!r} does not take an algorithms list")
+    algorithms = digest.parse_algorithms(requested or config.DIGEST_DEFAULT_ALGORITHMS) if mode == 'multi' else None
+    leaf_size = int(data.get('leafSize') or args.get('leafSize') or config.HASH_TREE_LEAF_SIZE)
+    if not config.HASH_TREE_MIN_LEAF_SIZE <= leaf_size <= config.HASH_TREE_MAX_LEAF_SIZE:
+        raise Exception(f"leafSize must be between {config.HASH_TREE_MIN_LEAF_SIZE} and {config.HASH_TREE_MAX_LEAF_SIZE} bytes")
+    return mode, leaf_size, algorithms
+
+def hash_cache_key(data: dict, sent: bytes, mode: str, leaf_size: int, algorithms):
+    """Result cache address of an /api/hash request, or None when caching it cannot pay off.
+
+    The address costs one SHA-256 pass over the input, which is all a
+    sha256 or tree hash of raw bytes costs too, so only multi-digest runs
+    and base64 payloads (where a hit also skips decoding) are cached.
+    Text and binary uploads of the same bytes share an address.
+    """
+    if mode != 'multi' and not _base64_input(data):
+        return None
+    params = ('hash', mode, 'base64' if _base64_input(data) else 'raw')
+    if mode == 'tree':
+        params += (leaf_size,)
+    elif mode == 'multi':
+        params += tuple(algorithms)
+    return result_cache.address(sent, *params)
+
+def hash_result(data: dict, mode: str, leaf_size: int, algorithms, blobs: dict, hash_time: float,
+                throughput=None, cached: bool = False) -> dict:
+    result = {'success': True, 'originalName': data['name'], 'originalSize': data['size']}
+    if mode == 'multi':
+        result.update(mode=mode, algorithms=algorithms, throughput=throughput)
+    elif mode == 'tree':
+        result.update(mode=mode, leafSize=leaf_size, leafCount=len(blobs['leaves']) // tree_hash.DIGEST_SIZE)
+    result.update(hashTime=f"{hash_time:.3f}", cached=cached)
+    return result
+
+def parse_batch(data: dict):
+    """Validate a /api/batch payload and return its items as (op, input_bytes) pairs."""
+    raw_items = data.get('items')
+    if not isinstance(raw_items, list) or not raw_items:
+        raise Exception("Batch requests need a non-empty 'items' list")
+    if len(raw_items) > config.BATCH_MAX_ITEMS:
+        raise Exception(f"Batch has {len(raw_items)} items; the limit is {config.BATCH_MAX_ITEMS}")
+    items = []
+    for index, item in enumerate(raw_items):
+        op = item.get('op')
+        if op not in batch.OPERATIONS:
+            raise Exception(f"Item {index}: unknown op {op!r}, expected one of {', '.join(batch.OPERATIONS)}")
+        # Key agreement takes no input
+        items.append((op, b'' if op == 'ecdh' else decode_input(item)))
+    return items
+
+def batch_rsa_key(items, key_size: int, key_id: str = None):
+    """One RSA key for the whole batch, stored (key_id) or pooled; return (public DER or None, pool hit)."""
+    if not any(op == 'rsa' for op, _ in items):
+        return None, None
+    from cryptography.hazmat.primitives import serialization
+    private_key, pool_hit = rsa_private_key(key_size, key_id)
+    der = private_key.public_key().public_bytes(
+        serialization.Encoding.DER,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return der, pool_hit
+
+def batch_result(results, batch_time: float, pool_hit=None, aes_key: bytes = None) -> dict:
+    """The /api/batch response; like /api/aes it hands back the AES key when any aes item used it."""
+    succeeded = sum(1 for fields, _ in results if fields['success'])
+    result = {
+        'success': True,
+        'itemCount': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'batchTime': f"{batch_time:.2f}",
+        'itemsPerSecond': round(len(results) / (batch_time / 1000)) if batch_time else None,
+        'keyPoolHit': pool_hit,
+        'results': [encode_blobs(fields, blobs) for fields, blobs in results]
+    }
+    if aes_key is not None and any(fields['op'] == 'aes' and fields['success'] for fields, _ in results):
+        result['key'] = aes_key.hex()
+    return result
+
+def request_key(key_hex: str, generate: bool = False) -> bytes:
+    """AES key from a hex X-AES-Key header; a fresh one if allowed and absent."""
+    if not key_hex:
+        if generate:
+            return key_generator.generate_aes_key(32)
+        raise Exception("X-AES-Key header is required")
+    key = bytes.fromhex(key_hex)
+    if len(key) not in (16, 24, 32):
+        raise Exception(f"AES key must be 16, 24 or 32 bytes, got {len(key)}")
+    return key
+
+_BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def parse_range(header: str, size: int):
+    """Turn a single-range Range header into (start, end) with end exclusive.
+
+    Return None when there is no usable Range (absent, malformed or several
+    ranges), in which case the whole object is served.
+    """
+    match = _BYTE_RANGE.match((header or '').strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size
+    else:
+        start, end = int(first), min(size, int(last) + 1) if last else size
+    if start >= size or start >= end:
+        raise RangeNotSatisfiable(f"Range {header!r} is outside 0..{size}")
+    return start, end
+
+def range_headers(start: int, end: int, size: int, partial: bool) -> dict:
+    headers = {'Accept-Ranges': 'bytes', 'Content-Length': str(end - start)}
+    if partial:
+        headers['Content-Range'] = f"bytes {start}-{end - 1}/{size}"
+    return headers
+
+# 'oaep' encrypts the payload itself; 'hybrid' wraps an AES-GCM data key (algorithms.hybrid)
+RSA_MODES = ('oaep', 'hybrid')
+
+def rsa_mode(data: dict, input_size: int, key_size: int) -> str:
+    """The /api/rsa mode from the request data; payloads too big for OAEP default to 'hybrid'."""
+    max_len = hybrid.oaep_max_plaintext(key_size)
+    mode = data.get('mode') or ('oaep' if input_size <= max_len else 'hybrid')
+    if mode not in RSA_MODES:
+        raise Exception(f"Unknown RSA mode {mode!r}, expected one of {', '.join(RSA_MODES)}")
+    if mode == 'oaep' and input_size > max_len:
+        raise hybrid.PlaintextTooLarge(f"RSA-{key_size} can only encrypt up to {max_len} bytes. Your input is {input_size} bytes. "
+                                       f"Use mode 'hybrid' for larger payloads.")
+    return mode
+
+def generate_pooled_rsa_key(key_size):
+    # Keygen runs on the 'rsa' executor; the key comes back as DER we produced ourselves
+    from cryptography.hazmat.primitives import serialization
+    der = executor.run('rsa', operations.rsa_generate_der, key_size)
+    return serialization.load_der_private_key(der, password=None, unsafe_skip_rsa_key_validation=True)
+
+# Uploaded objects, stored as segmented AES-GCM containers
+object_store = ObjectStore(config.OBJECT_STORE_DIR)
+
+# Digests already computed, by content address; see utils.result_cache
+hash_cache = result_cache.ResultCache(config.RESULT_CACHE_MEMORY_BYTES, config.RESULT_CACHE_DIR)
+
+# Private keys kept across restarts; nothing is parsed until a keyId asks for it
+keystore = KeyStore(config.KEYSTORE_DIR)
+
+# Pre-generated RSA keys so /api/rsa does not pay for keygen on the request path
+rsa_key_pool = RSAKeyPool(config.RSA_POOL_KEY_SIZES, config.RSA_POOL_DEPTH, generate=generate_pooled_rsa_key)
+
+def rsa_key_size(data: dict) -> int:
+    """Key size of an RSA request: the stored key's when keyId names one, else keySize."""
+    if data.get('keyId'):
+        return keystore.get_kind(data['keyId'], 'rsa-').key_size
+    return int(data.get('keySize', config.RSA_KEY_SIZE))
+
+def rsa_private_key(key_size: int, key_id: str = None):
+    """The stored RSA key named by key_id (no keygen at all), else a pooled one; return (key, pool hit)."""
+    if key_id:
+        return keystore.get_kind(key_id, 'rsa-'), None
+    return rsa_key_pool.acquire(key_size)
+
+def rsa_seal_key(key_size: int, key_id: str = None):
+    """The RSA key a hybrid envelope is sealed to, as (key, keyId, pool hit).
+
+    A pooled key is stored first, so the envelope can always be opened by
+    /api/rsa/unseal with the keyId returned alongside it.
+    """
+    private_key, pool_hit = rsa_private_key(key_size, key_id)
+    return private_key, key_id or keystore.put(private_key), pool_hit
+
+def rsa_unseal_key(data: dict):
+    """The stored RSA key named by an /api/rsa/unseal request."""
+    if not data.get('keyId'):
+        raise Exception("Unsealing needs the keyId /api/rsa returned with the envelope")
+    return keystore.get_kind(data['keyId'], 'rsa-')
+
+def create_stored_key(kind: str) -> dict:
+    """Generate a key of one of KEY_KINDS, persist it and describe it."""
+    if kind not in KEY_KINDS:
+        raise Exception(f"Unknown key kind {kind!r}, expected one of {', '.join(KEY_KINDS)}")
+    if kind.startswith('rsa-'):
+        private_key, _ = rsa_key_pool.acquire(int(kind[4:]))
+    else:
+        private_key = ecdh.generate_private_key(kind)
+    return keystore.describe(keystore.put(private_key))
+
+def stored_static_key(curve: str):
+    """ECDHEngine resolver serving keystore keys of curve as static server keys."""
+    def resolve(key_id):
+        try:
+            private_key = keystore.get_kind(key_id, curve)
+        except KeyNotFound:
+            return None
+        return ecdh.StaticKey(curve, private_key, key_id)
+    return resolve
+
+# Static server keys and session key caches, one engine per curve; batch misses run on the 'ecdh' executor
+ecdh_engines = {
+    curve: ecdh.ECDHEngine(curve, runner=lambda fn, *args: executor.run('ecdh', fn, *args), resolver=stored_static_key(curve))
+    for curve in ecdh.CURVES
+}
+
+def ecdh_engine(curve: str = None) -> ecdh.ECDHEngine:
+    curve = curve or config.ECDH_DEFAULT_CURVE
+    if curve not in ecdh_engines:
+        raise Exception(f"Unknown curve {curve!r}, expected one of {', '.join(ecdh.CURVES)}")
+    return ecdh_engines[curve]
+
+def ecdh_agreement(data: dict):
+    """Run an /api/ecdh request; return (result, blobs).
+
+    peerPublicKey (hex) agrees with one client key and peerPublicKeys with
+    many at once. Session keys stay on the server: anyone may submit a
+    client's public key, so each agreement only returns a key confirmation
+    tag (ecdh.key_confirmation) the client can check against its own key.
+    With neither, the server also plays the client with a fresh ephemeral
+    key and checks that both sides derive the same key. keyId picks the
+    server key the client agreed with: the current or previous static key,
+    or a keystore key of the same curve.
+    """
+    engine = ecdh_engine(data.get('curve'))
+    info = (data.get('info') or '').encode('utf-8')
+    key_id = data.get('keyId')
+    result = {'success': True, 'curve': engine.curve}
+    if data.get('peerPublicKeys') is not None:
+        peers = [bytes.fromhex(peer) for peer in data['peerPublicKeys']]
+        if len(peers) > config.ECDH_MAX_PEERS:
+            raise Exception(f"Batch has {len(peers)} peer keys; the limit is {config.ECDH_MAX_PEERS}")
+        key_id, sessions = engine.agree_many(peers, key_id, info)
+        result.update(keyId=key_id, sessions=[{'keyConfirmation': ecdh.key_confirmation(key, peer).hex(), 'cached': cached}
+                                              for peer, (key, cached) in zip(peers, sessions)])
+        return result, {}
+    if data.get('peerPublicKey'):
+        peer = bytes.fromhex(data['peerPublicKey'])
+        key_id, session_key, cached = engine.agree(peer, key_id, info)
+        result.update(keyId=key_id, cached=cached, sessionKeyLength=len(session_key))
+        return result, {'keyConfirmation': ecdh.key_confirmation(session_key, peer)}
+    client_key = ecdh.generate_private_key(engine.curve)
+    client_public = ecdh.public_bytes(engine.curve, client_key.public_key())
+    key_id, server_session_key, _ = engine.agree(client_public, info=info)
+    server_public = ecdh.load_public_key(engine.curve, engine.static_key(key_id).public_bytes)
+    client_session_key = ecdh.derive_session_key(ecdh.exchange(engine.curve, client_key, server_public), info)
+    result.update(keyId=key_id, keyAgreement=server_session_key == client_session_key, sharedKeyLength=len(server_session_key))
+    return result, {'sharedKey': server_session_key}
+
+def metrics_text() -> str:
+    """Prometheus exposition of request metrics plus key pool, cache, keystore and executor gauges and counters."""
+    pool = rsa_key_pool.stats()
+    gauges = {
+        'crypto_rsa_pool_depth': {(('key_size', size),): depth for size, depth in pool['depth'].items()},
+        'crypto_rsa_pool_refill_avg_seconds': {(): pool['avgRefillMs'] / 1000},
+    }
+    # Rendered with a _total suffix
+    counters = {
+        'crypto_rsa_pool_hits': {(): pool['hits']},
+        'crypto_rsa_pool_misses': {(): pool['misses']},
+    }
+    ecdh_stats = {curve: engine.stats() for curve, engine in ecdh_engines.items()}
+    gauges['crypto_ecdh_sessions'] = {(('curve', curve),): stats['sessions'] for curve, stats in ecdh_stats.items()}
+    for field, name in (('hits', 'session_hits'), ('misses', 'session_misses'), ('rotations', 'key_rotations')):
+        counters[f'crypto_ecdh_{name}'] = {(('curve', curve),): stats[field] for curve, stats in ecdh_stats.items()}
+    cache = hash_cache.stats()
+    for field in ('entries', 'bytes'):
+        gauges[f'crypto_hash_cache_{field}'] = {(): cache[field]}
+    for field, name in (('hits', 'hits'), ('diskHits', 'disk_hits'), ('misses', 'misses'), ('evictions', 'evictions')):
+        counters[f'crypto_hash_cache_{name}'] = {(): cache[field]}
+    stored = keystore.stats()
+    gauges['crypto_keystore_loaded'] = {(): stored['loaded']}
+    for field in ('hits', 'misses', 'evictions'):
+        counters[f'crypto_keystore_{field}'] = {(): stored[field]}
+    executor_stats = executor.stats()
+    gauges['crypto_executor_pending'] = {(('backend', kind),): stats['pending'] for kind, stats in executor_stats.items()}
+    for field, name in (('completed', 'completed'), ('rejected', 'rejected'), ('timedOut', 'timed_out')):
+        counters[f'crypto_executor_{name}'] = {(('backend', kind),): stats[field] for kind, stats in executor_stats.items()}
+    return metrics.render_prometheus(gauges, counters)